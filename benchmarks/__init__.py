@@ -0,0 +1,10 @@
+"""
+Performance benchmarks for the API.
+
+Each module is a standalone script run from the project root with the
+same environment variables as the test suite, e.g.
+
+    python -m benchmarks.pagination
+
+Benchmarks create and destroy their own test database.
+"""
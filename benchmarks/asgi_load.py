@@ -0,0 +1,173 @@
+"""
+Load test comparing the WSGI path (gunicorn sync workers) with the ASGI
+path (gunicorn with uvicorn workers and async views) on the read-heavy
+endpoints. Both servers run against the same seeded SQLite database,
+and CONCURRENCY clients send requests for DURATION seconds to each
+endpoint, reporting latency percentiles and throughput. Each pair of
+runs is repeated with every query delayed by QUERY_LATENCIES_MS, as
+the round trip to a remote database would.
+
+    python -m benchmarks.asgi_load
+"""
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from benchmarks.utils import report, summarize
+
+WORKERS = 2
+CONCURRENCY = 32
+DURATION = 10
+PORT = 8765
+QUERY_LATENCIES_MS = [0, 5]
+APPLICATIONS = {
+    'wsgi': ('project5_api.wsgi:application', 'sync'),
+    'asgi': ('project5_api.asgi:application', 'uvicorn.workers.UvicornWorker'),
+}
+USERS = 200
+RECIPES = 2000
+COMMENTS_PER_RECIPE = 5
+
+
+def seed():
+    """
+    Fill the database named by DATABASE_URL with users and recipes.
+    """
+    from benchmarks.utils import setup_django
+    setup_django()
+    from django.contrib.auth.models import User
+    from profiles.models import Profile
+    from recipes.models import Comment, Recipe
+
+    User.objects.bulk_create([
+        User(username=f'user{index}') for index in range(USERS)
+    ])
+    users = list(User.objects.values_list('id', flat=True))
+    Profile.objects.bulk_create([Profile(owner_id=user) for user in users])
+    Recipe.objects.bulk_create([
+        Recipe(
+            owner_id=users[index % USERS],
+            title=f'Benchmark recipe {index}',
+            short_description='Benchmark recipe',
+            ingredients='Flour, Water',
+            steps='Mix, Bake',
+        )
+        for index in range(RECIPES)
+    ], batch_size=500)
+    Comment.objects.bulk_create([
+        Comment(owner_id=users[index % USERS], recipe=recipe, content='Yum')
+        for recipe in Recipe.objects.all()
+        for index in range(COMMENTS_PER_RECIPE)
+    ], batch_size=1000)
+
+
+@contextmanager
+def server(mode, env, latency):
+    """
+    Run gunicorn in the given mode until the block exits.
+    """
+    application, worker_class = APPLICATIONS[mode]
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', application,
+            '--config', 'python:benchmarks.gunicorn_latency',
+            '--worker-class', worker_class, '--workers', str(WORKERS),
+            '--bind', f'127.0.0.1:{PORT}', '--log-level', 'critical',
+        ],
+        env={**env, 'QUERY_LATENCY_MS': str(latency)},
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                request('/recipes/')
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def request(path, connection=None):
+    connection = connection or http.client.HTTPConnection('127.0.0.1', PORT)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 200, (path, response.status)
+    return connection
+
+
+def load(path):
+    """
+    Send requests from CONCURRENCY clients for DURATION seconds and
+    return the latency of each request.
+    """
+    latencies = []
+    deadline = time.monotonic() + DURATION
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', PORT)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            request(path, connection)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(CONCURRENCY)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            key: value for key, value in os.environ.items()
+            if key not in ('DEV', 'ASYNC_VIEWS')
+        }
+        env.update({
+            'DATABASE_URL': f'sqlite:///{directory}/load.sqlite3',
+            'SECRET_KEY': env.get('SECRET_KEY', 'load-test'),
+        })
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            env=env, check=True
+        )
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.asgi_load', 'seed'],
+            env=env, check=True
+        )
+
+        paths = ['/recipes/', '/recipes/1/', '/profiles/1/', '/trending/']
+        for latency in QUERY_LATENCIES_MS:
+            for mode in APPLICATIONS:
+                rows = []
+                with server(mode, env, latency):
+                    for path in paths:
+                        latencies = load(path)
+                        rows.append((path, {
+                            'rps': round(len(latencies) / DURATION),
+                            **summarize(latencies),
+                        }))
+                report(
+                    f'{mode.upper()}, {latency}ms per query: {WORKERS} '
+                    f'workers, {CONCURRENCY} concurrent clients',
+                    rows
+                )
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['seed']:
+        seed()
+    else:
+        main()
@@ -0,0 +1,93 @@
+"""
+Benchmark for loading recipes: POSTing them one at a time to /recipes/
+(before) compared to the import_data command reading an NDJSON file of
+USERS users and RECIPES recipes (after), in rows per second.
+
+    python -m benchmarks.bulk_import [recipes]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from io import StringIO
+
+from benchmarks.utils import report, setup_django, test_database
+
+USERS = 1000
+RECIPES = 1000000
+POSTED = 500
+
+
+def write_export(path, recipes):
+    """
+    Write an NDJSON file of users and their recipes.
+    """
+    with open(path, 'w') as file:
+        for index in range(1, USERS + 1):
+            file.write(json.dumps({
+                'type': 'user', 'id': index, 'username': f'user{index}'
+            }) + '\n')
+        for index in range(1, recipes + 1):
+            file.write(json.dumps({
+                'type': 'recipe',
+                'id': index,
+                'owner': index % USERS + 1,
+                'title': f'Benchmark recipe {index}',
+                'short_description': 'Benchmark recipe',
+                'ingredients': f'Flour, Water, Salt, Spice {index % 500}',
+                'steps': 'Mix, Bake',
+            }) + '\n')
+
+
+def post_recipes():
+    """
+    Return the rows per second of creating recipes through the API.
+    """
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='poster'))
+    start = time.perf_counter()
+    for index in range(POSTED):
+        response = client.post('/recipes/', {
+            'title': f'Posted recipe {index}',
+            'short_description': 'Benchmark recipe',
+            'ingredients': 'Flour, Water, Salt',
+            'steps': 'Mix, Bake',
+        })
+        assert response.status_code == 201, response.data
+    return POSTED / (time.perf_counter() - start)
+
+
+def main():
+    recipes = int(sys.argv[1]) if len(sys.argv) > 1 else RECIPES
+    setup_django()
+    from django.core.management import call_command
+    from recipes.models import Recipe
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recipes.ndjson')
+        write_export(path, recipes)
+        with test_database():
+            before = post_recipes()
+            Recipe.objects.all().delete()
+
+            start = time.perf_counter()
+            call_command('import_data', path, stdout=StringIO())
+            elapsed = time.perf_counter() - start
+            assert Recipe.objects.count() == recipes
+        report(f'Loading {recipes} recipes of {USERS} users', [
+            (f'before, POST /recipes/ x{POSTED}', {
+                'rows_per_s': round(before),
+            }),
+            ('after, import_data', {
+                'rows_per_s': round((USERS + recipes) / elapsed),
+                'total_s': round(elapsed, 1),
+            }),
+        ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare /recipes/by_profile/ for an author with 50,000 recipes before
+(joined through the profile, unpaginated) and after (resolved to the
+owner and read page by page from the owner index), at the first page
+and at a deep cursor. Other authors' recipes are interleaved, so the
+author's rows are spread across the table.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+AUTHOR_RECIPES = 50000
+OTHER_AUTHORS = 10
+OTHER_RECIPES = 50000
+BATCH_SIZE = 5000
+SAMPLES = 20
+# Serializing every recipe of the author takes seconds per request
+SAMPLES_BEFORE = 3
+
+
+def seed():
+    """
+    Create the author and other users with recipes one minute apart,
+    and return the author's profile id.
+    """
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from profiles.models import Profile
+    from recipes.models import Recipe
+
+    User.objects.bulk_create([
+        User(username=f'user{index}') for index in range(OTHER_AUTHORS + 1)
+    ])
+    users = list(User.objects.order_by('id').values_list('id', flat=True))
+    Profile.objects.bulk_create([Profile(owner_id=user) for user in users])
+    author, others = users[0], users[1:]
+
+    total = AUTHOR_RECIPES + OTHER_RECIPES
+    start_time = timezone.now() - timedelta(minutes=total)
+    created_at = Recipe._meta.get_field('created_at')
+    with mock.patch.object(created_at, 'auto_now_add', False):
+        for start in range(0, total, BATCH_SIZE):
+            Recipe.objects.bulk_create([
+                Recipe(
+                    # Every other recipe is by the author
+                    owner_id=(
+                        author if index % 2 == 0
+                        else others[index % OTHER_AUTHORS]
+                    ),
+                    title=f'Recipe {index}',
+                    short_description='Benchmark recipe',
+                    ingredients='Flour, Water',
+                    steps='Mix, Bake',
+                    created_at=start_time + timedelta(minutes=index),
+                )
+                for index in range(start, min(start + BATCH_SIZE, total))
+            ])
+    return Profile.objects.get(owner_id=author).pk
+
+
+def unpaginated_view():
+    """
+    Return the by-profile view as it was before, filtering through
+    the profile join and serializing every recipe.
+    """
+    from rest_framework.response import Response
+    from recipes.views import RecipeViewSet
+
+    class UnpaginatedRecipeViewSet(RecipeViewSet):
+        def by_profile(self, request, pk=None):
+            recipes = self.get_queryset().filter(
+                owner__profile__id=request.query_params['profile_id']
+            )
+            serializer = self.get_serializer(recipes, many=True)
+            return Response(serializer.data)
+
+    return UnpaginatedRecipeViewSet.as_view({'get': 'by_profile'})
+
+
+def deep_cursor(profile_id):
+    """
+    Return the cursor URL of the page halfway through the author's
+    recipes, as a client would have received it.
+    """
+    from profiles.models import Profile
+    from recipes.models import Recipe
+    from project5_api.pagination import KeysetOnlyPagination
+
+    paginator = KeysetOnlyPagination()
+    paginator.base_url = (
+        f'http://testserver/recipes/by_profile/?profile_id={profile_id}'
+    )
+    owner_id = Profile.objects.get(pk=profile_id).owner_id
+    item = Recipe.objects.filter(
+        owner_id=owner_id
+    ).order_by(*paginator.ordering)[AUTHOR_RECIPES // 2]
+    return paginator.encode_cursor(item, reverse=False)
+
+
+def main():
+    setup_django()
+    from rest_framework.test import APIClient, APIRequestFactory
+
+    with test_database():
+        profile_id = seed()
+        url = f'/recipes/by_profile/?profile_id={profile_id}'
+        view = unpaginated_view()
+        request = APIRequestFactory().get(url)
+
+        def before():
+            response = view(request)
+            response.render()
+            assert len(response.data) == AUTHOR_RECIPES
+
+        client = APIClient()
+        rows = [(
+            'before, every recipe',
+            summarize(measure(before, SAMPLES_BEFORE))
+        )]
+        for label, page_url in [
+            ('after, page 1', url),
+            ('after, halfway cursor', deep_cursor(profile_id)),
+        ]:
+            assert client.get(page_url).status_code == 200, page_url
+            rows.append((label, summarize(
+                measure(lambda: client.get(page_url), SAMPLES)
+            )))
+        report(
+            f'/recipes/by_profile/ for an author with {AUTHOR_RECIPES} '
+            f'of {AUTHOR_RECIPES + OTHER_RECIPES} recipes',
+            rows
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark for request latency with a new database connection per
+request (DB_CONN_MAX_AGE=0) compared to persistent connections, with
+and without health checks. Requests go through the WSGI handler, so
+connections are opened and closed as in production.
+
+Runs against DATABASE_URL, or a temporary SQLite file whose connections
+are delayed by CONNECT_LATENCY_MS to stand in for the TCP and TLS
+handshakes with a remote Postgres server.
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+from benchmarks.utils import measure, report, summarize, test_database
+
+CONNECT_LATENCY_MS = 20
+SAMPLES = 200
+PATH = '/recipes/1/comments/'
+
+
+def delay_connections(sender, connection, **kwargs):
+    time.sleep(CONNECT_LATENCY_MS / 1000)
+
+
+def request(handler, path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+    statuses = []
+    body = handler(environ, lambda status, headers: statuses.append(status))
+    b''.join(body)
+    body.close()
+    assert statuses[0].startswith('200'), statuses
+
+
+def main():
+    remote = 'DATABASE_URL' in os.environ
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.pop('DEV', None)
+        os.environ.setdefault('SECRET_KEY', 'benchmark')
+        os.environ.setdefault(
+            'DATABASE_URL', f'sqlite:///{directory}/connections.sqlite3'
+        )
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'project5_api.settings'
+        import django
+        django.setup()
+        from django.contrib.auth.models import User
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.management import call_command
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+        from recipes.models import Comment, Recipe
+
+        # A SQLite test database would be in memory and never closed
+        with test_database() if remote else nullcontext():
+            call_command('migrate', verbosity=0)
+            user = User.objects.create(username='benchmark')
+            recipe = Recipe.objects.create(
+                owner=user,
+                title='Benchmark recipe',
+                short_description='Benchmark recipe',
+                ingredients='Flour, Water',
+                steps='Mix, Bake',
+            )
+            Comment.objects.bulk_create([
+                Comment(owner=user, recipe=recipe, content='Yum')
+                for _ in range(20)
+            ])
+            path = PATH.replace('1', str(recipe.pk))
+            if not remote:
+                connection_created.connect(delay_connections)
+
+            handler = WSGIHandler()
+            rows = []
+            for label, max_age, health_checks in [
+                ('new connection per request', 0, False),
+                ('persistent connection', 60, False),
+                ('persistent + health checks', 60, True),
+            ]:
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+                rows.append((label, summarize(
+                    measure(lambda: request(handler, path), SAMPLES)
+                )))
+            connection_created.disconnect(delay_connections)
+        database = (
+            'DATABASE_URL' if remote
+            else f'SQLite with {CONNECT_LATENCY_MS}ms per connect'
+        )
+        report(f'GET {PATH} against {database}', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Load benchmark for the home feed on a synthetic social graph with
+power-law follower counts. Measures fan-out on recipe creation and
+/feed/ reads, compared to building the feed with one /recipes/?owner=
+request per followed user.
+"""
+import random
+from io import StringIO
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+USERS = 2000
+FOLLOWS_PER_USER = 40
+INITIAL_RECIPES = 5000
+FANOUT_THRESHOLD = 300
+SAMPLES = 50
+
+
+def seed(rng):
+    """
+    Create users with profiles and a follower graph in which the
+    chance of following a user falls off with their popularity rank,
+    then fan out an initial set of recipes.
+    """
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from followers.models import Follower
+    from profiles.models import Profile
+
+    User.objects.bulk_create([
+        User(username=f'user{index}') for index in range(USERS)
+    ])
+    users = list(User.objects.order_by('id').values_list('id', flat=True))
+    Profile.objects.bulk_create([Profile(owner_id=user) for user in users])
+
+    weights = [1 / (rank + 1) for rank in range(USERS)]
+    edges = set()
+    for owner in users:
+        for followed in rng.choices(users, weights, k=FOLLOWS_PER_USER):
+            if followed != owner:
+                edges.add((owner, followed))
+    Follower.objects.bulk_create([
+        Follower(owner_id=owner, followed_id=followed)
+        for owner, followed in edges
+    ])
+    call_command('reconcile_counters', stdout=StringIO())
+
+    for _ in range(INITIAL_RECIPES):
+        create_recipe(rng, users)
+    return users
+
+
+def create_recipe(rng, users):
+    from recipes.models import Recipe
+
+    Recipe.objects.create(
+        owner_id=rng.choice(users),
+        title='Benchmark recipe',
+        short_description='Benchmark recipe',
+        ingredients='Flour, Water',
+        steps='Mix, Bake',
+    )
+
+
+def main():
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from followers.models import Follower
+
+    rng = random.Random(6)
+    with test_database(), override_settings(
+        FEED_FANOUT_THRESHOLD=FANOUT_THRESHOLD
+    ):
+        users = seed(rng)
+        client = APIClient()
+        readers = [User.objects.get(pk=pk) for pk in rng.sample(users, 20)]
+
+        def read_feed():
+            client.force_authenticate(user=rng.choice(readers))
+            assert client.get('/feed/').status_code == 200
+
+        def read_per_followed_user():
+            reader = rng.choice(readers)
+            client.force_authenticate(user=reader)
+            followed = Follower.objects.filter(
+                owner=reader
+            ).values_list('followed_id', flat=True)
+            for user_id in followed:
+                client.get('/recipes/', {'owner': user_id})
+
+        report(
+            f'Feed on {USERS} users, {Follower.objects.count()} follows',
+            [
+                ('create recipe (fan-out)', summarize(
+                    measure(lambda: create_recipe(rng, users), SAMPLES)
+                )),
+                ('GET /feed/', summarize(measure(read_feed, SAMPLES))),
+                ('GET /recipes/?owner= per follow', summarize(
+                    measure(read_per_followed_user, 5)
+                )),
+            ]
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Seeded generator of synthetic site data with the skew of real use:
+follower counts follow a power law, recipe authorship and likes a Zipf
+distribution, and a few recipes collect long comment threads. The same
+seed and scale always produce the same rows.
+
+Rows are saved through the bulk importer, so stored counters, profiles
+and the ingredient and search indexes are filled in as after an import.
+"""
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+SCALES = {
+    'small': {
+        'users': 200, 'recipes': 2000, 'follows': 4000, 'likes': 20000,
+        'comments': 20000,
+    },
+    'medium': {
+        'users': 2000, 'recipes': 20000, 'follows': 40000, 'likes': 200000,
+        'comments': 200000,
+    },
+    'large': {
+        'users': 20000, 'recipes': 200000, 'follows': 400000,
+        'likes': 2000000, 'comments': 2000000,
+    },
+}
+# Zipf exponents, higher ones concentrate more rows on the top ranks
+AUTHOR_SKEW = 1.0
+FOLLOWED_SKEW = 1.1
+LIKED_SKEW = 1.0
+COMMENTED_SKEW = 1.2
+INGREDIENTS = [
+    'flour', 'water', 'salt', 'yeast', 'sugar', 'butter', 'eggs', 'milk',
+    'tomato', 'onion', 'garlic', 'basil', 'rice', 'chicken', 'beans',
+    'lemon', 'pepper', 'cheese', 'potato', 'carrot', 'olive oil', 'honey',
+]
+WORDS = (
+    'lovely tasty easy quick rich fresh spicy sweet crispy classic simple '
+    'family favourite weeknight perfect cozy'
+).split()
+
+
+def zipf_weights(count, skew):
+    """
+    Return the cumulative weights of ranks 1 to count under a Zipf law.
+    """
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def unique_pairs(rng, count, owners, targets, weights, exclude_self=False):
+    """
+    Return up to count distinct (owner, target) pairs, owners drawn
+    uniformly and targets by their cumulative weights.
+    """
+    pairs = set()
+    # Popular targets repeat, so draw more than needed
+    for _ in range(3):
+        needed = count - len(pairs)
+        if needed <= 0:
+            break
+        drawn = rng.choices(targets, cum_weights=weights, k=needed * 2)
+        for target in drawn:
+            owner = rng.choice(owners)
+            if exclude_self and owner == target:
+                continue
+            pairs.add((owner, target))
+            if len(pairs) == count:
+                break
+    return sorted(pairs)
+
+
+def generate(rng, now, users, recipes, follows, likes, comments):
+    """
+    Yield (record type, row) pairs, every row after the rows it refers
+    to, with timestamps spread over the year before now.
+    """
+    def timestamp(index, total):
+        return now - timedelta(days=365) * (1 - index / total)
+
+    user_ids = list(range(1, users + 1))
+    for user in user_ids:
+        yield 'user', {
+            'id': user,
+            'username': f'user{user}',
+            'date_joined': timestamp(user, users),
+        }
+        yield 'profile', {
+            'id': user,
+            'owner': user,
+            'name': f'User {user}',
+            'content': sentence(rng, rng.randint(0, 30)),
+        }
+
+    authors = rng.choices(
+        user_ids, cum_weights=zipf_weights(users, AUTHOR_SKEW), k=recipes
+    )
+    for recipe, author in enumerate(authors, 1):
+        yield 'recipe', {
+            'id': recipe,
+            'owner': author,
+            'title': sentence(rng, rng.randint(2, 6)),
+            'short_description': sentence(rng, rng.randint(5, 20)),
+            'ingredients': ', '.join(
+                rng.sample(INGREDIENTS, rng.randint(3, 10))
+            ),
+            'steps': '\n'.join(
+                sentence(rng, rng.randint(5, 15))
+                for _ in range(rng.randint(2, 8))
+            ),
+            'cook_time': rng.randint(5, 180),
+            'difficulty': rng.choice(['Easy', 'Medium', 'Hard']),
+            'created_at': timestamp(recipe, recipes),
+            'updated_at': timestamp(recipe, recipes),
+        }
+
+    recipe_ids = list(range(1, recipes + 1))
+    # The newest recipes are the most popular ones
+    recipe_ids.reverse()
+    for edge, (owner, followed) in enumerate(unique_pairs(
+        rng, follows, user_ids, user_ids,
+        zipf_weights(users, FOLLOWED_SKEW), exclude_self=True
+    ), 1):
+        yield 'follow', {
+            'id': edge, 'owner': owner, 'followed': followed,
+            'created_at': timestamp(edge, follows),
+        }
+    for like, (owner, recipe) in enumerate(unique_pairs(
+        rng, likes, user_ids, recipe_ids, zipf_weights(recipes, LIKED_SKEW)
+    ), 1):
+        yield 'like', {
+            'id': like, 'owner': owner, 'recipe': recipe,
+            'created_at': timestamp(like, likes),
+        }
+    commented = rng.choices(
+        recipe_ids, cum_weights=zipf_weights(recipes, COMMENTED_SKEW),
+        k=comments
+    )
+    for comment, recipe in enumerate(commented, 1):
+        yield 'comment', {
+            'id': comment,
+            'owner': rng.choice(user_ids),
+            'recipe': recipe,
+            'content': sentence(rng, rng.randint(3, 60)),
+            'created_at': timestamp(comment, comments),
+            'updated_at': timestamp(comment, comments),
+        }
+
+
+def seed(scale='small', seed=1, batch_size=5000):
+    """
+    Fill the database with the data of the scale for the seed, and
+    return the number of rows of each type.
+    """
+    from django.db import connection
+    from portability.importer import (
+        Importer, explicit_timestamps, finish
+    )
+    from trending.models import compact_trending, rebuild_buckets
+
+    rng = random.Random(seed)
+    # Fixed, so runs on different days produce the same rows
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    importer = Importer(batch_size)
+    with explicit_timestamps(), connection.constraint_checks_disabled():
+        for kind, row in generate(rng, now, **SCALES[scale]):
+            if importer.add(kind, row):
+                importer.save()
+        importer.save()
+    finish(StringIO())
+    # Rank the generated activity as of the fixed date, not today
+    rebuild_buckets(now)
+    compact_trending(now)
+    return dict(importer.counts)
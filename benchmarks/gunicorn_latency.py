@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for benchmarks.asgi_load, delaying every query
+by QUERY_LATENCY_MS to simulate the round trip to a remote database.
+"""
+import os
+import time
+
+
+def post_worker_init(worker):
+    delay = float(os.environ.get('QUERY_LATENCY_MS', 0)) / 1000
+    if not delay:
+        return
+    from django.db.backends.signals import connection_created
+
+    def delayed(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        # Sent on every reconnection of the same connection object
+        if delayed not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delayed)
+
+    connection_created.connect(add_delay, weak=False)
@@ -0,0 +1,128 @@
+"""
+Microbenchmark for serializing image URLs with the Cloudinary storage:
+a page of recipe summaries and of comments with the URLs built by the
+storage for every row (before) compared to the memoized `image_url`
+with the variant map of each recipe (after).
+"""
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+USERS = 50
+RECIPES = 100
+COMMENTS = 500
+SAMPLES = 20
+
+
+def seed():
+    """
+    Create recipes with images and comments by users with profile images.
+    """
+    from django.contrib.auth.models import User
+    from profiles.models import Profile
+    from recipes.models import Comment, Recipe
+
+    User.objects.bulk_create([
+        User(username=f'user{index}') for index in range(USERS)
+    ])
+    users = list(User.objects.values_list('id', flat=True))
+    Profile.objects.bulk_create([
+        Profile(owner_id=user, image=f'images/avatar{user}')
+        for user in users
+    ])
+    Recipe.objects.bulk_create([
+        Recipe(
+            owner_id=users[index % USERS],
+            title=f'Benchmark recipe {index}',
+            short_description='Benchmark recipe',
+            ingredients='Flour, Water',
+            steps='Mix, Bake',
+            image=f'recipes/photo{index}',
+        )
+        for index in range(RECIPES)
+    ])
+    recipes = list(Recipe.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create([
+        Comment(
+            owner_id=users[index % USERS],
+            recipe_id=recipes[index % RECIPES],
+            content='Tasty',
+        )
+        for index in range(COMMENTS)
+    ])
+
+
+def uncached_serializers():
+    """
+    Return the recipe and comment serializers as they were before,
+    resolving `.url` through the storage for every row.
+    """
+    from rest_framework import serializers
+    from recipes.serializers import CommentSerializer, RecipeSerializer
+
+    class UncachedCommentSerializer(CommentSerializer):
+        profile_image = serializers.ReadOnlyField(
+            source='owner.profile.image.url'
+        )
+
+    class UncachedRecipeSerializer(RecipeSerializer):
+        serializer_field_mapping = (
+            serializers.ModelSerializer.serializer_field_mapping
+        )
+
+        class Meta(RecipeSerializer.Meta):
+            fields = [
+                field for field in RecipeSerializer.Meta.fields
+                if field not in ('comments', 'image_variants')
+            ]
+
+    return UncachedRecipeSerializer, UncachedCommentSerializer
+
+
+def main():
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from project5_api.images import CLOUDINARY_STORAGE, image_url
+    from recipes.models import Comment, Recipe
+    from recipes.serializers import CommentSerializer, RecipeSerializer
+
+    assert settings.DEFAULT_FILE_STORAGE == CLOUDINARY_STORAGE
+    with test_database():
+        seed()
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        context = {'request': request}
+        recipes = list(Recipe.objects.select_related('owner__profile'))
+        comments = list(Comment.objects.select_related('owner__profile'))
+        uncached_recipe, uncached_comment = uncached_serializers()
+
+        rows = []
+        for label, serializer, instances in [
+            ('recipes, before', uncached_recipe, recipes),
+            ('recipes + variants, after', RecipeSerializer, recipes),
+            ('comments, before', uncached_comment, comments),
+            ('comments, after', CommentSerializer, comments),
+        ]:
+            image_url.cache_clear()
+
+            def serialize():
+                serializer(
+                    instances, many=True, context=context,
+                    fields=set(serializer.Meta.fields) - {'comments'}
+                ).data
+
+            samples = measure(serialize, SAMPLES)
+            rows.append((label, {
+                'rows_per_s': round(len(instances) / min(samples)),
+                **summarize(samples),
+            }))
+        report(
+            f'Serializing {RECIPES} recipes and {COMMENTS} comments', rows
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare authenticated list requests with JWTCookieAuthentication, which
+loads the user of every token (before), and with
+JWTClaimsCookieAuthentication, which builds it from the token claims
+and the cached user state (after), in requests per second of each path
+over the small synthetic data set, and the time of authentication
+alone in microseconds.
+"""
+from unittest import mock
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+PATHS = ['/recipes/', '/profiles/', '/likes/list/', '/ranked-liked-recipes/']
+SAMPLES = 50
+AUTH_SAMPLES = 5000
+
+
+def user_queries(queries):
+    return sum('FROM "auth_user" WHERE' in query['sql'] for query in queries)
+
+
+def run(authentication, token):
+    """
+    Return the requests per second of each list path, and the summary
+    of authenticating alone, with the authentication class and token.
+    """
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient, APIRequestFactory
+    from rest_framework.views import APIView
+
+    header = f'Bearer {token}'
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=header)
+    summary = {}
+    with mock.patch.object(
+        APIView, 'authentication_classes', [authentication]
+    ):
+        for path in PATHS:
+            # Warm up caches
+            assert client.get(path).status_code == 200, path
+            elapsed = sum(measure(lambda: client.get(path), SAMPLES))
+            summary[path] = round(SAMPLES / elapsed, 1)
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(PATHS[0])
+        summary['user_queries'] = user_queries(queries)
+
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=header)
+    backend = authentication()
+    elapsed = sum(measure(lambda: backend.authenticate(request), AUTH_SAMPLES))
+    summary['authenticate_us'] = round(elapsed / AUTH_SAMPLES * 1e6, 1)
+    return summary
+
+
+def main():
+    setup_django()
+    from benchmarks.generator import seed
+    from django.contrib.auth.models import User
+    from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+    from project5_api.authentication import (
+        JWTClaimsCookieAuthentication, TokenClaimsSerializer
+    )
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    with test_database():
+        seed('small')
+        user = User.objects.order_by('pk').first()
+        before = run(
+            JWTCookieAuthentication, RefreshToken.for_user(user).access_token
+        )
+        after = run(
+            JWTClaimsCookieAuthentication,
+            TokenClaimsSerializer.get_token(user).access_token
+        )
+    report('Authenticated GET requests per second', [
+        ('before, user loaded per request', before),
+        ('after, user from token claims', after),
+    ])
+
+
+if __name__ == '__main__':
+    main()
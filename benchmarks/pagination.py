@@ -0,0 +1,83 @@
+"""
+Compare page-number and keyset pagination latency on /recipes/
+at the first page and at page 10,000.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+PAGES = 10000
+BATCH_SIZE = 5000
+
+
+def seed(page_size):
+    """
+    Create one user and enough recipes to fill the deepest page,
+    one minute apart.
+    """
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from recipes.models import Recipe
+
+    owner = User.objects.create_user(username='bench', password='pass')
+    total = PAGES * page_size
+    start_time = timezone.now() - timedelta(minutes=total)
+    created_at = Recipe._meta.get_field('created_at')
+    with mock.patch.object(created_at, 'auto_now_add', False):
+        for start in range(0, total, BATCH_SIZE):
+            Recipe.objects.bulk_create([
+                Recipe(
+                    owner=owner,
+                    title=f'Recipe {index}',
+                    short_description='Benchmark recipe',
+                    ingredients='Flour, Water',
+                    steps='Mix, Bake',
+                    created_at=start_time + timedelta(minutes=index),
+                )
+                for index in range(start, min(start + BATCH_SIZE, total))
+            ])
+
+
+def deep_cursor(page_size):
+    """
+    Return the cursor URL of page 10,000, as a client would have
+    received it after walking through the previous pages.
+    """
+    from recipes.models import Recipe
+    from project5_api.pagination import KeysetPagination
+
+    paginator = KeysetPagination()
+    paginator.base_url = 'http://testserver/recipes/'
+    item = Recipe.objects.order_by(*paginator.ordering)[
+        (PAGES - 1) * page_size - 1
+    ]
+    return paginator.encode_cursor(item, reverse=False)
+
+
+def main():
+    setup_django()
+    from django.conf import settings
+    from rest_framework.test import APIClient
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    with test_database():
+        seed(page_size)
+        client = APIClient()
+        urls = [
+            ('page number, page 1', '/recipes/?page=1'),
+            (f'page number, page {PAGES}', f'/recipes/?page={PAGES}'),
+            ('keyset, page 1', '/recipes/?cursor='),
+            (f'keyset, page {PAGES}', deep_cursor(page_size)),
+        ]
+        rows = []
+        for label, url in urls:
+            assert client.get(url).status_code == 200, url
+            rows.append((label, summarize(measure(lambda: client.get(url)))))
+        report(f'/recipes/ with {PAGES * page_size} rows', rows)
+
+
+if __name__ == '__main__':
+    main()
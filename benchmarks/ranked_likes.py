@@ -0,0 +1,97 @@
+"""
+Benchmark for /ranked-liked-recipes/ for a user with 10k likes,
+ranking in the database by likes and by hot score, compared to the
+previous approach of sorting in Python with one count per recipe.
+"""
+import random
+from datetime import timedelta
+from unittest import mock
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+LIKES = 10000
+SAMPLES = 20
+
+
+def seed(rng):
+    """
+    Create a user who liked LIKES recipes with long-tailed like counts
+    spread over the last year.
+    """
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from likes.models import Like
+    from recipes.models import Recipe
+
+    user = User.objects.create(username='reader')
+    now = timezone.now()
+    created_at = Recipe._meta.get_field('created_at')
+    with mock.patch.object(created_at, 'auto_now_add', False):
+        Recipe.objects.bulk_create([
+            Recipe(
+                owner=user,
+                title=f'Benchmark recipe {index}',
+                short_description='Benchmark recipe',
+                ingredients='Flour, Water',
+                steps='Mix, Bake',
+                likes_count=int(rng.paretovariate(1.1)),
+                created_at=now - timedelta(
+                    seconds=rng.randrange(365 * 86400)
+                ),
+            )
+            for index in range(LIKES)
+        ], batch_size=1000)
+    Like.objects.bulk_create([
+        Like(owner=user, recipe_id=recipe)
+        for recipe in Recipe.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+    return user
+
+
+def sort_in_python(user):
+    """
+    The previous implementation, kept for comparison.
+    """
+    from recipes.models import Recipe
+
+    recipes = Recipe.objects.filter(likes__owner=user)
+    return sorted(
+        recipes, key=lambda recipe: recipe.likes.count(), reverse=True
+    )
+
+
+def main():
+    setup_django()
+    from rest_framework.test import APIClient
+
+    with test_database():
+        user = seed(random.Random(11))
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def pages(params, count):
+            url = client.get('/ranked-liked-recipes/', params).data['next']
+            for _ in range(count - 1):
+                url = client.get(url).data['next']
+
+        rows = [
+            ('python sort, count per recipe', summarize(
+                measure(lambda: sort_in_python(user), 1)
+            )),
+        ]
+        for ranking in ['likes', 'hot']:
+            params = {'ranking': ranking}
+            rows.append((f'{ranking}: first page', summarize(measure(
+                lambda: client.get('/ranked-liked-recipes/', params),
+                SAMPLES
+            ))))
+            rows.append((f'{ranking}: 10 pages via cursor', summarize(
+                measure(lambda: pages(params, 10), 5)
+            )))
+        report(f'GET /ranked-liked-recipes/ with {LIKES} likes', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark for the payload size and latency of /recipes/ with the full
+comment threads embedded (the previous shape, `?comments=all`) compared
+to the summary representation with only the latest comments, and to
+a sparse fieldset.
+"""
+import random
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+USERS = 50
+RECIPES = 200
+# Comment counts follow a long tail, a few recipes are very popular
+MAX_COMMENTS = 2000
+SAMPLES = 20
+
+
+def seed(rng):
+    """
+    Create recipes with a power-law number of comments each.
+    """
+    from django.contrib.auth.models import User
+    from profiles.models import Profile
+    from recipes.models import Comment, Recipe
+
+    User.objects.bulk_create([
+        User(username=f'user{index}') for index in range(USERS)
+    ])
+    users = list(User.objects.values_list('id', flat=True))
+    Profile.objects.bulk_create([Profile(owner_id=user) for user in users])
+
+    for index in range(RECIPES):
+        recipe = Recipe.objects.create(
+            owner_id=rng.choice(users),
+            title=f'Benchmark recipe {index}',
+            short_description='Benchmark recipe',
+            ingredients='Flour, Water',
+            steps='Mix, Bake',
+        )
+        count = min(MAX_COMMENTS, int(rng.paretovariate(1.2)) - 1)
+        Comment.objects.bulk_create([
+            Comment(
+                owner_id=rng.choice(users),
+                recipe=recipe,
+                content='What a lovely recipe, I will make it again! ' * 3,
+            )
+            for _ in range(count)
+        ])
+    # The newest recipe, on the first page, is the most popular one
+    Comment.objects.bulk_create([
+        Comment(owner_id=rng.choice(users), recipe=recipe, content='Tasty')
+        for _ in range(MAX_COMMENTS)
+    ])
+
+
+def main():
+    setup_django()
+    from rest_framework.test import APIClient
+
+    rng = random.Random(9)
+    with test_database():
+        seed(rng)
+        client = APIClient()
+
+        rows = []
+        for label, params in [
+            ('full comments (before)', {'comments': 'all'}),
+            ('summary (after)', {}),
+            ('fields=id,title,image,likes_count', {
+                'fields': 'id,title,image,likes_count'
+            }),
+        ]:
+            size = len(client.get('/recipes/', params).content)
+
+            def request():
+                assert client.get('/recipes/', params).status_code == 200
+
+            rows.append((label, {
+                'bytes': size, **summarize(measure(request, SAMPLES))
+            }))
+        report(f'GET /recipes/ first page of {RECIPES} recipes', rows)
+
+
+if __name__ == '__main__':
+    main()
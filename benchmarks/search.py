@@ -0,0 +1,103 @@
+"""
+Compare the default icontains SearchFilter with the full-text
+RecipeSearchFilter for single and multi word searches.
+"""
+import random
+
+from benchmarks.utils import (
+    measure, report, setup_django, summarize, test_database
+)
+
+RECIPES = 50000
+BATCH_SIZE = 5000
+FOODS = [
+    'tomato', 'basil', 'garlic', 'onion', 'chicken', 'beef', 'lentil',
+    'pepper', 'lemon', 'ginger', 'rice', 'noodle', 'potato', 'carrot',
+    'cheese', 'mushroom', 'spinach', 'coconut', 'chili', 'butter',
+    'yogurt', 'almond', 'honey', 'salmon', 'tofu', 'bean', 'pumpkin',
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ter', 'su', 'van', 'po', 'ri', 'del', 'na']
+TERMS = ['tomato', 'mush', 'garlic ginger', 'salmon lemon butter']
+
+
+def vocabulary(rng):
+    """
+    Return food words mixed with a long tail of filler words, so that a
+    search term matches a realistic fraction of recipes.
+    """
+    filler = {
+        ''.join(rng.choice(SYLLABLES) for _ in range(3)) for _ in range(2000)
+    }
+    return FOODS + sorted(filler)
+
+
+def phrase(rng, words, length):
+    return ' '.join(rng.choice(words) for _ in range(length))
+
+
+def seed():
+    """
+    Create recipes with random words and build the search index.
+    """
+    from django.contrib.auth.models import User
+    from recipes.models import Recipe
+    from recipes.search import get_search_backend
+
+    rng = random.Random(4)
+    words = vocabulary(rng)
+    owner = User.objects.create_user(username='bench', password='pass')
+    for start in range(0, RECIPES, BATCH_SIZE):
+        Recipe.objects.bulk_create([
+            Recipe(
+                owner=owner,
+                title=phrase(rng, words, 3).capitalize(),
+                short_description=phrase(rng, words, 12),
+                ingredients=', '.join(phrase(rng, words, 1) for _ in range(8)),
+                steps='Mix, Cook',
+            )
+            for _ in range(start, min(start + BATCH_SIZE, RECIPES))
+        ])
+    get_search_backend().rebuild()
+
+
+def first_page(search_filter, term):
+    """
+    Return a callable running a page-number style search: a count
+    followed by the first ten rows.
+    """
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from recipes.models import Recipe
+    from recipes.views import RecipeViewSet
+
+    request = Request(APIRequestFactory().get('/recipes/', {'search': term}))
+    queryset = search_filter.filter_queryset(
+        request, Recipe.objects.order_by('-created_at'), RecipeViewSet
+    )
+
+    def run():
+        queryset.all().count()
+        list(queryset.all()[:10])
+    return run
+
+
+def main():
+    setup_django()
+    from rest_framework.filters import SearchFilter
+    from recipes.search import RecipeSearchFilter
+
+    with test_database():
+        seed()
+        rows = []
+        for term in TERMS:
+            for label, search_filter in [
+                ('icontains', SearchFilter()),
+                ('full-text', RecipeSearchFilter()),
+            ]:
+                samples = measure(first_page(search_filter, term))
+                rows.append((f'{label} "{term}"', summarize(samples)))
+        report(f'Recipe search over {RECIPES} recipes', rows)
+
+
+if __name__ == '__main__':
+    main()
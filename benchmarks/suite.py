@@ -0,0 +1,246 @@
+"""
+Repeatable API benchmark suite. `run` seeds a throwaway database with
+the synthetic data of benchmarks.generator, drives each scenario's
+endpoint through the test client and writes its latency percentiles,
+query count and response size to JSON. `compare` flags the scenarios
+of a run that regressed against a baseline run, exiting with status 1
+if any did.
+
+    python -m benchmarks.suite run --scale small --output head.json
+    python -m benchmarks.suite compare base.json head.json
+
+The seeded import fills home feeds and trending rankings the way the
+signals would, and trending ranks the generated activity as of the
+generator's fixed date.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.generator import SCALES, seed
+from benchmarks.utils import (
+    measure, percentile, report, setup_django, summarize, test_database
+)
+
+# (name, path, whether requested as the user with the most likes)
+SCENARIOS = [
+    ('recipes', '/recipes/', False),
+    ('recipes_cursor', '/recipes/?cursor=', False),
+    ('recipes_all_comments', '/recipes/?comments=all', False),
+    ('recipes_search', '/recipes/?search=tomato%20basil', False),
+    ('recipe_detail', '/recipes/{recipe}/', False),
+    ('recipe_comments', '/recipes/{recipe}/comments/', False),
+    ('recipes_by_profile', '/recipes/by_profile/?profile_id={profile}', False),
+    ('cook_with', '/recipes/cook-with/?ingredients=flour,water,salt', False),
+    ('profiles', '/profiles/', False),
+    ('profile_detail', '/profiles/{profile}/', False),
+    ('followers', '/followers/', False),
+    ('likes_list', '/likes/list/', True),
+    ('ranked_liked', '/ranked-liked-recipes/', True),
+    ('ranked_liked_hot', '/ranked-liked-recipes/?ranking=hot', True),
+    ('feed', '/feed/', True),
+    ('trending', '/trending/', False),
+]
+# Latency changes below this many milliseconds are noise
+MIN_LATENCY_DELTA_MS = 0.5
+# Slow scenarios stop sampling after this many seconds
+SCENARIO_BUDGET_S = 10
+MIN_SAMPLES = 5
+
+
+def targets():
+    """
+    Return the ids filled into the scenario paths: the most commented
+    recipe, the profile with the most recipes and the user with the
+    most likes.
+    """
+    from django.db.models import Count
+    from likes.models import Like
+    from profiles.models import Profile
+    from recipes.models import Recipe
+
+    return {
+        'recipe': Recipe.objects.order_by('-comments_count').first().pk,
+        'profile': Profile.objects.order_by('-recipes_count').first().pk,
+        'reader': Like.objects.values('owner').annotate(
+            likes=Count('id')
+        ).order_by('-likes').first()['owner'],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure_within(func, samples):
+    """
+    Call func up to samples times, stopping after SCENARIO_BUDGET_S
+    seconds once MIN_SAMPLES calls are timed, and return the elapsed
+    seconds of each call.
+    """
+    latencies = []
+    while len(latencies) < samples and (
+        len(latencies) < MIN_SAMPLES
+        or sum(latencies) < SCENARIO_BUDGET_S
+    ):
+        latencies += measure(func, 1)
+    return latencies
+
+
+def run_scenarios(samples):
+    """
+    Request every scenario and return its measurements by name.
+    """
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    values = targets()
+    anonymous = APIClient()
+    reader = APIClient()
+    reader.force_authenticate(User.objects.get(pk=values['reader']))
+    cache.clear()
+
+    results = {}
+    for name, path, as_reader in SCENARIOS:
+        client = reader if as_reader else anonymous
+        path = path.format(**values)
+        # Warm up caches, then count the queries of a warm request
+        response = client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        # A full query log would hide the new queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        latencies = measure_within(lambda: client.get(path), samples)
+        results[name] = {
+            'path': path,
+            'queries': len(queries),
+            'bytes': len(response.content),
+            **summarize(latencies),
+            'p95_ms': round(percentile(sorted(latencies), 0.95) * 1000, 3),
+        }
+    return results
+
+
+def run(options):
+    setup_django()
+    import django
+    from django.db import connection
+
+    with test_database():
+        counts = seed(options.scale, options.seed)
+        results = run_scenarios(options.samples)
+        vendor = connection.vendor
+    output = {
+        'meta': {
+            'scale': options.scale,
+            'seed': options.seed,
+            'max_samples': options.samples,
+            'rows': counts,
+            'database': vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'commit': git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        },
+        'scenarios': results,
+    }
+    with open(options.output, 'w') as file:
+        json.dump(output, file, indent=2)
+    report(
+        f'{options.scale} scale, seed {options.seed}, written to '
+        f'{options.output}',
+        [
+            (name, {
+                key: result[key]
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes')
+            })
+            for name, result in results.items()
+        ]
+    )
+    return 0
+
+
+def regressions(base, head, threshold):
+    """
+    Return the reasons the head measurements of a scenario regressed
+    against the base ones: more queries, or a median latency or
+    response size more than threshold times higher.
+    """
+    reasons = []
+    if head['queries'] > base['queries']:
+        reasons.append(f'queries {base["queries"]} -> {head["queries"]}')
+    latency = head['p50_ms'] - base['p50_ms']
+    if (
+        latency > base['p50_ms'] * threshold
+        and latency > MIN_LATENCY_DELTA_MS
+    ):
+        reasons.append(f'p50 {base["p50_ms"]}ms -> {head["p50_ms"]}ms')
+    if head['bytes'] > base['bytes'] * (1 + threshold):
+        reasons.append(f'bytes {base["bytes"]} -> {head["bytes"]}')
+    return reasons
+
+
+def compare(options):
+    with open(options.base) as file:
+        base = json.load(file)
+    with open(options.head) as file:
+        head = json.load(file)
+    for key in ('scale', 'seed', 'database'):
+        if base['meta'][key] != head['meta'][key]:
+            print(
+                f'Warning: runs differ in {key}, '
+                f'{base["meta"][key]} and {head["meta"][key]}'
+            )
+
+    regressed = 0
+    for name, result in head['scenarios'].items():
+        if name not in base['scenarios']:
+            print(f'  {name:<24} new scenario')
+            continue
+        reasons = regressions(
+            base['scenarios'][name], result, options.threshold
+        )
+        regressed += bool(reasons)
+        change = result['p50_ms'] / base['scenarios'][name]['p50_ms'] - 1
+        status = f'REGRESSED: {", ".join(reasons)}' if reasons else 'ok'
+        print(f'  {name:<24} p50 {change:+.0%}  {status}')
+    print(f'{regressed} of {len(head["scenarios"])} scenarios regressed.')
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Run the scenarios.')
+    run_parser.add_argument('--scale', choices=SCALES, default='small')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--samples', type=int, default=50)
+    run_parser.add_argument('--output', default='benchmark-results.json')
+    compare_parser = commands.add_parser(
+        'compare', help='Flag regressions between two runs.'
+    )
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Relative increase of latency or size flagged, 0.2 by default.'
+    )
+    options = parser.parse_args(argv)
+    return run(options) if options.command == 'run' else compare(options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Shared helpers for setting up Django and timing benchmark runs.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    """
+    Configure Django for a standalone benchmark script.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project5_api.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Create a throwaway test database for the duration of the block.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=20):
+    """
+    Call func repeat times and return the elapsed seconds of each call.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(ordered, fraction):
+    """
+    Return the sample at the fraction of the sorted samples.
+    """
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples):
+    """
+    Return the median, p99 and mean of samples in milliseconds.
+    """
+    ordered = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(ordered) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+    }
+
+
+def report(title, rows):
+    """
+    Print a table of (label, summary) rows.
+    """
+    print(title)
+    for label, summary in rows:
+        stats = '  '.join(f'{key}={value}' for key, value in summary.items())
+        print(f'  {label:<32} {stats}')
@@ -0,0 +1,231 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.contrib.auth.models import User
+from followers.models import Follower, follows_created, follows_deleted
+from profiles.models import Profile
+from project5_api.counters import adjust_counter, recount
+from project5_api.pagination import KeysetPagination
+from recipes.models import Recipe
+
+# Feeds are trimmed back to FEED_MAX_LENGTH once they grow this much
+# past it, so the cost of trimming is spread over many new recipes
+TRIM_SLACK = 0.2
+FANOUT_BATCH_SIZE = 1000
+FEED_ORDERING = ('-created_at', '-id')
+
+
+class FeedEntry(models.Model):
+    """
+    Model representing a recipe delivered to a user's home feed.
+    Entries are written when a followed user creates a recipe,
+    and copy the recipe's creation date so feeds sort on one table.
+    """
+    owner = models.ForeignKey(
+        User, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(
+        Recipe, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        unique_together = ['owner', 'recipe']
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} in the feed of {self.owner}'
+
+
+def is_celebrity(user_id):
+    """
+    Return True if the user has more followers than the fan-out
+    threshold, so their recipes are merged into feeds at read time.
+    """
+    return Profile.objects.filter(
+        owner_id=user_id,
+        followers_count__gt=settings.FEED_FANOUT_THRESHOLD
+    ).exists()
+
+
+def trim_feeds(owner_ids, added=1):
+    """
+    Count the entries added to each of the given feeds, then delete the
+    oldest entries of those whose stored length has grown past the
+    maximum length by more than the trim slack.
+    """
+    max_length = settings.FEED_MAX_LENGTH
+    profiles = Profile.objects.filter(owner_id__in=owner_ids)
+    adjust_counter(profiles, 'feed_length', added)
+    oversized = profiles.filter(
+        feed_length__gt=max_length * (1 + TRIM_SLACK)
+    ).values_list('owner_id', flat=True)
+
+    for owner_id in oversized:
+        feed = FeedEntry.objects.filter(owner_id=owner_id)
+        last_kept = feed.order_by(*FEED_ORDERING).values_list(
+            'created_at', 'id'
+        )[max_length - 1:max_length]
+        if last_kept:
+            feed.filter(
+                KeysetPagination.seek(FEED_ORDERING, last_kept[0])
+            ).delete()
+        Profile.objects.filter(owner_id=owner_id).update(
+            feed_length=feed.count()
+        )
+
+
+def fan_out_recipe(recipe):
+    """
+    Write a new recipe into the feeds of everyone following its owner.
+    """
+    follower_ids = Follower.objects.filter(
+        followed_id=recipe.owner_id
+    ).values_list('owner_id', flat=True).order_by('owner_id')
+
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) == FANOUT_BATCH_SIZE:
+            write_entries(recipe, batch)
+            batch = []
+    if batch:
+        write_entries(recipe, batch)
+
+
+def write_entries(recipe, owner_ids):
+    FeedEntry.objects.bulk_create([
+        FeedEntry(
+            owner_id=owner_id, recipe=recipe, created_at=recipe.created_at
+        )
+        for owner_id in owner_ids
+    ], ignore_conflicts=True)
+    trim_feeds(owner_ids)
+
+
+def backfill_feed(follower):
+    """
+    Copy the followed user's latest recipes into the new follower's feed.
+    """
+    recipes = Recipe.objects.filter(
+        owner_id=follower.followed_id
+    ).order_by(*FEED_ORDERING).values_list('id', 'created_at')
+    entries = FeedEntry.objects.bulk_create([
+        FeedEntry(
+            owner_id=follower.owner_id,
+            recipe_id=recipe_id,
+            created_at=created_at
+        )
+        for recipe_id, created_at in recipes[:settings.FEED_MAX_LENGTH]
+    ], ignore_conflicts=True)
+    trim_feeds([follower.owner_id], len(entries))
+
+
+def backfill_feeds(owner_ids):
+    """
+    Fill the feeds of the given users with the latest recipes of the
+    users they follow, for follows saved without signals, e.g. by bulk
+    imports. Recipes of celebrities are left to be merged at read time.
+    """
+    for owner_id in owner_ids:
+        followed_ids = Follower.objects.filter(
+            owner_id=owner_id,
+            followed__profile__followers_count__lte=(
+                settings.FEED_FANOUT_THRESHOLD
+            )
+        ).values('followed_id')
+        recipes = Recipe.objects.filter(
+            owner_id__in=followed_ids
+        ).order_by(*FEED_ORDERING).values_list('id', 'created_at')
+        FeedEntry.objects.bulk_create([
+            FeedEntry(
+                owner_id=owner_id, recipe_id=recipe_id, created_at=created_at
+            )
+            for recipe_id, created_at in recipes[:settings.FEED_MAX_LENGTH]
+        ], ignore_conflicts=True)
+        # Entries already in the feed are skipped, so count them all
+        profile = Profile.objects.filter(owner_id=owner_id)
+        recount(profile, 'feed_length', FeedEntry, 'owner', 'owner_id')
+        trim_feeds([owner_id], 0)
+
+
+# Signals to keep home feeds in sync with recipes and followers
+def distribute_recipe(sender, instance, created, **kwargs):
+    """
+    Fan a new Recipe out to the followers' feeds, unless the owner is
+    a celebrity whose recipes are merged into feeds at read time.
+    """
+    if created and not is_celebrity(instance.owner_id):
+        fan_out_recipe(instance)
+
+
+def fill_feed(sender, instance, created, **kwargs):
+    """
+    Backfill the follower's feed when a new Follower is created.
+    """
+    if created and not is_celebrity(instance.followed_id):
+        backfill_feed(instance)
+
+
+def clear_feed(sender, instance, **kwargs):
+    """
+    Remove the unfollowed user's recipes when a Follower is deleted.
+    """
+    deleted, _ = FeedEntry.objects.filter(
+        owner_id=instance.owner_id, recipe__owner_id=instance.followed_id
+    ).delete()
+    adjust_counter(
+        Profile.objects.filter(owner_id=instance.owner_id),
+        'feed_length', -deleted
+    )
+
+
+def fill_feeds(sender, follows, **kwargs):
+    """
+    Backfill the followers' feeds for follows created in bulk, with the
+    same few statements per follower however many users they followed.
+    """
+    followed = {}
+    for follow in follows:
+        followed.setdefault(follow.owner_id, []).append(follow.followed_id)
+    for owner_id, followed_ids in followed.items():
+        # The latest recipes of all followed users but celebrities
+        recipes = Recipe.objects.filter(
+            owner_id__in=followed_ids,
+            owner__profile__followers_count__lte=(
+                settings.FEED_FANOUT_THRESHOLD
+            )
+        ).order_by(*FEED_ORDERING).values_list('id', 'created_at')
+        entries = FeedEntry.objects.bulk_create([
+            FeedEntry(
+                owner_id=owner_id, recipe_id=recipe_id, created_at=created_at
+            )
+            for recipe_id, created_at in recipes[:settings.FEED_MAX_LENGTH]
+        ], ignore_conflicts=True)
+        trim_feeds([owner_id], len(entries))
+
+
+def clear_feeds(sender, follows, **kwargs):
+    """
+    Remove the unfollowed users' recipes for follows deleted in bulk.
+    """
+    unfollowed = {}
+    for follow in follows:
+        unfollowed.setdefault(follow.owner_id, []).append(follow.followed_id)
+    for owner_id, followed_ids in unfollowed.items():
+        deleted, _ = FeedEntry.objects.filter(
+            owner_id=owner_id, recipe__owner_id__in=followed_ids
+        ).delete()
+        adjust_counter(
+            Profile.objects.filter(owner_id=owner_id), 'feed_length', -deleted
+        )
+
+
+post_save.connect(distribute_recipe, sender=Recipe)
+post_save.connect(fill_feed, sender=Follower)
+post_delete.connect(clear_feed, sender=Follower)
+follows_created.connect(fill_feeds, sender=Follower)
+follows_deleted.connect(clear_feeds, sender=Follower)
@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from followers.models import Follower, follow_users
+from profiles.models import Profile
+from recipes.models import Recipe
+from .models import FeedEntry
+
+
+@override_settings(FEED_FANOUT_THRESHOLD=1, FEED_MAX_LENGTH=5)
+class FeedTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.chris = User.objects.create_user(username='chris', password='pass')
+        Follower.objects.create(owner=self.adam, followed=self.brian)
+
+    def create_recipe(self, owner, title):
+        return Recipe.objects.create(
+            owner=owner, title=title, short_description='A test recipe'
+        )
+
+    def feed_titles(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/feed/')
+        return [recipe['title'] for recipe in response.data['results']]
+
+    def test_new_recipes_are_fanned_out_to_followers(self):
+        self.create_recipe(self.brian, 'Brian 1')
+        self.create_recipe(self.chris, 'Chris 1')
+        self.assertEqual(self.feed_titles(), ['Brian 1'])
+
+    def test_follow_backfills_and_unfollow_clears_feed(self):
+        self.create_recipe(self.chris, 'Chris 1')
+        follow = Follower.objects.create(owner=self.adam, followed=self.chris)
+        self.assertEqual(self.feed_titles(), ['Chris 1'])
+        follow.delete()
+        self.assertEqual(self.feed_titles(), [])
+
+    def test_celebrity_recipes_are_merged_at_read_time(self):
+        # A second follower puts Brian above the fan-out threshold
+        Follower.objects.create(owner=self.chris, followed=self.brian)
+        self.create_recipe(self.brian, 'Brian 1')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_titles(), ['Brian 1'])
+
+    def test_bulk_follows_skip_celebrities(self):
+        Follower.objects.create(owner=self.chris, followed=self.brian)
+        self.create_recipe(self.brian, 'Brian 1')
+        self.create_recipe(self.chris, 'Chris 1')
+        Follower.objects.filter(owner=self.adam).delete()
+        follow_users(self.adam, [self.brian.pk, self.chris.pk])
+        # Brian's recipes are merged at read time instead
+        self.assertQuerysetEqual(
+            FeedEntry.objects.filter(owner=self.adam),
+            ['Chris 1'], lambda entry: entry.recipe.title
+        )
+        self.assertEqual(self.feed_titles(), ['Chris 1', 'Brian 1'])
+
+    def test_celebrity_recipes_are_capped(self):
+        Follower.objects.create(owner=self.chris, followed=self.brian)
+        for index in range(8):
+            self.create_recipe(self.brian, f'Brian {index}')
+        self.assertEqual(
+            self.feed_titles(), [f'Brian {index}' for index in range(7, 2, -1)]
+        )
+
+    def test_feeds_are_capped(self):
+        for index in range(8):
+            self.create_recipe(self.brian, f'Brian {index}')
+        # Stored feeds may run over by the trim slack, reads never do
+        self.assertLessEqual(
+            FeedEntry.objects.filter(owner=self.adam).count(), 6
+        )
+        self.assertEqual(
+            self.feed_titles(), [f'Brian {index}' for index in range(7, 2, -1)]
+        )
+
+    def test_feed_length_is_counted_without_scanning_feeds(self):
+        for index in range(3):
+            self.create_recipe(self.brian, f'Brian {index}')
+        with CaptureQueriesContext(connection) as queries:
+            self.create_recipe(self.brian, 'Brian 3')
+        self.assertFalse([
+            query['sql'] for query in queries
+            if 'COUNT(' in query['sql'] and 'feeds_feedentry' in query['sql']
+        ])
+        self.assertEqual(Profile.objects.get(owner=self.adam).feed_length, 4)
+
+        for index in range(4, 8):
+            self.create_recipe(self.brian, f'Brian {index}')
+        self.assertEqual(
+            Profile.objects.get(owner=self.adam).feed_length,
+            FeedEntry.objects.filter(owner=self.adam).count()
+        )
+        Follower.objects.get(owner=self.adam, followed=self.brian).delete()
+        self.assertEqual(Profile.objects.get(owner=self.adam).feed_length, 0)
+
+    def test_feed_requires_authentication(self):
+        response = self.client.get('/feed/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
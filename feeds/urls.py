@@ -0,0 +1,7 @@
+from django.urls import path
+from feeds import views
+from project5_api.async_views import async_patterns
+
+urlpatterns = async_patterns([
+    path('feed/', views.FeedView.as_view(), name='feed'),
+])
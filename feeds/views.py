@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import generics, permissions
+from followers.models import Follower
+from project5_api.pagination import KeysetPagination
+from recipes.models import Recipe
+from recipes.views import RecipeSummaryMixin
+from .models import FEED_ORDERING, FeedEntry
+
+
+class FeedView(RecipeSummaryMixin, generics.ListAPIView):
+    """
+    API view to list recipes from the users the current user follows.
+    Recipes fanned out to the user's feed are merged at query time with
+    recent recipes from followed celebrity accounts.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    query_budget = 6
+
+    def get_queryset(self):
+        """
+        Return the newest recipes in the user's capped feed together
+        with the newest recipes of each followed user above the fan-out
+        threshold, capped alike, so every page seeks over a bounded set
+        of recipes through the feed and owner indexes.
+        """
+        user = self.request.user
+        max_length = settings.FEED_MAX_LENGTH
+        feed = FeedEntry.objects.filter(owner=user).order_by(
+            *FEED_ORDERING
+        ).values('recipe')[:max_length]
+        celebrity_ids = Follower.objects.filter(
+            owner=user,
+            followed__profile__followers_count__gt=(
+                settings.FEED_FANOUT_THRESHOLD
+            )
+        ).values_list('followed', flat=True)
+
+        recipes = Q(pk__in=feed)
+        for celebrity_id in celebrity_ids:
+            recipes |= Q(pk__in=Recipe.objects.filter(
+                owner_id=celebrity_id
+            ).order_by(*FEED_ORDERING).values('pk')[:max_length])
+        return self.with_related_data(
+            Recipe.objects.filter(recipes)
+        ).order_by(*FEED_ORDERING)
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('followers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['created_at', 'id'], name='followers_f_created_ee64d8_idx'),
+        ),
+    ]
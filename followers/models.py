@@ -1,8 +1,19 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from django.dispatch import Signal
+from profiles.models import (
+    Profile, invalidate_profile_of, invalidate_profiles_of
+)
+from project5_api.counters import AtomicSaveMixin, adjust_counter, recount
 
+# Sent with the `follows` created or deleted by a bulk operation, which
+# sends no post_save or post_delete signals for the individual follows
+follows_created = Signal()
+follows_deleted = Signal()
 
-class Follower(models.Model):
+
+class Follower(AtomicSaveMixin, models.Model):
     """
     Follower model that tracks the relationship between a
     user (owner) and the user they follow (followed).
@@ -18,6 +29,135 @@ class Follower(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'followed']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.owner} follows {self.followed}'
+
+
+def follow_users(owner, user_ids):
+    """
+    Follow the given users as the owner in one transaction, with one
+    insert that ignores users already followed. Return the status of
+    each user: created, exists or not_found.
+    """
+    if not user_ids:
+        return {}
+    with transaction.atomic():
+        found = set(User.objects.filter(
+            pk__in=user_ids
+        ).values_list('id', flat=True))
+        followed = set(Follower.objects.filter(
+            owner=owner, followed_id__in=found
+        ).values_list('followed_id', flat=True))
+        follows = [
+            Follower(owner=owner, followed_id=user_id)
+            for user_id in found - followed
+        ]
+        Follower.objects.bulk_create(follows, ignore_conflicts=True)
+        if follows:
+            update_follow_counts(
+                owner.pk, [follow.followed_id for follow in follows]
+            )
+            follows_created.send(sender=Follower, follows=follows)
+
+    return {
+        user_id:
+        'not_found' if user_id not in found
+        else 'exists' if user_id in followed
+        else 'created'
+        for user_id in user_ids
+    }
+
+
+def unfollow_users(owner, user_ids):
+    """
+    Remove the owner's follows of the given users in one transaction,
+    with one delete statement. Return the status of each user:
+    deleted or not_found.
+    """
+    if not user_ids:
+        return {}
+    with transaction.atomic():
+        queryset = Follower.objects.filter(
+            owner=owner, followed_id__in=user_ids
+        )
+        follows = list(queryset.only('id', 'owner_id', 'followed_id'))
+        # Delete without collecting and signalling each follow, the
+        # counters and caches are updated once for all of them below
+        queryset._raw_delete(queryset.db)
+        if follows:
+            update_follow_counts(
+                owner.pk, [follow.followed_id for follow in follows]
+            )
+            follows_deleted.send(sender=Follower, follows=follows)
+
+    deleted = {follow.followed_id for follow in follows}
+    return {
+        user_id: 'deleted' if user_id in deleted else 'not_found'
+        for user_id in user_ids
+    }
+
+
+def update_follow_counts(owner_id, followed_ids):
+    """
+    Recount the follow counters of the owner and the followed users,
+    and drop their cached profiles.
+    """
+    recount(
+        Profile.objects.filter(owner_id=owner_id),
+        'following_count', Follower, 'owner', 'owner_id'
+    )
+    recount(
+        Profile.objects.filter(owner_id__in=followed_ids),
+        'followers_count', Follower, 'followed', 'owner_id'
+    )
+    invalidate_profiles_of([owner_id, *followed_ids])
+
+
+# Signals to keep the stored profile follow counters in sync
+def adjust_follow_counts(instance, amount):
+    """
+    Add amount to the followed user's followers count
+    and to the owner's following count.
+    """
+    adjust_counter(
+        Profile.objects.filter(owner_id=instance.followed_id),
+        'followers_count', amount
+    )
+    adjust_counter(
+        Profile.objects.filter(owner_id=instance.owner_id),
+        'following_count', amount
+    )
+
+
+def increment_follow_counts(sender, instance, created, **kwargs):
+    """
+    Update the follow counters when a new Follower is created.
+    """
+    if created:
+        adjust_follow_counts(instance, 1)
+
+
+def decrement_follow_counts(sender, instance, **kwargs):
+    """
+    Update the follow counters when a Follower is deleted.
+    """
+    adjust_follow_counts(instance, -1)
+
+
+def invalidate_follow_profiles(sender, instance, **kwargs):
+    """
+    Drop cached responses of both profiles when a Follower
+    is saved or deleted.
+    """
+    invalidate_profile_of(instance.owner_id)
+    invalidate_profile_of(instance.followed_id)
+
+
+post_save.connect(increment_follow_counts, sender=Follower)
+post_delete.connect(decrement_follow_counts, sender=Follower)
+post_save.connect(invalidate_follow_profiles, sender=Follower)
+post_delete.connect(invalidate_follow_profiles, sender=Follower)
@@ -1,14 +1,25 @@
 from django.db import IntegrityError
 from rest_framework import serializers
+from project5_api.serializers import BulkActionSerializer, id_list
+from project5_api.sparse import SparseFieldsSerializerMixin
 from .models import Follower
 
 
-class FollowerSerializer(serializers.ModelSerializer):
+class FollowerSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Follower model.
     Handles read-only fields for owner
     and the followed user's name.
     """
+    expandable_fields = {
+        'followed_profile': (
+            'profiles.serializers.ProfileSerializer',
+            {'source': 'followed.profile'}
+        ),
+    }
+
     owner = serializers.ReadOnlyField(source='owner.username')
     followed_name = serializers.ReadOnlyField(source='followed.username')
 
@@ -25,3 +36,13 @@ class FollowerSerializer(serializers.ModelSerializer):
             return super().create(validated_data)
         except IntegrityError:
             raise serializers.ValidationError({'detail': 'possible duplicate'})
+
+
+class BulkFollowSerializer(BulkActionSerializer):
+    """
+    Serializer for bulk requests following and unfollowing lists of users.
+    """
+    actions = ('follow', 'unfollow')
+
+    follow = id_list()
+    unfollow = id_list()
@@ -1,3 +1,161 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from feeds.models import FeedEntry
+from recipes.models import Recipe
+from .models import Follower
 
-# Create your tests here.
+
+class FollowerFieldsTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        for index in range(3):
+            user = User.objects.create_user(
+                username=f'user{index}', password='pass'
+            )
+            Follower.objects.create(owner=user, followed=adam)
+
+    def test_list_loads_users_in_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/followers/')
+        self.assertEqual(response.data['results'][0]['followed_name'], 'adam')
+
+    def test_expand_followed_profile(self):
+        response = self.client.get(
+            '/followers/', {'fields': 'id', 'expand': 'followed_profile'}
+        )
+        follower = response.data['results'][0]
+        self.assertEqual(set(follower), {'id', 'followed_profile'})
+        self.assertEqual(follower['followed_profile']['owner'], 'adam')
+
+    def test_expanded_profiles_in_constant_queries(self):
+        reader = User.objects.create_user(username='reader', password='pass')
+        Follower.objects.create(owner=reader, followed=User.objects.get(
+            username='adam'
+        ))
+        self.client.force_authenticate(user=reader)
+        params = {'expand': 'followed_profile'}
+        with self.assertNumQueries(3):
+            response = self.client.get('/followers/', params)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertTrue(all(
+            follower['followed_profile']['following_id']
+            for follower in response.data['results']
+        ))
+        for index in range(3, 8):
+            Follower.objects.create(
+                owner=User.objects.create_user(username=f'user{index}'),
+                followed=reader
+            )
+        with self.assertNumQueries(3):
+            response = self.client.get('/followers/', params)
+        self.assertEqual(len(response.data['results']), 9)
+
+
+class FollowerBulkTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.users = [
+            User.objects.create_user(username=f'user{index}', password='pass')
+            for index in range(3)
+        ]
+        for user in self.users:
+            Recipe.objects.create(
+                owner=user,
+                title=f'Recipe by {user}',
+                short_description='Short description',
+                ingredients='Flour, Water',
+                steps='Mix, Bake',
+            )
+        self.client.force_authenticate(user=self.adam)
+
+    def statuses(self, response):
+        return {
+            (result['action'], result['followed']): result['status']
+            for result in response.data['results']
+        }
+
+    def test_bulk_follow_and_unfollow(self):
+        first, second, third = self.users
+        Follower.objects.create(owner=self.adam, followed=first)
+        response = self.client.post('/followers/bulk/', {
+            'follow': [second.pk, third.pk, 999], 'unfollow': [first.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), {
+            ('follow', second.pk): 'created',
+            ('follow', third.pk): 'created',
+            ('follow', 999): 'not_found',
+            ('unfollow', first.pk): 'deleted',
+        })
+        self.adam.profile.refresh_from_db()
+        self.assertEqual(self.adam.profile.following_count, 2)
+        for user, count in [(first, 0), (second, 1), (third, 1)]:
+            user.profile.refresh_from_db()
+            self.assertEqual(user.profile.followers_count, count)
+        self.assertEqual(
+            set(FeedEntry.objects.filter(
+                owner=self.adam
+            ).values_list('recipe__owner', flat=True)),
+            {second.pk, third.pk}
+        )
+
+    def test_follow_again_reports_exists(self):
+        first = self.users[0]
+        Follower.objects.create(owner=self.adam, followed=first)
+        response = self.client.post(
+            '/followers/bulk/', {'follow': [first.pk]}, format='json'
+        )
+        self.assertEqual(
+            self.statuses(response), {('follow', first.pk): 'exists'}
+        )
+        first.profile.refresh_from_db()
+        self.assertEqual(first.profile.followers_count, 1)
+
+    def test_rejects_invalid_requests(self):
+        first = self.users[0]
+        for data in [
+            {},
+            {'follow': [first.pk], 'unfollow': [first.pk]},
+            {'follow': list(range(1, 502))},
+        ]:
+            response = self.client.post(
+                '/followers/bulk/', data, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follower.objects.exists())
+
+    def test_bulk_follow_queries_do_not_grow_with_ids(self):
+        users = [
+            User.objects.create_user(username=f'many{index}', password='pass')
+            for index in range(22)
+        ]
+        for user in users:
+            Recipe.objects.create(
+                owner=user, title='Recipe', short_description='A recipe'
+            )
+        queries = []
+        for followed in [users[:2], users[2:]]:
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/followers/bulk/', {
+                    'follow': [user.pk for user in followed]
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(FeedEntry.objects.filter(owner=self.adam).count(), 22)
+
+    def test_bulk_follow_invalidates_cached_profile(self):
+        first = self.users[0]
+        url = f'/profiles/{first.profile.pk}/'
+        self.client.get(url)
+        self.client.post(
+            '/followers/bulk/', {'follow': [first.pk]}, format='json'
+        )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertIsNotNone(response.data['following_id'])
@@ -4,6 +4,8 @@ from followers import views
 urlpatterns = [
     path('followers/', views.FollowerList.as_view(),
          name='follower-list'),
+    path('followers/bulk/', views.FollowerBulk.as_view(),
+         name='follower-bulk'),
     path('followers/<int:pk>/', views.FollowerDetail.as_view(),
          name='follower-detail')
 ]
@@ -1,10 +1,39 @@
+from django.db import transaction
 from rest_framework import generics, permissions, filters
+from rest_framework.response import Response
+from profiles.models import with_profiles_following_id
+from project5_api.conditional import ConditionalGetMixin
+from project5_api.pagination import KeysetPagination
 from project5_api.permissions import IsOwnerOrReadOnly
-from .models import Follower
-from .serializers import FollowerSerializer
+from project5_api.sparse import SparseFieldsMixin, only_requested
+from .models import Follower, follow_users, unfollow_users
+from .serializers import BulkFollowSerializer, FollowerSerializer
 
 
-class FollowerList(generics.ListCreateAPIView):
+class FollowerQuerySetMixin(SparseFieldsMixin):
+    """
+    Mixin loading only the columns and users needed
+    by the requested follower fields.
+    """
+    def get_queryset(self):
+        queryset = Follower.objects.order_by('-created_at')
+        if self.field_requested('owner'):
+            queryset = queryset.select_related('owner')
+        if 'followed_profile' in self.get_expanded_fields():
+            queryset = with_profiles_following_id(
+                queryset, 'followed', self.request.user
+            )
+        elif self.field_requested('followed_name'):
+            queryset = queryset.select_related('followed')
+        return only_requested(
+            queryset, self.get_requested_fields(), ('id', 'created_at'),
+            self.get_serializer_class().field_columns
+        )
+
+
+class FollowerList(
+    ConditionalGetMixin, FollowerQuerySetMixin, generics.ListCreateAPIView
+):
     """
     API view for listing and creating followers.
     Authenticated users can follow others,
@@ -13,6 +42,11 @@ class FollowerList(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     queryset = Follower.objects.all()
     serializer_class = FollowerSerializer
+    pagination_class = KeysetPagination
+    query_budget = 5
+    # Follow changes are recorded against the profiles involved
+    conditional_namespaces = ['profile']
+    last_modified_field = 'created_at'
     filter_backends = [filters.SearchFilter]
     search_fields = ['owner__username', 'followed__username']
 
@@ -24,7 +58,9 @@ class FollowerList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class FollowerDetail(generics.RetrieveDestroyAPIView):
+class FollowerDetail(
+    ConditionalGetMixin, FollowerQuerySetMixin, generics.RetrieveDestroyAPIView
+):
     """
     API view for retrieving and deleting a
     follower relationship. Only the owner of the
@@ -33,3 +69,32 @@ class FollowerDetail(generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwnerOrReadOnly]
     queryset = Follower.objects.all()
     serializer_class = FollowerSerializer
+    query_budget = {'get': 4}
+    conditional_namespaces = ['profile']
+    last_modified_field = 'created_at'
+
+
+class FollowerBulk(generics.GenericAPIView):
+    """
+    API view for following and unfollowing lists of users in one
+    request. Every change is applied in one transaction, and the
+    status of each user is returned in the order it was given.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        with transaction.atomic():
+            followed = follow_users(request.user, data['follow'])
+            unfollowed = unfollow_users(request.user, data['unfollow'])
+        results = [
+            {'followed': user_id, 'action': action, 'status': status}
+            for action, statuses in [
+                ('follow', followed), ('unfollow', unfollowed)
+            ]
+            for user_id, status in statuses.items()
+        ]
+        return Response({'results': results})
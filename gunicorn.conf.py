@@ -0,0 +1,12 @@
+"""
+Gunicorn configuration. Serves the WSGI application with sync workers
+by default, or the ASGI application with uvicorn workers when
+SERVER_MODE is asgi.
+"""
+import os
+
+if os.environ.get('SERVER_MODE') == 'asgi':
+    wsgi_app = 'project5_api.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'project5_api.wsgi:application'
@@ -1,9 +1,18 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from django.dispatch import Signal
 from recipes.models import Recipe
+from project5_api.cache import bump_version, bump_versions
+from project5_api.counters import AtomicSaveMixin, adjust_counter, recount
 
+# Sent with the `likes` created or deleted by a bulk operation, which
+# sends no post_save or post_delete signals for the individual likes
+likes_created = Signal()
+likes_deleted = Signal()
 
-class Like(models.Model):
+
+class Like(AtomicSaveMixin, models.Model):
     """
     Model representing a 'like' that a user can give to a recipe.
     """
@@ -29,3 +38,108 @@ class Like(models.Model):
         liked which recipe.
         """
         return f'{self.owner} liked {self.recipe}'
+
+
+def like_recipes(owner, recipe_ids):
+    """
+    Like the given recipes as the owner in one transaction, with one
+    insert that ignores recipes already liked. Return the status of
+    each recipe: created, exists or not_found.
+    """
+    if not recipe_ids:
+        return {}
+    with transaction.atomic():
+        found = set(Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).values_list('id', flat=True))
+        liked = set(Like.objects.filter(
+            owner=owner, recipe_id__in=found
+        ).values_list('recipe_id', flat=True))
+        likes = [
+            Like(owner=owner, recipe_id=recipe_id)
+            for recipe_id in found - liked
+        ]
+        Like.objects.bulk_create(likes, ignore_conflicts=True)
+        if likes:
+            changed = [like.recipe_id for like in likes]
+            recount(
+                Recipe.objects.filter(pk__in=changed),
+                'likes_count', Like, 'recipe'
+            )
+            likes_created.send(sender=Like, likes=likes)
+            invalidate_recipes(changed)
+
+    return {
+        recipe_id:
+        'not_found' if recipe_id not in found
+        else 'exists' if recipe_id in liked
+        else 'created'
+        for recipe_id in recipe_ids
+    }
+
+
+def unlike_recipes(owner, recipe_ids):
+    """
+    Remove the owner's likes of the given recipes in one transaction,
+    with one delete statement. Return the status of each recipe:
+    deleted or not_found.
+    """
+    if not recipe_ids:
+        return {}
+    with transaction.atomic():
+        queryset = Like.objects.filter(owner=owner, recipe_id__in=recipe_ids)
+        likes = list(queryset.only('id', 'recipe_id', 'created_at'))
+        # Delete without collecting and signalling each like, the
+        # counters and caches are updated once for all of them below
+        queryset._raw_delete(queryset.db)
+        if likes:
+            changed = [like.recipe_id for like in likes]
+            recount(
+                Recipe.objects.filter(pk__in=changed),
+                'likes_count', Like, 'recipe'
+            )
+            likes_deleted.send(sender=Like, likes=likes)
+            invalidate_recipes(changed)
+
+    deleted = {like.recipe_id for like in likes}
+    return {
+        recipe_id: 'deleted' if recipe_id in deleted else 'not_found'
+        for recipe_id in recipe_ids
+    }
+
+
+def invalidate_recipes(recipe_ids):
+    bump_versions('recipe', recipe_ids)
+
+
+# Signals to keep the stored recipe likes counter in sync
+def increment_likes_count(sender, instance, created, **kwargs):
+    """
+    Increase the recipe's likes count when a new Like is created.
+    """
+    if created:
+        adjust_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'likes_count'
+        )
+
+
+def decrement_likes_count(sender, instance, **kwargs):
+    """
+    Decrease the recipe's likes count when a Like is deleted.
+    """
+    adjust_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'likes_count', -1
+    )
+
+
+def invalidate_liked_recipe(sender, instance, **kwargs):
+    """
+    Drop cached responses of the recipe when a Like is saved or deleted.
+    """
+    bump_version('recipe', instance.recipe_id)
+
+
+post_save.connect(increment_likes_count, sender=Like)
+post_delete.connect(decrement_likes_count, sender=Like)
+post_save.connect(invalidate_liked_recipe, sender=Like)
+post_delete.connect(invalidate_liked_recipe, sender=Like)
@@ -1,17 +1,32 @@
 from rest_framework import serializers
 from .models import Like
 from recipes.models import Recipe
-from recipes.serializers import RecipeSerializer
+from project5_api.serializers import BulkActionSerializer, id_list
+from project5_api.sparse import SparseFieldsSerializerMixin
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Like model.
     Read-only fields for the owner and references for the liked recipe.
     """
+    expandable_fields = {
+        'recipe': ('recipes.serializers.RecipeSummarySerializer', {}),
+    }
+
     owner = serializers.ReadOnlyField(source='owner.username')
     recipe = serializers.PrimaryKeyRelatedField(queryset=Recipe.objects.all())
 
     class Meta:
         model = Like
         fields = ['id', 'owner', 'recipe', 'created_at']
+
+
+class BulkLikeSerializer(BulkActionSerializer):
+    """
+    Serializer for bulk requests liking and unliking lists of recipes.
+    """
+    actions = ('like', 'unlike')
+
+    like = id_list()
+    unlike = id_list()
@@ -1,3 +1,227 @@
-from django.test import TestCase
+import threading
+from unittest import skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+from recipes.models import Recipe
+from trending.models import TrendingRecipe
+from .models import Like
+
+
+def create_recipe(owner, title='Recipe'):
+    return Recipe.objects.create(
+        owner=owner,
+        title=title,
+        short_description='Short description',
+        ingredients='Flour, Water',
+        steps='Mix, Bake',
+    )
+
+
+class LikeCreateTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.recipe = create_recipe(self.adam)
+        self.client.force_authenticate(user=self.adam)
+
+    def test_like_again_returns_existing_like(self):
+        data = {'recipe': self.recipe.pk}
+        created = self.client.post('/likes/', data)
+        self.assertEqual(created.status_code, 201)
+        again = self.client.post('/likes/', data)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], created.data['id'])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.likes_count, 1)
+
+    def test_like_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/likes/', {'recipe': self.recipe.pk})
+        statements = [
+            query['sql'] for query in queries
+            if 'likes_like' in query['sql'].split(' WHERE')[0]
+        ]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT'))
+
+
+class LikeListOrderingTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.recipes = [
+            create_recipe(self.adam, f'Recipe {index}') for index in range(3)
+        ]
+        for likes, recipe in enumerate(self.recipes):
+            Like.objects.create(owner=self.adam, recipe=recipe)
+            Recipe.objects.filter(pk=recipe.pk).update(likes_count=likes)
+        self.client.force_authenticate(user=self.adam)
+
+    def ids(self, params):
+        response = self.client.get('/likes/list/', params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_cursor_pages_follow_requested_ordering(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        for ordering, expected in [
+            ('-likes_count', ids[::-1]),
+            ('likes_count', ids),
+        ]:
+            self.assertEqual(self.ids({'ordering': ordering}), expected)
+            self.assertEqual(
+                self.ids({'ordering': ordering, 'cursor': ''}), expected
+            )
+
+
+@skipIf(
+    connection.vendor == 'sqlite',
+    'SQLite locks the whole database for concurrent writes'
+)
+class ConcurrentLikeTests(TransactionTestCase):
+    THREADS = 8
+
+    def test_parallel_likes_create_one_row(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        recipe = create_recipe(adam)
+        barrier = threading.Barrier(self.THREADS)
+        responses = []
+
+        def like():
+            client = APIClient()
+            client.force_authenticate(user=adam)
+            try:
+                barrier.wait()
+                responses.append(
+                    client.post('/likes/', {'recipe': recipe.pk})
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=like) for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        codes = sorted(response.status_code for response in responses)
+        self.assertEqual(codes, [200] * (self.THREADS - 1) + [201])
+        self.assertEqual(Like.objects.filter(recipe=recipe).count(), 1)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.likes_count, 1)
+
+
+class LikeBulkTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.recipes = [
+            create_recipe(self.adam, f'Recipe {index}') for index in range(3)
+        ]
+        self.client.force_authenticate(user=self.adam)
+
+    def statuses(self, response):
+        return {
+            (result['action'], result['recipe']): result['status']
+            for result in response.data['results']
+        }
+
+    def test_bulk_like_reports_each_recipe(self):
+        first, second, third = self.recipes
+        Like.objects.create(owner=self.adam, recipe=first)
+        response = self.client.post('/likes/bulk/', {
+            'like': [first.pk, second.pk, third.pk, 999],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), {
+            ('like', first.pk): 'exists',
+            ('like', second.pk): 'created',
+            ('like', third.pk): 'created',
+            ('like', 999): 'not_found',
+        })
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.likes_count, 1)
+        self.assertEqual(TrendingRecipe.objects.get(
+            window='24h', recipe=second
+        ).likes, 1)
+
+    def test_bulk_unlike_updates_counters(self):
+        first, second, third = self.recipes
+        for recipe in [first, second]:
+            Like.objects.create(owner=self.adam, recipe=recipe)
+        response = self.client.post('/likes/bulk/', {
+            'like': [third.pk], 'unlike': [first.pk, second.pk, third.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/likes/bulk/', {
+            'unlike': [first.pk, third.pk],
+        }, format='json')
+        self.assertEqual(self.statuses(response), {
+            ('unlike', first.pk): 'deleted',
+            ('unlike', third.pk): 'not_found',
+        })
+        first.refresh_from_db()
+        self.assertEqual(first.likes_count, 0)
+        self.assertFalse(Like.objects.filter(recipe=first).exists())
+        self.assertEqual(TrendingRecipe.objects.get(
+            window='24h', recipe=first
+        ).likes, 0)
+
+    def test_bulk_like_invalidates_cached_recipe(self):
+        recipe = self.recipes[0]
+        url = f'/recipes/{recipe.pk}/'
+        self.client.get(url)
+        self.client.post(
+            '/likes/bulk/', {'like': [recipe.pk]}, format='json'
+        )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['likes_count'], 1)
+
+    def test_single_statement_per_step(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        Like.objects.create(owner=self.adam, recipe=self.recipes[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/likes/bulk/', {
+                'like': ids[1:], 'unlike': ids[:1]
+            }, format='json')
+        statements = [query['sql'].split()[0] for query in queries]
+        # Savepoints, the recipes and likes looked up, the likes
+        # inserted and deleted, one recount each, then the buckets and
+        # rankings inserted once and updated once per hour or window
+        self.assertEqual(len(statements), 23, statements)
+        self.assertEqual(statements.count('INSERT'), 3)
+        self.assertEqual(statements.count('DELETE'), 1)
+        self.assertEqual(statements.count('UPDATE'), 10)
+
+    def test_statements_do_not_grow_with_recipes(self):
+        recipes = [
+            create_recipe(self.adam, f'More {index}') for index in range(20)
+        ]
+        TrendingRecipe.objects.all().delete()
+        counts = []
+        for chunk in [recipes[:2], recipes[2:]]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/likes/bulk/', {
+                    'like': [recipe.pk for recipe in chunk]
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(
+            TrendingRecipe.objects.filter(window='7d', likes=1).count(), 20
+        )
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(
+            '/likes/bulk/', {'like': [self.recipes[0].pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
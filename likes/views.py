@@ -1,20 +1,31 @@
-from rest_framework import generics, permissions, filters
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from rest_framework import generics, permissions, filters, status
 from rest_framework.exceptions import ValidationError
-from .models import Like
-from .serializers import LikeSerializer
-from recipes.serializers import RecipeSerializer
+from rest_framework.response import Response
+from .models import Like, like_recipes, unlike_recipes
+from .serializers import BulkLikeSerializer, LikeSerializer
 from recipes.models import Recipe
+from recipes.search import RecipeSearchFilter
+from recipes.views import RecipeSummaryMixin
+from project5_api.conditional import ConditionalGetMixin
+from project5_api.pagination import KeysetPagination, OrderedKeysetMixin
 from project5_api.permissions import IsOwnerOrReadOnly
 
 
-class LikeListView(generics.ListAPIView):
+class LikeListView(
+    ConditionalGetMixin, OrderedKeysetMixin, RecipeSummaryMixin,
+    generics.ListAPIView
+):
     """
     API view to list all recipes that the authenticated user has liked.
     Allows filtering and searching on the recipe data.
     """
-    serializer_class = RecipeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    query_budget = 5
+    conditional_namespaces = ['recipe']
+    # Cursor pages follow the requested ordering, see `keyset_orderings`
+    required_fields = ('id', 'created_at', 'likes_count')
 
     def get_queryset(self):
         """
@@ -22,37 +33,51 @@ class LikeListView(generics.ListAPIView):
         with additional annotations for like counts.
         """
         user = self.request.user
-        return Recipe.objects.filter(likes__owner=user).annotate(
-            likes_count=Count('likes', distinct=True)
+        return self.with_related_data(
+            Recipe.objects.filter(likes__owner=user)
         ).order_by('-created_at')
 
     # Filter and search options
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [filters.OrderingFilter, RecipeSearchFilter]
     ordering_fields = ['likes_count', 'created_at']
+    keyset_orderings = {
+        field: (field, 'id') for field in ordering_fields
+    }
     search_fields = ['title', 'short_description', 'ingredients']
 
 
 class LikeCreateView(generics.CreateAPIView):
     """
     API view to allow users to 'like' a recipe.
+    Liking a recipe again is not an error: the existing like is
+    returned with 200 instead of 201.
     """
     queryset = Like.objects.all()
     serializer_class = LikeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-    def perform_create(self, serializer):
+    def create(self, request, *args, **kwargs):
         """
-        Create a like instance for the authenticated
-        user and the given recipe. Raise an error if
-        the user has already liked the recipe.
+        Insert the like and rely on the unique constraint on owner and
+        recipe to detect an existing one, so concurrent requests for
+        the same recipe create exactly one like without a prior check.
         """
-        user = self.request.user
-        recipe = serializer.validated_data.get('recipe')
-
-        if Like.objects.filter(owner=user, recipe=recipe).exists():
-            raise ValidationError("You have already liked this recipe.")
-
-        serializer.save(owner=user)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.save(owner=request.user)
+        except IntegrityError:
+            like = Like.objects.get(
+                owner=request.user,
+                recipe=serializer.validated_data['recipe']
+            )
+            return Response(
+                self.get_serializer(like).data, status=status.HTTP_200_OK
+            )
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
 
 
 class LikeDeleteView(generics.DestroyAPIView):
@@ -77,3 +102,27 @@ class LikeDeleteView(generics.DestroyAPIView):
         except Like.DoesNotExist:
             raise ValidationError("You haven't liked this recipe yet.")
         return like
+
+
+class LikeBulkView(generics.GenericAPIView):
+    """
+    API view to like and unlike lists of recipes in one request.
+    Every change is applied in one transaction, and the status of
+    each recipe is returned in the order it was given.
+    """
+    serializer_class = BulkLikeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        with transaction.atomic():
+            liked = like_recipes(request.user, data['like'])
+            unliked = unlike_recipes(request.user, data['unlike'])
+        results = [
+            {'recipe': recipe_id, 'action': action, 'status': outcome}
+            for action, outcomes in [('like', liked), ('unlike', unliked)]
+            for recipe_id, outcome in outcomes.items()
+        ]
+        return Response({'results': results})
@@ -0,0 +1,100 @@
+"""
+Streaming NDJSON export of users, profiles, recipes, comments, likes
+and follows.
+
+Every line is a JSON object whose `type` names the record, with related
+rows referred to by id, e.g.
+
+    {"type": "like", "id": 7, "owner": 2, "recipe": 31, ...}
+
+Records are written type by type in the order of EXPORTS, so rows come
+after the rows they refer to. Rows are read as plain values with
+server-side cursors, `chunk_size` at a time, so memory use does not
+grow with the size of the export.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from followers.models import Follower
+from likes.models import Like
+from profiles.models import Profile
+from recipes.models import Comment, Recipe
+
+# (record type, model, exported fields, lookups selecting a user's rows)
+EXPORTS = [
+    ('user', User, ('id', 'username', 'date_joined'), ('pk',)),
+    (
+        'profile', Profile,
+        ('id', 'owner', 'name', 'content', 'image', 'age', 'created_at'),
+        ('owner',)
+    ),
+    (
+        'recipe', Recipe,
+        (
+            'id', 'owner', 'title', 'short_description', 'ingredients',
+            'steps', 'cook_time', 'difficulty', 'image', 'created_at',
+            'updated_at',
+        ),
+        ('owner',)
+    ),
+    (
+        'comment', Comment,
+        ('id', 'owner', 'recipe', 'content', 'created_at', 'updated_at'),
+        ('owner',)
+    ),
+    ('like', Like, ('id', 'owner', 'recipe', 'created_at'), ('owner',)),
+    # Both directions of a user's follower edges
+    (
+        'follow', Follower, ('id', 'owner', 'followed', 'created_at'),
+        ('owner', 'followed')
+    ),
+]
+
+
+def export_querysets(user=None):
+    """
+    Return (record type, values queryset) pairs of the user's rows,
+    or of every row of the site without a user.
+    """
+    querysets = []
+    for kind, model, fields, lookups in EXPORTS:
+        queryset = model.objects.all()
+        if user is not None:
+            condition = Q()
+            for lookup in lookups:
+                condition |= Q(**{lookup: user.pk})
+            queryset = queryset.filter(condition)
+        querysets.append((kind, queryset.order_by('pk').values(*fields)))
+    return querysets
+
+
+def export_lines(user=None, chunk_size=None):
+    """
+    Yield the NDJSON lines of the export.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    for kind, queryset in export_querysets(user):
+        for row in queryset.iterator(chunk_size=chunk_size):
+            yield json.dumps({'type': kind, **row}, cls=DjangoJSONEncoder)
+            yield '\n'
+
+
+def export_chunks(lines, size=64 * 1024):
+    """
+    Join lines into encoded chunks of about `size` bytes, so a
+    response or file is written in a few large writes.
+    """
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer).encode()
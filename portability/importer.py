@@ -0,0 +1,195 @@
+"""
+Bulk import of users, profiles, recipes, comments, likes and follows
+from NDJSON, in the format written by the export, or from CSV files of
+a single record type with one column per field.
+
+Records keep their ids, so rows can refer to each other, and must come
+after the rows they refer to, as they do in exports. They are saved in
+batches with `bulk_create`, skipping rows whose id already exists, so
+no signals are sent: profiles of users without a profile record,
+stored counters, home feeds, trending rankings and the search index
+are filled in and cached responses dropped by `finish` once every batch
+is saved, and ingredients are indexed batch by batch.
+"""
+import csv
+import gzip
+import io
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from feeds.models import backfill_feeds
+from profiles.models import Profile
+from project5_api.cache import bump_namespace
+from recipes.ingredients import index_ingredients
+from recipes.models import Recipe
+from recipes.search import get_search_backend
+from trending.models import rebuild_buckets
+from .export import EXPORTS
+
+# Record types in the order their rows are saved
+MODELS = {kind: model for kind, model, _, _ in EXPORTS}
+
+
+def open_input(path):
+    """
+    Open the file for reading text, decompressing `.gz` files.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, encoding='utf-8', newline='')
+
+
+def read_records(lines, kind=None):
+    """
+    Yield the (record type, row) pairs of NDJSON lines, or of CSV rows
+    of the given record type.
+    """
+    if kind is not None:
+        for row in csv.DictReader(lines):
+            yield kind, row
+        return
+    for line in lines:
+        if line.strip():
+            row = json.loads(line)
+            yield row.pop('type', None), row
+
+
+def timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+@contextmanager
+def explicit_timestamps():
+    """
+    Keep the timestamps of imported rows instead of the time of the
+    import. Changes the fields for the whole process, so it is only
+    meant for commands.
+    """
+    fields = [
+        field for model in MODELS.values() for field in timestamp_fields(model)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """
+    Collects records into batches of `batch_size` rows and saves each
+    batch in one transaction.
+    """
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.batches = {kind: [] for kind in MODELS}
+        self.batched = 0
+        self.counts = Counter()
+        self.now = timezone.now()
+        self.timestamps = {
+            kind: [field.attname for field in timestamp_fields(model)]
+            for kind, model in MODELS.items()
+        }
+
+    def build(self, kind, row):
+        """
+        Return an unsaved instance of the record's model.
+        """
+        if kind not in MODELS:
+            raise ValueError(f'Unknown record type {kind!r}.')
+        if not row.get('id'):
+            raise ValueError('Records need an id.')
+        model = MODELS[kind]
+        values = {}
+        for name, value in row.items():
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete:
+                raise ValueError(f'Unknown {kind} field {name!r}.')
+            # Empty CSV columns
+            if value == '' and field.null:
+                value = None
+            values[field.attname] = field.to_python(value)
+        for attname in self.timestamps[kind]:
+            values.setdefault(attname, self.now)
+        if kind == 'user':
+            values.setdefault('password', make_password(None))
+        return model(**values)
+
+    def add(self, kind, row):
+        """
+        Add a record, and return whether a batch is full.
+        """
+        self.batches[kind].append(self.build(kind, row))
+        self.batched += 1
+        return self.batched >= self.batch_size
+
+    def save(self):
+        """
+        Save the collected records and return how many were saved.
+        """
+        saved = self.batched
+        with transaction.atomic():
+            for kind, instances in self.batches.items():
+                if not instances:
+                    continue
+                MODELS[kind].objects.bulk_create(
+                    instances, ignore_conflicts=True
+                )
+                if kind == 'recipe':
+                    index_ingredients(instances, new=True)
+                self.counts[kind] += len(instances)
+                instances.clear()
+        self.batched = 0
+        return saved
+
+
+def finish(stdout):
+    """
+    Check the references between imported rows, then fill in what the
+    signals skipped by bulk inserts would have.
+    """
+    models = list(MODELS.values())
+    connection.check_constraints(
+        table_names=[model._meta.db_table for model in models]
+    )
+    with transaction.atomic():
+        Profile.objects.bulk_create([
+            Profile(owner_id=owner_id)
+            for owner_id in MODELS['user'].objects.filter(
+                profile__isnull=True
+            ).values_list('id', flat=True).iterator()
+        ])
+        # Continue sequences after the imported ids
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+    call_command('reconcile_counters', stdout=stdout)
+    # Follower counts are reconciled first to tell celebrities apart
+    followers = MODELS['follow'].objects.values_list('owner_id', flat=True)
+    backfill_feeds(list(followers.order_by('owner_id').distinct()))
+    rebuild_buckets()
+    call_command('compact_trending', stdout=stdout)
+    backend = get_search_backend(connection)
+    if backend is not None and Recipe.objects.exists():
+        with transaction.atomic():
+            backend.rebuild()
+    # Imported rows show up in cached recipe and profile responses
+    bump_namespace('recipe')
+    bump_namespace('profile')
@@ -0,0 +1,55 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import compress_sequence
+from portability.export import export_chunks, export_lines
+
+
+class Command(BaseCommand):
+    """
+    Stream the recipes, comments, likes and follows of a user, or of
+    the whole site, as NDJSON to a file or stdout.
+    """
+    help = 'Export recipes, comments, likes and follows as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Username whose data is exported, the whole site if unset.'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help='File written to, or - for stdout.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Gzip the output.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Number of rows fetched from the database at a time.'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'No user named {options["user"]}.')
+
+        chunks = export_chunks(
+            export_lines(user, chunk_size=options['chunk_size'])
+        )
+        if options['gzip']:
+            chunks = compress_sequence(chunks)
+        if options['output'] == '-':
+            self.write(chunks, sys.stdout.buffer)
+        else:
+            with open(options['output'], 'wb') as output:
+                self.write(chunks, output)
+
+    def write(self, chunks, output):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
@@ -0,0 +1,107 @@
+import itertools
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection
+from portability.importer import (
+    MODELS, Importer, explicit_timestamps, finish, open_input, read_records
+)
+
+
+class Command(BaseCommand):
+    """
+    Import users, profiles, recipes, comments, likes and follows from
+    an NDJSON export, or a CSV file of one record type, in batches.
+
+    Foreign key checks are deferred to the end of the import. After
+    each batch the number of imported records is written to a
+    checkpoint file, and an interrupted import run again with the same
+    file resumes after it.
+    """
+    help = 'Bulk import NDJSON or CSV data, resuming from a checkpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='NDJSON or CSV file to import, optionally gzipped.'
+        )
+        parser.add_argument(
+            '--type', choices=list(MODELS),
+            help='Record type of the rows of a CSV file.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of records saved per transaction.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file, the input path with .checkpoint by default.'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        kind = options['type']
+        if '.csv' in os.path.basename(path) and kind is None:
+            raise CommandError('CSV files need a --type.')
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        done = self.read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Resuming after record {done}.')
+
+        importer = Importer(options['batch_size'])
+        start = time.perf_counter()
+        with open_input(path) as lines, explicit_timestamps():
+            # Like loaddata, check foreign keys once every row is saved
+            with connection.constraint_checks_disabled():
+                records = itertools.islice(
+                    read_records(lines, kind), done, None
+                )
+                for number, (record_kind, row) in enumerate(records, done + 1):
+                    try:
+                        full = importer.add(record_kind, row)
+                    except (ValueError, ValidationError) as error:
+                        raise CommandError(f'Record {number}: {error}')
+                    if full:
+                        done += importer.save()
+                        self.write_checkpoint(checkpoint, done)
+                        self.report(importer, start, verbosity=2)
+                done += importer.save()
+            self.write_checkpoint(checkpoint, done)
+        self.report(importer, start)
+
+        try:
+            finish(self.stdout)
+        except IntegrityError as error:
+            raise CommandError(f'Imported rows refer to missing rows: {error}')
+        os.remove(checkpoint)
+        self.stdout.write(
+            f'Import finished in {time.perf_counter() - start:.1f}s.'
+        )
+
+    def read_checkpoint(self, checkpoint):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as file:
+            return json.load(file)['records']
+
+    def write_checkpoint(self, checkpoint, records):
+        # Replaced in one step so it is never left half written
+        with open(f'{checkpoint}.tmp', 'w') as file:
+            json.dump({'records': records}, file)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
+
+    def report(self, importer, start, verbosity=1):
+        if self.verbosity < verbosity:
+            return
+        total = sum(importer.counts.values())
+        elapsed = time.perf_counter() - start
+        counts = ', '.join(
+            f'{count} {kind}s' for kind, count in importer.counts.items()
+        )
+        self.stdout.write(
+            f'Imported {total} records ({counts or "none"}) in '
+            f'{elapsed:.1f}s, {total / elapsed if elapsed else 0:.0f} rows/s.'
+        )
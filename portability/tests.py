@@ -0,0 +1,274 @@
+import gzip
+import json
+import os
+import tempfile
+import tracemalloc
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from asgiref.sync import async_to_sync
+from feeds.models import FeedEntry
+from followers.models import Follower
+from likes.models import Like
+from profiles.models import Profile
+from recipes.models import Comment, Recipe, RecipeIngredient
+from trending.models import TrendingRecipe
+
+
+def parse(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.recipe = Recipe.objects.create(
+            owner=self.adam, title='Bread', short_description='A test recipe'
+        )
+        brians_recipe = Recipe.objects.create(
+            owner=self.brian, title='Soup', short_description='A test recipe'
+        )
+        Comment.objects.create(
+            owner=self.brian, recipe=self.recipe, content='Tasty'
+        )
+        Comment.objects.create(
+            owner=self.adam, recipe=brians_recipe, content='Nice'
+        )
+        Like.objects.create(owner=self.adam, recipe=brians_recipe)
+        Follower.objects.create(owner=self.adam, followed=self.brian)
+        Follower.objects.create(owner=self.brian, followed=self.adam)
+
+    def export(self, **kwargs):
+        response = self.client.get('/export/', **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_of_the_current_user(self):
+        self.client.force_authenticate(user=self.adam)
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = parse(content)
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['user', 'profile', 'recipe', 'comment', 'like', 'follow',
+             'follow']
+        )
+        self.assertEqual(records[2]['title'], 'Bread')
+        self.assertEqual(records[3]['content'], 'Nice')
+        self.assertTrue(all(
+            self.adam.pk in (record['owner'], record['followed'])
+            for record in records[5:]
+        ))
+
+    def test_export_of_the_site_is_for_staff(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/export/', {'scope': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.adam.is_staff = True
+        self.adam.save()
+        _, content = self.export(data={'scope': 'all'})
+        self.assertEqual(
+            [record['type'] for record in parse(content)].count('recipe'), 2
+        )
+
+    def test_export_requires_authentication(self):
+        response = self.client.get('/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_gzip_is_applied_when_accepted(self):
+        self.client.force_authenticate(user=self.adam)
+        _, plain = self.export()
+        response, content = self.export(HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(content), plain)
+
+    def test_command_exports_to_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson.gz')
+            call_command('export_data', output=path, gzip=True)
+            with gzip.open(path) as export:
+                records = parse(export.read())
+        self.assertEqual(len(records), 11)
+        with self.assertRaises(CommandError):
+            call_command('export_data', user='chris', output=path)
+
+
+class ExportMemoryTests(APITestCase):
+    recipes = 20000
+
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        Recipe.objects.bulk_create([
+            Recipe(
+                owner=self.adam,
+                title=f'Recipe {index}',
+                short_description='A test recipe',
+                ingredients='Flour, Water, Salt, Yeast',
+                steps='Mix, Rest, Shape, Bake',
+            )
+            for index in range(self.recipes)
+        ], batch_size=5000)
+
+    @override_settings(EXPORT_CHUNK_SIZE=500)
+    def test_export_memory_is_bounded(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/export/')
+        size = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(size, 5 * 1024 * 1024)
+        # A few chunks of rows are held at a time, not the export
+        self.assertLess(peak, size / 4)
+
+
+class AsyncExportTests(TransactionTestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        Recipe.objects.create(
+            owner=self.adam, title='Bread', short_description='A test recipe'
+        )
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_export_streams_under_asgi(self):
+        client = AsyncClient()
+        client.force_login(self.adam)
+
+        async def export():
+            return await client.get('/export/')
+
+        response = async_to_sync(export)()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(
+            [record['type'] for record in parse(content)],
+            ['user', 'profile', 'recipe']
+        )
+
+
+class ImportTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write(self, name, lines):
+        with open(self.path(name), 'w') as file:
+            file.write(''.join(f'{line}\n' for line in lines))
+        return self.path(name)
+
+    def export(self, name):
+        call_command('export_data', output=self.path(name))
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def test_export_is_imported_unchanged(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        recipe = Recipe.objects.create(
+            owner=adam, title='Bread', short_description='A test recipe',
+            ingredients='Flour, Water'
+        )
+        Comment.objects.create(owner=brian, recipe=recipe, content='Tasty')
+        Like.objects.create(owner=brian, recipe=recipe)
+        Follower.objects.create(owner=brian, followed=adam)
+        exported = self.export('export.ndjson')
+        User.objects.all().delete()
+
+        call_command(
+            'import_data', self.path('export.ndjson'), batch_size=2,
+            stdout=StringIO()
+        )
+        self.assertEqual(self.export('imported.ndjson'), exported)
+        recipe = Recipe.objects.get()
+        self.assertEqual(recipe.likes_count, 1)
+        self.assertEqual(recipe.comments_count, 1)
+        self.assertEqual(recipe.ingredients_count, 2)
+        self.assertEqual(RecipeIngredient.objects.count(), 2)
+        self.assertEqual(Profile.objects.get(owner=adam).followers_count, 1)
+        self.assertFalse(os.path.exists(self.path('export.ndjson.checkpoint')))
+
+        # Feeds and trending rankings are filled in as signals would have
+        self.assertQuerysetEqual(
+            FeedEntry.objects.filter(owner=brian), [recipe], lambda e: e.recipe
+        )
+        self.assertEqual(Profile.objects.get(owner=brian).feed_length, 1)
+        trending = TrendingRecipe.objects.get(window='24h')
+        self.assertEqual((trending.likes, trending.comments), (1, 1))
+
+    def test_import_drops_cached_responses(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        recipe = Recipe.objects.create(
+            owner=adam, title='Bread', short_description='A test recipe'
+        )
+        url = f'/recipes/{recipe.pk}/'
+        etags = {
+            path: self.client.get(path)['ETag']
+            for path in [url, f'/profiles/{adam.profile.pk}/']
+        }
+        path = self.write('comments.ndjson', [json.dumps({
+            'type': 'comment', 'id': 1, 'owner': adam.pk,
+            'recipe': recipe.pk, 'content': 'Tasty',
+        })])
+        call_command('import_data', path, stdout=StringIO())
+        for path, etag in etags.items():
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, path)
+        self.assertEqual(
+            self.client.get(url).data['comments'][0]['content'], 'Tasty'
+        )
+
+    def test_csv_users_get_profiles(self):
+        path = self.path('users.csv')
+        with open(path, 'w') as file:
+            file.write('id,username,email\n1,adam,\n2,brian,b@example.com\n')
+        with self.assertRaises(CommandError):
+            call_command('import_data', path, stdout=StringIO())
+        call_command('import_data', path, type='user', stdout=StringIO())
+        self.assertEqual(
+            list(Profile.objects.order_by('owner').values_list(
+                'owner__username', flat=True
+            )),
+            ['adam', 'brian']
+        )
+        self.assertFalse(User.objects.get(pk=1).has_usable_password())
+
+    def test_interrupted_import_resumes(self):
+        users = [
+            json.dumps({'type': 'user', 'id': index, 'username': f'u{index}'})
+            for index in range(1, 6)
+        ]
+        path = self.write('users.ndjson', users + ['{"type": "user"}'])
+        with self.assertRaisesMessage(CommandError, 'Record 6'):
+            call_command('import_data', path, batch_size=2, stdout=StringIO())
+        with open(f'{path}.checkpoint') as file:
+            self.assertEqual(json.load(file), {'records': 4})
+        self.assertEqual(User.objects.count(), 4)
+
+        self.write('users.ndjson', users)
+        stdout = StringIO()
+        call_command('import_data', path, batch_size=2, stdout=stdout)
+        self.assertIn('Resuming after record 4.', stdout.getvalue())
+        self.assertIn('Imported 1 records (1 users)', stdout.getvalue())
+        self.assertEqual(User.objects.count(), 5)
+
+    def test_missing_references_fail(self):
+        path = self.write('likes.ndjson', [
+            json.dumps({'type': 'like', 'id': 1, 'owner': 7, 'recipe': 9})
+        ])
+        with self.assertRaisesMessage(CommandError, 'missing rows'):
+            # Rolls back the invalid rows
+            with transaction.atomic():
+                call_command('import_data', path, stdout=StringIO())
@@ -0,0 +1,6 @@
+from django.urls import path
+from portability import views
+
+urlpatterns = [
+    path('export/', views.ExportView.as_view(), name='export'),
+]
@@ -0,0 +1,46 @@
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework import permissions
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.views import APIView
+from project5_api.async_views import iterate_in_thread
+from .export import export_chunks, export_lines
+
+
+class ExportView(APIView):
+    """
+    API view streaming the current user's recipes, comments, likes and
+    follows as NDJSON, or the whole site's with `?scope=all` for staff.
+    The export is gzipped on the fly when the client accepts it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    scope_query_param = 'scope'
+
+    def get(self, request):
+        scope = request.query_params.get(self.scope_query_param, 'user')
+        if scope not in ('user', 'all'):
+            raise ValidationError({
+                self.scope_query_param: 'Choose one of: user, all.'
+            })
+        if scope == 'all' and not request.user.is_staff:
+            raise PermissionDenied('Only staff can export the whole site.')
+
+        user = request.user if scope == 'user' else None
+        content = export_chunks(export_lines(user))
+        gzipped = re_accepts_gzip.search(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if gzipped:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(
+            iterate_in_thread(content), content_type='application/x-ndjson'
+        )
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Content-Disposition'] = (
+            f'attachment; filename="export-{scope}.ndjson"'
+        )
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_auto_20261018_1118'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['created_at', 'id'], name='profiles_pr_created_881645_idx'),
+        ),
+    ]
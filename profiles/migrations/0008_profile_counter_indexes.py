@@ -0,0 +1,25 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_profile_profiles_pr_created_881645_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['recipes_count', 'id'], name='profiles_pr_recipes_9b0fa3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['followers_count', 'id'], name='profiles_pr_followe_75f5b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['following_count', 'id'], name='profiles_pr_followi_3e7300_idx'),
+        ),
+    ]
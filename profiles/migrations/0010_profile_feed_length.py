@@ -0,0 +1,34 @@
+# Generated by Django 3.2.4 on 2026-10-18 13:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_feed_entries(apps, schema_editor):
+    """
+    Set the stored feed length of every profile to its feed's size.
+    """
+    Profile = apps.get_model('profiles', 'Profile')
+    FeedEntry = apps.get_model('feeds', 'FeedEntry')
+    entries = FeedEntry.objects.filter(
+        owner=OuterRef('owner_id')
+    ).order_by().values('owner').annotate(total=Count('pk')).values('total')
+    Profile.objects.update(feed_length=Coalesce(Subquery(entries), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_image_variants'),
+        ('feeds', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='feed_length',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_feed_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, lookup):
+    rows = model.objects.filter(
+        **{lookup: OuterRef('owner_id')}
+    ).order_by().values(lookup).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Set the stored recipe and follower counters of every profile to the
+    real counts, once, for rows saved before the counters existed.
+    """
+    Profile = apps.get_model('profiles', 'Profile')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Follower = apps.get_model('followers', 'Follower')
+    Profile.objects.update(
+        recipes_count=count_rows(Recipe, 'owner'),
+        followers_count=count_rows(Follower, 'followed'),
+        following_count=count_rows(Follower, 'owner'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0010_profile_feed_length'),
+        ('recipes', '0012_backfill_counters'),
+        ('followers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,43 @@
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import (
+    IntegerField, OuterRef, Prefetch, Subquery, Value
+)
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from project5_api.cache import bump_version, bump_versions
+
+
+class ProfileQuerySet(models.QuerySet):
+    """
+    QuerySet for profiles with helpers for serialization.
+    """
+    def with_following_id(self, user):
+        """
+        Annotate the ID of the given user's follow of each profile.
+        """
+        # Imported here as the followers app depends on this module
+        from followers.models import Follower
+
+        if not user.is_authenticated:
+            return self.annotate(
+                following_id=Value(None, output_field=IntegerField())
+            )
+        return self.annotate(following_id=Subquery(
+            Follower.objects.filter(
+                owner=user, followed=OuterRef('owner')
+            ).values('id')[:1]
+        ))
+
+
+def with_profiles_following_id(queryset, lookup, user):
+    """
+    Load the users at `lookup` and their profiles with the ID of the
+    given user's follow of each annotated, for expanded profiles.
+    """
+    return queryset.select_related(lookup).prefetch_related(Prefetch(
+        f'{lookup}__profile', queryset=Profile.objects.with_following_id(user)
+    ))
 
 
 # Profile model to extend user data with additional fields
@@ -18,13 +54,30 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to='images/', default='../default_profile_sqbwns'
     )
+    # Storage names of the resized variants of the image, by size name
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     age = models.PositiveIntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(120)],
         blank=True, null=True
     )
+    recipes_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    # Entries in the stored home feed, counted high by cascade deletes,
+    # so only feeds it puts past the trim slack are counted and trimmed
+    feed_length = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProfileQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            # Support sorting and keyset pages by the stored counters
+            models.Index(fields=['recipes_count', 'id']),
+            models.Index(fields=['followers_count', 'id']),
+            models.Index(fields=['following_count', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.owner}'s profile"
@@ -39,4 +92,40 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(owner=instance)
 
 
+def invalidate_profile(sender, instance, **kwargs):
+    """
+    Drop cached responses of a Profile when it is saved or deleted.
+    """
+    bump_version('profile', instance.pk)
+
+
+def invalidate_user_profile(sender, instance, created, update_fields=None,
+                            **kwargs):
+    """
+    Drop cached responses of a User's profile when its username, which
+    profiles show, may have changed.
+    """
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_profile_of(instance.pk)
+
+
+def invalidate_profile_of(user_id):
+    """
+    Drop cached responses of the profile belonging to the given user.
+    """
+    invalidate_profiles_of([user_id])
+
+
+def invalidate_profiles_of(user_ids):
+    """
+    Drop cached responses of the profiles belonging to the given users.
+    """
+    bump_versions('profile', Profile.objects.filter(
+        owner_id__in=user_ids
+    ).values_list('id', flat=True))
+
+
 post_save.connect(create_profile, sender=User)
+post_save.connect(invalidate_user_profile, sender=User)
+post_save.connect(invalidate_profile, sender=Profile)
+post_delete.connect(invalidate_profile, sender=Profile)
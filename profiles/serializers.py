@@ -1,22 +1,33 @@
+from django.db import models
 from rest_framework import serializers
 from .models import Profile
 from followers.models import Follower
-from recipes.models import Recipe
+from project5_api.images import ImageURLField, image_variant_urls
+from project5_api.sparse import SparseFieldsSerializerMixin
 
 
 # Serializer for the Profile model
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Profile model to handle
     serialization and deserialization of profile data,
     including additional computed fields.
     """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: ImageURLField,
+    }
+
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     following_id = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
+    field_columns = {'image_variants': ('image', 'image_variants')}
 
     def get_is_owner(self, obj):
         """
@@ -24,31 +35,33 @@ class ProfileSerializer(serializers.ModelSerializer):
         user is the owner of the profile.
         """
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
 
     def get_following_id(self, obj):
         """
         Return the ID of the 'Follower' relationship
-        if the current user follows this profile.
+        if the current user follows this profile, using the
+        queryset annotation when available.
         """
+        if hasattr(obj, 'following_id'):
+            return obj.following_id
         user = self.context['request'].user
         if user.is_authenticated:
-            following = Follower.objects.filter(
-                owner=user, followed=obj.owner
-            ).first()
-            return following.id if following else None
+            return Follower.objects.filter(
+                owner=user, followed_id=obj.owner_id
+            ).values_list('id', flat=True).first()
         return None
 
-    def get_recipes_count(self, obj):
+    def get_image_variants(self, obj):
         """
-        Return the number of recipes created by the profile owner.
+        Return the URLs of the resized images, once processed.
         """
-        return Recipe.objects.filter(owner=obj.owner).count()
+        return image_variant_urls(obj)
 
     class Meta:
         model = Profile
         fields = [
             'id', 'owner', 'age', 'created_at', 'updated_at', 'name',
-            'content', 'image', 'is_owner', 'following_id',
+            'content', 'image', 'image_variants', 'is_owner', 'following_id',
             'recipes_count', 'followers_count', 'following_count',
         ]
@@ -1,3 +1,96 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from followers.models import Follower
+from project5_api.pagination import KeysetPagination
+from recipes.models import Recipe
+from .models import Profile
+
+
+class ProfileResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.url = f'/profiles/{self.adam.profile.pk}/'
+
+    def test_follow_invalidates_profile_and_overlay(self):
+        self.client.force_authenticate(user=self.brian)
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data['following_id'])
+        self.assertFalse(response.data['is_owner'])
+
+        follow = Follower.objects.create(owner=self.brian, followed=self.adam)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['following_id'], follow.pk)
+        self.assertEqual(response.data['followers_count'], 1)
+
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertTrue(response.data['is_owner'])
+        self.assertIsNone(response.data['following_id'])
+
+    def test_rename_invalidates_profile(self):
+        self.client.get(self.url)
+        self.adam.username = 'adam_renamed'
+        self.adam.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['owner'], 'adam_renamed')
+
+
+class ProfileListQueryCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        for index in range(12):
+            user = User.objects.create_user(
+                username=f'user{index}', password='pass'
+            )
+            if index % 2:
+                Follower.objects.create(owner=self.adam, followed=user)
+            for _ in range(index % 4):
+                Recipe.objects.create(
+                    owner=user, title='Recipe', short_description='A recipe'
+                )
+
+    def test_constant_queries_for_any_page_size(self):
+        self.client.force_authenticate(user=self.adam)
+        for page_size in [1, 5, 13]:
+            with mock.patch.object(KeysetPagination, 'page_size', page_size):
+                # Count and profiles, with every computed field
+                with self.assertNumQueries(2):
+                    response = self.client.get('/profiles/')
+                # The validators' aggregate and profiles
+                with self.assertNumQueries(2):
+                    self.client.get('/profiles/', {'cursor': ''})
+            self.assertEqual(len(response.data['results']), page_size)
+
+        profiles = self.client.get('/profiles/')
+        for profile in profiles.data['results']:
+            follow = Follower.objects.filter(
+                owner=self.adam, followed__username=profile['owner']
+            ).first()
+            self.assertEqual(profile['following_id'], follow and follow.pk)
+            self.assertEqual(profile['is_owner'], profile['owner'] == 'adam')
+
+    def test_sort_by_counters_with_cursor(self):
+        with mock.patch.object(KeysetPagination, 'page_size', 4):
+            response = self.client.get(
+                '/profiles/', {'ordering': '-recipes_count', 'cursor': ''}
+            )
+            counts = [p['recipes_count'] for p in response.data['results']]
+            response = self.client.get(response.data['next'])
+            counts += [p['recipes_count'] for p in response.data['results']]
+        self.assertEqual(counts, [3, 3, 3, 2, 2, 2, 1, 1])
+
+    def test_detail_miss_uses_one_query(self):
+        self.client.force_authenticate(user=self.adam)
+        profile = Profile.objects.get(owner__username='user1')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/profiles/{profile.pk}/')
+        self.assertIsNotNone(response.data['following_id'])
@@ -1,12 +1,14 @@
 from django.urls import path
 from profiles import views
+from project5_api.async_views import async_patterns
 
 # URL patterns for Profile views
-urlpatterns = [
+urlpatterns = async_patterns([
     path('profiles/', views.ProfileList.as_view(),
          name='profile-list'),
     path('profiles/<int:pk>/', views.ProfileDetail.as_view(),
          name='profile-detail'),
+]) + [
     path('profiles/<int:pk>/delete/', views.ProfileDelete.as_view(),
          name='profile-delete'),
 ]
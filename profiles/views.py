@@ -1,24 +1,33 @@
-from django.db.models import Count
 from rest_framework import generics, permissions, filters
+from followers.models import Follower
 from .models import Profile
 from .serializers import ProfileSerializer
+from project5_api.cache import CachedRetrieveMixin
+from project5_api.conditional import ConditionalGetMixin
+from project5_api.images import ImageUploadMixin
+from project5_api.pagination import KeysetPagination, OrderedKeysetMixin
 from project5_api.permissions import IsOwnerOrReadOnly
+from project5_api.sparse import SparseFieldsMixin, only_requested
 
 
 # List all profiles and include aggregated data
-class ProfileList(generics.ListAPIView):
+class ProfileList(
+    ConditionalGetMixin, OrderedKeysetMixin, SparseFieldsMixin,
+    generics.ListAPIView
+):
     """
-    View for listing all profiles with annotated
-    data such as recipe counts, followers count, and
-    following count. Supports filtering and searching.
+    View for listing all profiles with their stored
+    recipe counts, followers count, and following count.
+    Supports filtering and searching.
     """
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__recipe', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
+    queryset = Profile.objects.select_related(
+        'owner'
     ).order_by('-created_at')
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    query_budget = 5
+    conditional_namespaces = ['profile']
     filter_backends = [
         filters.OrderingFilter,
         filters.SearchFilter
@@ -36,6 +45,28 @@ class ProfileList(generics.ListAPIView):
         'content',
     ]
 
+    # Sorting by a stored counter pages with a keyset over (counter, id)
+    keyset_orderings = {
+        field: (field, 'id')
+        for field in ['recipes_count', 'followers_count', 'following_count']
+    }
+
+    def get_queryset(self):
+        """
+        Return profiles with every computed field in one query,
+        loading only the columns needed by the requested fields.
+        """
+        queryset = Profile.objects.order_by('-created_at')
+        if self.field_requested('owner'):
+            queryset = queryset.select_related('owner')
+        if self.field_requested('following_id'):
+            queryset = queryset.with_following_id(self.request.user)
+        return only_requested(
+            queryset, self.get_requested_fields(),
+            ('id', 'owner', 'created_at', *self.keyset_orderings),
+            self.get_serializer_class().field_columns
+        )
+
     def get_serializer_context(self):
         """
         Provide request context to the serializer.
@@ -44,18 +75,32 @@ class ProfileList(generics.ListAPIView):
 
 
 # Detail view for retrieving or updating a single profile
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+class ProfileDetail(
+    ConditionalGetMixin, SparseFieldsMixin, CachedRetrieveMixin,
+    ImageUploadMixin, generics.RetrieveUpdateAPIView
+):
     """
     View for retrieving and updating a specific profile.
     Only the profile owner can update their own profile.
+    Profiles are served from the response cache, and uploaded
+    images are resized in the background.
     """
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__recipe', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
+    queryset = Profile.objects.select_related(
+        'owner'
     ).order_by('-created_at')
     serializer_class = ProfileSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    query_budget = {'get': 5}
+    cache_namespace = 'profile'
+    personal_fields = ['is_owner', 'following_id']
+
+    def get_queryset(self):
+        """
+        Return profiles with the current user's follow annotated.
+        """
+        return Profile.objects.select_related('owner').with_following_id(
+            self.request.user
+        )
 
     def get_serializer_context(self):
         """
@@ -63,12 +108,31 @@ class ProfileDetail(generics.RetrieveUpdateAPIView):
         """
         return {'request': self.request}
 
+    def get_overlay(self, body):
+        """
+        Return the ID of the current user's follow of this profile.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return {'following_id': None}
+        following = Follower.objects.filter(
+            owner=user, followed__profile__id=body['id']
+        ).values_list('id', flat=True).first()
+        return {'following_id': following}
+
+    def personalize(self, data):
+        """
+        Mark the profile as the current user's own.
+        """
+        data['is_owner'] = data['owner'] == self.request.user.username
+        return data
+
     def perform_update(self, serializer):
         """
         Save the updated profile data
         with the current user as the owner.
         """
-        serializer.save(owner=self.request.user)
+        self.save_with_images(serializer, owner=self.request.user)
 
 
 # Delete view for removing a profile and its associated user
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class Project5ApiConfig(AppConfig):
+    name = 'project5_api'
+
+    def ready(self):
+        from . import authentication, db, queries
+        authentication.connect_signals()
+        db.connect_signals()
+        queries.connect_signals()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project5_api.settings')
+# Serve the read-heavy views asynchronously, see project5_api.async_views
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,141 @@
+"""
+Async serving of the read-heavy endpoints under ASGI.
+
+Under ASGI Django runs every sync view on one shared thread, so a slow
+query or storage call holds up all other requests of the worker.
+`async_patterns` turns the views of a URL conf into async views that
+run the DRF view, rendering included, on a pool of ASYNC_VIEW_THREADS
+threads while the event loop keeps serving other requests. Each pool
+thread uses its own database connection, closed once it expires.
+
+Django 3.2 has no async ORM interface, so queries still run in threads;
+`run_concurrently` runs independent queries of one request on separate
+pool threads. Both are no-ops unless ASYNC_VIEWS is set, which the
+ASGI application does.
+"""
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.urls import URLPattern
+
+from .db import start_connections
+
+# Views and the queries they run concurrently use separate pools, so a
+# view waiting for its queries never waits for a thread of its own pool
+_executors = {}
+
+
+def get_executor(name='views'):
+    if name not in _executors:
+        _executors[name] = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix=name
+        )
+    return _executors[name]
+
+
+def in_pool_thread(func, *args, **kwargs):
+    """
+    Call func with expired or broken database connections replaced, as
+    Django does around each request, since pool threads outlive the
+    requests they serve.
+    """
+    start_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """
+    Return an async view running the sync view and rendering its
+    response on the view thread pool.
+    """
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    run = sync_to_async(
+        functools.partial(in_pool_thread, render),
+        thread_sensitive=False, executor=get_executor()
+    )
+
+    @functools.wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        return await run(request, *args, **kwargs)
+
+    return wrapped
+
+
+def async_patterns(urlpatterns):
+    """
+    Return the URL patterns with their views served asynchronously
+    when ASYNC_VIEWS is enabled, or unchanged otherwise.
+    """
+    if not settings.ASYNC_VIEWS:
+        return urlpatterns
+    return [
+        URLPattern(
+            pattern.pattern, async_view(pattern.callback),
+            pattern.default_args, pattern.name
+        )
+        for pattern in urlpatterns
+    ]
+
+
+def run_concurrently(*funcs):
+    """
+    Call the functions, which must not depend on each other, and return
+    their results in order. With ASYNC_VIEWS they run on separate pool
+    threads, unless a transaction is open and all queries must use its
+    connection.
+    """
+    if not settings.ASYNC_VIEWS or connection.in_atomic_block:
+        return [func() for func in funcs]
+    # Each in the request's context, so its query stats are recorded
+    futures = [
+        get_executor('queries').submit(
+            contextvars.copy_context().run, in_pool_thread, func
+        )
+        for func in funcs
+    ]
+    return [future.result() for future in futures]
+
+
+def iterate_in_thread(iterable):
+    """
+    Return an iterator over the iterable, a streaming response's
+    content, advanced on a thread of its own when ASYNC_VIEWS is set.
+    Django 3.2 iterates streaming responses on the event loop under
+    ASGI, where queries are not allowed, and a server-side cursor must
+    stay on the thread of its connection.
+    """
+    if not settings.ASYNC_VIEWS:
+        return iterable
+    return _iterate_in_thread(iter(iterable))
+
+
+def _iterate_in_thread(iterator):
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+
+    def close():
+        if hasattr(iterator, 'close'):
+            iterator.close()
+        connections.close_all()
+
+    try:
+        while True:
+            # Items are chunks of bytes, never None
+            item = executor.submit(next, iterator, None).result()
+            if item is None:
+                return
+            yield item
+    finally:
+        executor.submit(close).result()
+        executor.shutdown()
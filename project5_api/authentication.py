@@ -0,0 +1,163 @@
+"""
+JWT authentication without a user query per request.
+
+Access tokens carry the user's profile id next to the user id, and
+`JWTClaimsCookieAuthentication` builds `request.user` from the verified
+claims and the cached user state: a `User` instance with those fields
+loaded and every other field deferred, so it can be compared with
+owners and used in filters and foreign keys as is. The first time a
+view reads any other field, the rest of the user and of its profile is
+loaded with one query.
+
+The user's username, and whether the user still exists, is active or is
+staff, are kept in the cache for JWT_REVOCATION_CACHE_TTL seconds, and
+dropped when the user is saved or deleted, so deactivating or renaming
+a user takes effect at once. The username is not a claim, as it would
+outlive a rename for as long as the token.
+Tokens issued before the extra claims existed are authenticated with a
+user query as before.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from functools import partial
+
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from profiles.models import Profile
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Claims added to tokens
+CLAIMS = ('profile_id',)
+# Cached in place of the state of users that no longer exist
+MISSING = 'missing'
+
+
+def state_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+class TokenClaimsSerializer(TokenObtainPairSerializer):
+    """
+    Issues tokens with the profile id of the user.
+    """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        profile = getattr(user, 'profile', None)
+        token['profile_id'] = profile.pk if profile is not None else None
+        return token
+
+
+def get_user_state(user_id):
+    """
+    Return the username and the fields of the user that may revoke its
+    tokens, as a dict, or MISSING if the user does not exist.
+    """
+    key = state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(
+            'username', 'is_active', 'is_staff', 'is_superuser'
+        ).first() or MISSING
+        cache.set(key, state, timeout=settings.JWT_REVOCATION_CACHE_TTL)
+    return state
+
+
+def load_token_user(user, instance, using=None, fields=None):
+    """
+    Stand-in for `refresh_from_db` of a token user and its profile that
+    loads every deferred field of both with one query when a deferred
+    field is first read, instead of one query per field.
+    """
+    deferred = instance.get_deferred_fields()
+    if fields is None or not deferred.issuperset(fields):
+        # An explicit refresh
+        return type(instance).refresh_from_db(instance, using, fields)
+
+    profile = getattr(user, 'profile', None)
+    loaded = User.objects.using(using or user._state.db).select_related(
+        'profile'
+    ).get(pk=user.pk)
+    pairs = [(user, loaded)]
+    if profile is not None:
+        pairs.append((profile, getattr(loaded, 'profile', None)))
+    for stale, fresh in pairs:
+        stale.__dict__.pop('refresh_from_db', None)
+        if fresh is None:
+            continue
+        for name in stale.get_deferred_fields():
+            setattr(stale, name, getattr(fresh, name))
+
+
+def token_user(user_id, validated_token, state):
+    """
+    Return a User with its id and the fields of the state loaded, and
+    its profile with only its id, loading the rest of both on first
+    use with `load_token_user`.
+    """
+    loaded = {'id': user_id, **state}
+    fields = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in loaded
+    ]
+    user = User.from_db(
+        router.db_for_read(User), fields, [loaded[name] for name in fields]
+    )
+    if validated_token['profile_id'] is not None:
+        user.profile = Profile.from_db(
+            user._state.db, ['id', 'owner_id'],
+            [validated_token['profile_id'], user_id]
+        )
+        user.profile.refresh_from_db = partial(
+            load_token_user, user, user.profile
+        )
+    user.refresh_from_db = partial(load_token_user, user, user)
+    return user
+
+
+class JWTClaimsCookieAuthentication(JWTCookieAuthentication):
+    """
+    JWT cookie or header authentication that builds the user from the
+    token's claims and the cached user state.
+    """
+    def get_user(self, validated_token):
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            or any(claim not in validated_token for claim in CLAIMS)
+        ):
+            return super().get_user(validated_token)
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+        state = get_user_state(user_id)
+        if state == MISSING:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return token_user(user_id, validated_token, state)
+
+
+def forget_user_state(sender, instance, **kwargs):
+    cache.delete(state_key(instance.pk))
+
+
+def connect_signals():
+    post_save.connect(forget_user_state, sender=User)
+    post_delete.connect(forget_user_state, sender=User)
@@ -0,0 +1,209 @@
+"""
+Read-through cache for detail responses.
+
+Each cached object has a version that is bumped by post_save/post_delete
+signals whenever the object or anything shown in its response changes.
+Versions are the time of the change in nanoseconds, so they also serve
+as Last-Modified dates. Responses are cached under the current version,
+so a bump makes every older entry unreachable without deleting it.
+Bulk changes that send no signals bump a whole namespace instead, which
+raises the version of each of its objects to the time of the bump.
+
+The serialized body is shared between all users, while per-user fields
+are kept in a separate overlay cached per user and merged on the way out.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+STATS_KEYS = {'hit': 'response-cache:hits', 'miss': 'response-cache:misses'}
+# Versions may expire, objects then simply start over at a new version
+VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def version_key(namespace, pk):
+    return f'response-cache:version:{namespace}:{pk}'
+
+
+def changed_key(namespace):
+    return f'response-cache:changed:{namespace}'
+
+
+def namespace_key(namespace):
+    return f'response-cache:namespace:{namespace}'
+
+
+def get_version(namespace, pk):
+    """
+    Return the current version of an object. Objects without one start
+    from the current time, so a version lost to eviction is never reused.
+    """
+    key = version_key(namespace, pk)
+    versions = cache.get_many([key, namespace_key(namespace)])
+    version = versions.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+        version = cache.get(key)
+    return max(version, versions.get(namespace_key(namespace), 0))
+
+
+def bump_version(namespace, pk):
+    """
+    Invalidate every cached response of an object, and record the time
+    of the change for the whole namespace.
+    """
+    bump_versions(namespace, [pk])
+
+
+def bump_versions(namespace, pks):
+    """
+    Invalidate every cached response of several objects at once.
+    """
+    now = time.time_ns()
+    cache.set_many(
+        {version_key(namespace, pk): now for pk in pks},
+        timeout=VERSION_TIMEOUT
+    )
+    cache.set(changed_key(namespace), now, timeout=None)
+
+
+def bump_namespace(namespace):
+    """
+    Invalidate every cached response of the namespace, after bulk
+    changes that sent no signals.
+    """
+    now = time.time_ns()
+    cache.set_many(
+        {namespace_key(namespace): now, changed_key(namespace): now},
+        timeout=None
+    )
+
+
+def last_changed(namespace):
+    """
+    Return the time in nanoseconds of the latest change to any object
+    in the namespace, or 0 if none was recorded.
+    """
+    return cache.get(changed_key(namespace), 0)
+
+
+def lookup_pk(view):
+    """
+    Return the primary key in the URL of a detail view as an int, the
+    form signals bump versions under, so `/recipes/01/` shares the
+    version of `/recipes/1/`. Raise Http404 if it is not a number.
+    """
+    try:
+        return int(view.kwargs[view.lookup_url_kwarg or view.lookup_field])
+    except (TypeError, ValueError):
+        raise Http404
+
+
+def record(outcome):
+    """
+    Count a cache hit or miss.
+    """
+    key = STATS_KEYS[outcome]
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def cache_stats():
+    """
+    Return the response cache hit and miss counts and the hit rate.
+    """
+    hits = cache.get(STATS_KEYS['hit'], 0)
+    misses = cache.get(STATS_KEYS['miss'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+class CachedRetrieveMixin:
+    """
+    Mixin for detail views that serves `retrieve` from the response
+    cache. Views name a cache namespace, list the per-user fields to
+    leave out of the shared body and compute them in `get_overlay`.
+    On a miss the overlay is taken from the freshly serialized object.
+    """
+    cache_namespace = None
+    personal_fields = []
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = lookup_pk(self)
+        version = get_version(self.cache_namespace, pk)
+        body_key = f'response-cache:{self.cache_namespace}:{pk}:{version}'
+
+        body = cache.get(body_key)
+        overlay = None
+        outcome = 'hit' if body is not None else 'miss'
+        if body is None:
+            instance = self.get_object()
+            serializer = self.get_serializer_class()(
+                instance, context=self.get_serializer_context()
+            )
+            data = serializer.data
+            body = {
+                name: value
+                for name, value in data.items()
+                if name not in self.personal_fields
+            }
+            overlay = {
+                name: data[name]
+                for name in self.personal_fields if name in data
+            }
+            cache.set(body_key, body, settings.RESPONSE_CACHE_TIMEOUT)
+        record(outcome)
+        logger.debug('%s %s:%s', outcome, self.cache_namespace, pk)
+
+        user = request.user
+        if user.is_authenticated:
+            overlay_key = f'{body_key}:user:{user.pk}'
+            fresh = overlay is not None
+            if not fresh:
+                overlay = cache.get(overlay_key)
+            if overlay is None:
+                overlay = self.get_overlay(body)
+                fresh = True
+            if fresh:
+                cache.set(
+                    overlay_key, overlay, settings.RESPONSE_CACHE_TIMEOUT
+                )
+        elif overlay is None:
+            overlay = self.get_overlay(body)
+
+        response = Response(
+            self.select_fields(self.personalize({**body, **overlay}))
+        )
+        response['X-Cache'] = outcome.upper()
+        return response
+
+    def get_overlay(self, body):
+        """
+        Return the per-user fields of the response for the current user.
+        """
+        return {}
+
+    def personalize(self, data):
+        """
+        Adjust per-user values that can be derived from the body alone.
+        """
+        return data
+
+    def select_fields(self, data):
+        """
+        Return the fields of the response to send, all by default.
+        """
+        return data
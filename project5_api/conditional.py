@@ -0,0 +1,123 @@
+"""
+Conditional GET support for list and detail views.
+
+Validators are computed before the serializer runs. Detail views
+served from the response cache use the object's version, without a
+query. Lists combine the last change time of the response cache
+namespaces their rows belong to, which the model signals update on every
+recipe, comment, like, profile and follow change, with MAX(updated_at)
+and COUNT(*) over the queryset. The aggregate catches rows inserted or
+deleted without signals, e.g. by bulk inserts or imports, and rows
+changed by other workers, whose stamps a local cache never sees.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_version, last_changed, lookup_pk
+
+
+class ConditionalGetMixin:
+    """
+    Mixin answering GET requests carrying a matching If-None-Match or
+    a recent enough If-Modified-Since with 304 Not Modified, before any
+    serialization work is done.
+    """
+    # Response cache namespaces whose changes affect this view
+    conditional_namespaces = []
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators()
+        return self.conditional(validators) or self.with_validators(
+            super().list(request, *args, **kwargs), validators
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_detail_validators()
+        return self.conditional(validators) or self.with_validators(
+            super().retrieve(request, *args, **kwargs), validators
+        )
+
+    def get_list_validators(self):
+        """
+        Return (etag, last modified seconds) for the list from the
+        filtered queryset and the namespace changes.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.validators_for(queryset)
+
+    def get_detail_validators(self):
+        """
+        Return (etag, last modified seconds) for the requested object,
+        without a query when the view caches its responses.
+        """
+        namespace = getattr(self, 'cache_namespace', None)
+        if namespace is not None:
+            pk = lookup_pk(self)
+            version = get_version(namespace, pk)
+            return self.make_validators([namespace, pk, version], version)
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: pk}
+        )
+        return self.validators_for(queryset)
+
+    def validators_for(self, queryset):
+        """
+        Return validators from the latest modification date and row
+        count of the queryset together with the namespace changes.
+        """
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field), total=Count('pk')
+        )
+        last_modified = stats['last_modified']
+        # Spares page number pagination its own COUNT query
+        self.conditional_count = stats['total']
+        changes = [
+            last_changed(namespace)
+            for namespace in self.conditional_namespaces
+        ]
+        if last_modified is not None:
+            changes.append(int(last_modified.timestamp()) * 10 ** 9)
+        return self.make_validators(
+            [last_modified, stats['total']] + changes, max(changes, default=0)
+        )
+
+    def make_validators(self, parts, nanoseconds):
+        """
+        Hash the given parts with the request details into an ETag.
+        Per-user fields make the ETag depend on the current user.
+        """
+        request = self.request
+        parts += [
+            request.get_full_path(),
+            request.user.pk,
+            request.accepted_renderer.format,
+        ]
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        return f'"{digest}"', nanoseconds // 10 ** 9
+
+    def conditional(self, validators):
+        """
+        Return a 304 response if the client's copy is still current.
+        """
+        etag, last_modified = validators
+        response = get_conditional_response(
+            self.request._request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.with_validators(response, validators)
+        return response
+
+    def with_validators(self, response, validators):
+        etag, last_modified = validators
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            # Responses contain per-user fields
+            response['Cache-Control'] = 'private, no-cache'
+        return response
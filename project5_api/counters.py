@@ -0,0 +1,46 @@
+"""
+Helpers for keeping denormalized counter columns in sync.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class AtomicSaveMixin:
+    """
+    Model mixin that saves inside a transaction, so counters updated
+    by post_save handlers are committed together with the row itself.
+    """
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+def adjust_counter(queryset, field, amount=1):
+    """
+    Atomically add amount to a counter column on every row in the queryset
+    using an F-expression, so concurrent updates are never lost.
+    """
+    if amount:
+        queryset.update(**{field: F(field) + amount})
+
+
+def count_subquery(counted_model, lookup, outer_field):
+    """
+    Return an expression counting the rows of counted_model
+    whose lookup field matches outer_field on the outer row.
+    """
+    rows = counted_model.objects.filter(
+        **{lookup: OuterRef(outer_field)}
+    ).order_by().values(lookup).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
+
+
+def recount(queryset, field, counted_model, lookup, outer_field='pk'):
+    """
+    Set a counter column on every row in the queryset to the actual
+    count in one statement, for bulk changes that send no signals.
+    """
+    queryset.update(
+        **{field: count_subquery(counted_model, lookup, outer_field)}
+    )
@@ -0,0 +1,59 @@
+"""
+Health checks for persistent database connections.
+
+With DB_CONN_MAX_AGE set, connections outlive the request that opened
+them, and one the server has since dropped, e.g. on a database or
+pgbouncer restart, would fail the next request's first query. When a
+database has CONN_HEALTH_CHECKS enabled, its open connections are
+checked once per request, when the request first uses them, and
+reopened if they are no longer usable, as Django 4.1 does natively.
+Requests that never touch a connection do not check it.
+"""
+from functools import partial
+
+from django.core.signals import request_started
+from django.db import close_old_connections, connections
+
+
+def ensure_healthy_connection(connection):
+    """
+    Close the connection if it fails its health check, then connect as
+    `ensure_connection` does. Only the first use after a request starts
+    is checked.
+    """
+    del connection.ensure_connection
+    if (
+        connection.connection is not None
+        and not connection.in_atomic_block
+        and not connection.is_usable()
+    ):
+        connection.close()
+    connection.ensure_connection()
+
+
+def check_connections(**kwargs):
+    """
+    Check the open connections with health checks enabled on their next
+    use, so they are reopened if they are no longer usable.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            # Cursors and atomic blocks connect through ensure_connection
+            connection.ensure_connection = partial(
+                ensure_healthy_connection, connection
+            )
+
+
+def start_connections():
+    """
+    Prepare the connections of the current thread for a new request.
+    """
+    close_old_connections()
+    check_connections()
+
+
+def connect_signals():
+    request_started.connect(check_connections)
@@ -0,0 +1,203 @@
+"""
+Background processing of uploaded images.
+
+Views using `ImageUploadMixin` keep the uploaded file out of the
+request's save and hand it to a worker pool once the transaction
+commits. A worker strips the EXIF data, renders the IMAGE_VARIANTS
+sizes, writes them to the model field's storage and saves their names,
+pointing the image field itself at the largest variant. The names are
+kept in a JSON field named after the image field with a `_variants`
+suffix. IMAGE_WORKERS = 0 processes uploads in the request instead,
+which tests rely on.
+
+Image URLs are built by `image_url`, memoized per stored name and
+variant, so serializing a page of rows does not run the storage
+backend's URL building for every image. Images without processed
+variants are resized by Cloudinary URL transformations instead.
+"""
+import io
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+# WebP when Pillow is built with it, JPEG otherwise
+VARIANT_FORMAT, VARIANT_EXTENSION = (
+    ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+)
+VARIANT_QUALITY = 80
+URL_CACHE_SIZE = 8192
+# Storage that can resize images through URL transformations
+CLOUDINARY_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='images'
+        )
+    return _executor
+
+
+def render_variants(data):
+    """
+    Return the encoded bytes of each variant of the image data, resized
+    to fit within its IMAGE_VARIANTS size and without EXIF data.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        # Apply the EXIF orientation before the EXIF data is dropped
+        image = ImageOps.exif_transpose(original)
+        if VARIANT_FORMAT == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+    variants = {}
+    for name, size in settings.IMAGE_VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail((size, size))
+        output = io.BytesIO()
+        variant.save(output, VARIANT_FORMAT, quality=VARIANT_QUALITY)
+        variants[name] = output.getvalue()
+    return variants
+
+
+def process_image(model, pk, field_name, data):
+    """
+    Render and store the variants of an uploaded image, then save their
+    names on the instance. Uploads for deleted instances are dropped.
+    """
+    field = model._meta.get_field(field_name)
+    prefix = f'{field.upload_to}{uuid.uuid4().hex}'
+    names = {
+        name: field.storage.save(
+            f'{prefix}-{name}.{VARIANT_EXTENSION}', ContentFile(content)
+        )
+        for name, content in render_variants(data).items()
+    }
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    largest = max(names, key=settings.IMAGE_VARIANTS.get)
+    setattr(instance, field_name, names[largest])
+    setattr(instance, f'{field_name}_variants', names)
+    # Saving sends post_save, which drops the cached responses
+    instance.save(update_fields=[
+        field_name, f'{field_name}_variants', 'updated_at'
+    ])
+
+
+def run_in_worker(model, pk, field_name, data):
+    try:
+        process_image(model, pk, field_name, data)
+    except Exception:
+        logger.exception('Processing %s %s image failed', model.__name__, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule_image(instance, field_name, upload):
+    """
+    Process the upload for the instance after the current transaction
+    commits, in the worker pool unless IMAGE_WORKERS is 0.
+    """
+    data = upload.read()
+    args = (type(instance), instance.pk, field_name, data)
+    if settings.IMAGE_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(run_in_worker, *args)
+        )
+    else:
+        transaction.on_commit(lambda: process_image(*args))
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def image_url(name, variant=None):
+    """
+    Return the URL of the image stored under name in the default
+    storage, resized to fit the variant's size when one is given and
+    the storage can resize on delivery.
+    """
+    if variant is None or settings.DEFAULT_FILE_STORAGE != CLOUDINARY_STORAGE:
+        return default_storage.url(name)
+    from cloudinary import CloudinaryResource
+
+    size = settings.IMAGE_VARIANTS[variant]
+    return CloudinaryResource(
+        default_storage._prepend_prefix(name), default_resource_type='image'
+    ).build_url(width=size, height=size, crop='limit')
+
+
+def clear_image_urls(setting, **kwargs):
+    if setting in ('DEFAULT_FILE_STORAGE', 'MEDIA_URL', 'IMAGE_VARIANTS'):
+        image_url.cache_clear()
+
+
+setting_changed.connect(clear_image_urls)
+
+
+def image_variant_urls(instance, field_name='image'):
+    """
+    Return the URL of each variant of the instance's image, from the
+    processed variants when available.
+    """
+    image = getattr(instance, field_name)
+    if not image:
+        return {}
+    processed = getattr(instance, f'{field_name}_variants') or {}
+    return {
+        variant:
+        image_url(processed[variant]) if variant in processed
+        else image_url(image.name, variant)
+        for variant in settings.IMAGE_VARIANTS
+    }
+
+
+class ImageURLField(serializers.ImageField):
+    """
+    Image field serializing the URL from `image_url`.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = image_url(value.name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class ImageUploadMixin:
+    """
+    View mixin saving instances without the uploaded `image_fields`
+    and processing the uploads in the background. Clearing an image
+    also clears its variants.
+    """
+    image_fields = ['image']
+
+    def save_with_images(self, serializer, **kwargs):
+        uploads = {}
+        for name in self.image_fields:
+            if name not in serializer.validated_data:
+                continue
+            if serializer.validated_data[name]:
+                uploads[name] = serializer.validated_data.pop(name)
+            else:
+                kwargs[f'{name}_variants'] = {}
+        instance = serializer.save(**kwargs)
+        for name, upload in uploads.items():
+            schedule_image(instance, name, upload)
+        return instance
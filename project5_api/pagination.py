@@ -0,0 +1,215 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Pagination that keeps the default page numbers, but switches to
+    keyset (seek) pagination when the request includes a `cursor`
+    query parameter. Send an empty `cursor=` to get the first page.
+
+    In keyset mode each page is fetched with a WHERE clause on the
+    ordering columns instead of an OFFSET, no COUNT query is issued
+    and the response holds opaque `next` and `previous` cursors.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+    # Use keyset pagination even without a `cursor` parameter
+    keyset_only = False
+    # Must end with a unique field so every row has a distinct position,
+    # views may override it with a `keyset_ordering` attribute
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = (
+            self.keyset_only
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.use_keyset:
+            self.known_count = getattr(view, 'conditional_count', None)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.model = queryset.model
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Reading backwards, the extra row tells us about earlier pages
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (
+            position is not None if not reverse else has_more
+        )
+        self.first_item = results[0] if results else None
+        self.last_item = results[-1] if results else None
+        return results
+
+    def django_paginator_class(self, object_list, per_page):
+        """
+        Return the page number paginator, reusing the row count the view
+        already took for its conditional GET validators.
+        """
+        paginator = DjangoPaginator(object_list, per_page)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last_item is None:
+            return None
+        return self.encode_cursor(self.last_item, reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_keyset:
+            return super().get_previous_link()
+        if not self.has_previous or self.first_item is None:
+            return None
+        return self.encode_cursor(self.first_item, reverse=True)
+
+    def get_html_context(self):
+        if not self.use_keyset:
+            return super().get_html_context()
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+        }
+
+    @staticmethod
+    def invert(field):
+        """
+        Return the ordering expression for the opposite direction.
+        """
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def seek(ordering, position):
+        """
+        Build a filter that selects rows positioned after the given
+        values, e.g. `a <= x AND (a < x OR (a = x AND b < y))` for
+        `-a, -b`. The leading bound lets the database seek the index.
+        """
+        first = ordering[0]
+        bound_lookup = 'lte' if first.startswith('-') else 'gte'
+        bound = Q(**{f"{first.lstrip('-')}__{bound_lookup}": position[0]})
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                previous.lstrip('-'): value
+                for previous, value in zip(ordering[:index], position)
+            }
+            conditions.append(
+                Q(**equal, **{f'{name}__{lookup}': position[index]})
+            )
+        return bound & reduce(or_, conditions)
+
+    def encode_cursor(self, item, reverse):
+        """
+        Return a URL with an opaque cursor pointing at the given item.
+        """
+        values = [
+            getattr(item, field.lstrip('-')) for field in self.ordering
+        ]
+        payload = json.dumps({'p': values, 'r': reverse}, default=str)
+        cursor = urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Return the (position, reverse) pair stored in the request cursor.
+        An empty cursor starts from the first page.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            values = payload['p']
+            reverse = bool(payload['r'])
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.to_python(field.lstrip('-'), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def to_python(self, name, value):
+        """
+        Convert a cursor value back using the model field when possible.
+        """
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+
+class KeysetOnlyPagination(KeysetPagination):
+    """
+    Keyset pagination for endpoints without page numbers. Requests
+    without a `cursor` parameter get the first page.
+    """
+    keyset_only = True
+
+
+class OrderedKeysetMixin:
+    """
+    Mixin for views with an ordering filter, paging keyset requests in
+    the requested order instead of the pagination's default one.
+    `keyset_orderings` maps each field that may be ordered by to the
+    columns of its keyset, which must end with a unique one.
+    """
+    keyset_orderings = {}
+
+    @property
+    def keyset_ordering(self):
+        ordering = self.request.query_params.get(
+            api_settings.ORDERING_PARAM, ''
+        )
+        field = ordering.lstrip('-')
+        if field not in self.keyset_orderings:
+            return KeysetPagination.ordering
+        if ordering.startswith('-'):
+            return tuple(f'-{name}' for name in self.keyset_orderings[field])
+        return self.keyset_orderings[field]
@@ -0,0 +1,171 @@
+"""
+Per-request SQL instrumentation and query budgets.
+
+`QueryStatsMiddleware` records the number of queries, their total time
+and the statements run more than once during each request. It sends
+them in a `Server-Timing` header and logs them to the
+`project5_api.queries` logger. Views declare the most queries a request
+may run in `query_budget`, an int or a dict by viewset action or HTTP
+method. Going over the budget, or repeating a statement, usually means
+an N+1 pattern. Both are logged as warnings, and with
+QUERY_BUDGET_RAISE, which the test runner enables, going over the
+budget raises QueryBudgetExceeded.
+
+Queries are recorded by an execute wrapper added to every connection,
+which reports to the recorder of the current context, so queries run
+on the async view threads are counted too.
+"""
+import asyncio
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.test.runner import DiscoverRunner
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+_recorder = contextvars.ContextVar('query_recorder', default=None)
+
+# Literals left in statements, so repeats with other values match
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """
+    Collects the statements and time of the queries of one request.
+    """
+    def __init__(self):
+        self.statements = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.statements.append(sql)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def duplicates(self):
+        """
+        Return the statements run more than once with their counts.
+        """
+        counts = Counter(LITERALS.sub('?', sql) for sql in self.statements)
+        return {sql: count for sql, count in counts.items() if count > 1}
+
+
+def record_current(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def add_recorder(sender, connection, **kwargs):
+    # Sent on every reconnection of the same connection object
+    if record_current not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_current)
+
+
+def connect_signals():
+    connection_created.connect(add_recorder)
+
+
+@contextmanager
+def record_queries():
+    """
+    Record the queries run in the block, e.g. in tests.
+    """
+    recorder = QueryRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def get_query_budget(request):
+    """
+    Return the query budget of the view serving the request, or None.
+    """
+    match = getattr(request, 'resolver_match', None)
+    view = getattr(match and match.func, 'cls', None)
+    budget = getattr(view, 'query_budget', None)
+    if isinstance(budget, dict):
+        method = request.method.lower()
+        action = getattr(match.func, 'actions', {}).get(method, method)
+        return budget.get(action)
+    return budget
+
+
+class QueryStatsMiddleware(MiddlewareMixin):
+    """
+    Middleware recording the queries of each request, reporting them
+    in a Server-Timing header and the log, and checking them against
+    the view's query budget.
+    """
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        duplicates = recorder.duplicates()
+        budget = get_query_budget(request)
+        stats = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'duplicates': duplicates,
+            'budget': budget,
+        }
+        over_budget = budget is not None and recorder.count > budget
+        logger.log(
+            logging.WARNING if over_budget or duplicates else logging.DEBUG,
+            '%s %s: %d queries in %.2fms, %d duplicated, budget %s',
+            request.method, request.path, recorder.count, stats['sql_ms'],
+            sum(duplicates.values()), budget, extra={'query_stats': stats}
+        )
+        if over_budget and settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ran {recorder.count} '
+                f'queries, over its budget of {budget}: '
+                f'{recorder.statements}'
+            )
+        response['Server-Timing'] = (
+            f'db;dur={stats["sql_ms"]};desc="{recorder.count} queries, '
+            f'{sum(duplicates.values())} duplicated"'
+        )
+        return response
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """
+    Test runner failing requests that go over their view's query budget.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_RAISE = True
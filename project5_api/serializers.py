@@ -1,5 +1,7 @@
+from django.conf import settings
 from dj_rest_auth.serializers import UserDetailsSerializer
 from rest_framework import serializers
+from .images import ImageURLField
 
 class CurrentUserSerializer(UserDetailsSerializer):
     """
@@ -7,10 +9,45 @@ class CurrentUserSerializer(UserDetailsSerializer):
     with the current user's details.
     """
     profile_id = serializers.ReadOnlyField(source='profile.id')
-    profile_image = serializers.ReadOnlyField(source='profile.image.url')
+    profile_image = ImageURLField(source='profile.image', read_only=True)
 
     class Meta(UserDetailsSerializer.Meta):
         # Adding extra fields to the default user details
         fields = UserDetailsSerializer.Meta.fields + (
             'profile_id', 'profile_image'
         )
+
+
+def id_list():
+    """
+    Return a field for an optional list of object ids in a bulk request.
+    """
+    return serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.BULK_MAX_ITEMS,
+        default=list,
+    )
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """
+    Base serializer for bulk requests with one list of ids per action
+    in `actions`. Repeated ids are dropped, an id may only appear in
+    one of the lists, and at least one id is required.
+    """
+    actions = ()
+
+    def validate(self, data):
+        seen = set()
+        for action in self.actions:
+            ids = list(dict.fromkeys(data.get(action, [])))
+            repeated = seen.intersection(ids)
+            if repeated:
+                raise serializers.ValidationError(
+                    f'Ids in more than one list: {sorted(repeated)}'
+                )
+            seen.update(ids)
+            data[action] = ids
+        if not seen:
+            raise serializers.ValidationError('No ids given.')
+        return data
@@ -18,6 +18,10 @@ CLOUDINARY_STORAGE = {
 }
 MEDIA_URL = '/media/'
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Keep media on the local filesystem instead, e.g. to work offline
+if 'LOCAL_MEDIA' in os.environ:
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    MEDIA_ROOT = os.environ.get('LOCAL_MEDIA') or 'media'
 
 # Base directory for the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,7 +31,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [(
         'rest_framework.authentication.SessionAuthentication'
         if 'DEV' in os.environ
-        else 'dj_rest_auth.jwt_auth.JWTCookieAuthentication'
+        else 'project5_api.authentication.JWTClaimsCookieAuthentication'
     )],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -60,8 +64,18 @@ JWT_AUTH = {
 
 # Authentication serializers
 REST_AUTH_SERIALIZERS = {
-    'USER_DETAILS_SERIALIZER': 'project5_api.serializers.CurrentUserSerializer'
+    'USER_DETAILS_SERIALIZER': (
+        'project5_api.serializers.CurrentUserSerializer'
+    ),
+    'JWT_TOKEN_CLAIMS_SERIALIZER': (
+        'project5_api.authentication.TokenClaimsSerializer'
+    ),
 }
+# Seconds JWT authentication trusts the cached active and staff status
+# of a user, see project5_api.authentication
+JWT_REVOCATION_CACHE_TTL = int(
+    os.environ.get('JWT_REVOCATION_CACHE_TTL', 30)
+)
 
 # Only allow JSON rendering in production
 if 'DEV' not in os.environ:
@@ -106,16 +120,21 @@ INSTALLED_APPS = [
     'corsheaders',
 
     # Custom apps
+    'project5_api',
     'profiles',
     'recipes',
     'likes',
     'followers',
+    'feeds',
+    'trending',
+    'portability',
 ]
 SITE_ID = 1
 
 # Middleware
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'project5_api.queries.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -167,6 +186,12 @@ TEMPLATES = [
 # WSGI application
 WSGI_APPLICATION = 'project5_api.wsgi.application'
 
+# Under ASGI the read-heavy views run asynchronously on a pool of
+# ASYNC_VIEW_THREADS threads, see project5_api.async_views. Each thread
+# keeps its own database connection for up to DB_CONN_MAX_AGE seconds
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 16))
+
 # Database configuration
 if 'DEV' in os.environ:
     DATABASES = {
@@ -177,8 +202,20 @@ if 'DEV' in os.environ:
     }
 else:
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+        'default': dj_database_url.parse(
+            os.environ.get("DATABASE_URL"),
+            conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        )
     }
+    # Reconnect when a reused connection was dropped by the server
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = (
+        os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+    )
+    # Behind pgbouncer in transaction pooling mode, consecutive
+    # transactions of a connection may run on different server
+    # connections, which breaks the server-side cursors of iterator()
+    if os.environ.get('DB_POOL') == 'pgbouncer':
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -220,6 +257,48 @@ STATIC_URL = 'static/'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache: a shared Redis-protocol cache in production,
+# falling back to per-process memory in development and tests
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Number of comments included with each recipe in list responses
+RECIPE_LATEST_COMMENTS = int(os.environ.get('RECIPE_LATEST_COMMENTS', 3))
+
+# Home feed settings: recipes by users with more followers than the
+# threshold are merged into feeds at read time instead of fanned out
+FEED_FANOUT_THRESHOLD = int(os.environ.get('FEED_FANOUT_THRESHOLD', 5000))
+FEED_MAX_LENGTH = int(os.environ.get('FEED_MAX_LENGTH', 500))
+
+# Uploaded images are resized to fit each variant's size in pixels by
+# a pool of IMAGE_WORKERS threads, or in the request when it is 0
+IMAGE_VARIANTS = {'thumb': 160, 'card': 640, 'full': 1600}
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# Largest number of ids accepted by each list of a bulk request
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 500))
+
+# Requests running more queries than their view's query_budget are
+# logged, and fail with QueryBudgetExceeded when QUERY_BUDGET_RAISE is
+# set, as it is in tests. See project5_api.queries
+QUERY_BUDGET_RAISE = os.environ.get('QUERY_BUDGET_RAISE') == '1'
+TEST_RUNNER = 'project5_api.queries.QueryBudgetTestRunner'
+
+# Number of rows read from the database at a time by NDJSON exports
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
 # dj-rest-auth registration settings
 ACCOUNT_EMAIL_VERIFICATION = 'none'
 ACCOUNT_EMAIL_REQUIRED = False
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Sparse fieldsets and field expansion.
+
+`?fields=id,title` limits a response to the listed fields, and
+`?expand=comments` adds the nested representations a serializer offers
+in `expandable_fields`. Views pass both to their serializer, and use
+`field_requested` to skip the columns, annotations and prefetches that
+only unrequested fields need.
+"""
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_list(value):
+    """
+    Return the set of names in a comma separated query parameter.
+    """
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def only_requested(queryset, fields, required=('id',), columns=None):
+    """
+    Defer the concrete columns of the queryset's model that are not
+    needed for the requested fields, keeping the required ones, the
+    relations followed by `select_related` and the columns `columns`
+    maps requested fields to, for fields not named after a column.
+    """
+    if fields is None:
+        return queryset
+    names = set(required)
+    if isinstance(queryset.query.select_related, dict):
+        names.update(queryset.query.select_related)
+    for name in fields & set(columns or {}):
+        names.update(columns[name])
+    for field in queryset.model._meta.concrete_fields:
+        if field.name in fields or field.attname in fields:
+            names.add(field.name)
+    return queryset.only(*names)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer mixin accepting `fields` and `expand` keyword arguments.
+    Fields missing from `fields` are dropped before serialization, and
+    each expanded name maps to a (serializer path, options) pair in
+    `expandable_fields`, replacing any field of the same name.
+    `field_columns` names the columns read by fields that are not
+    named after one, for views to pass to `only_requested`.
+    """
+    expandable_fields = {}
+    field_columns = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.expanded_fields = set(expand or ()) & set(self.expandable_fields)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expanded_fields:
+            path, options = self.expandable_fields[name]
+            fields[name] = import_string(path)(read_only=True, **options)
+        if self.requested_fields is not None:
+            keep = self.requested_fields | self.expanded_fields
+            for name in set(fields) - keep:
+                del fields[name]
+        return fields
+
+
+class SparseFieldsMixin:
+    """
+    View mixin reading `fields` and `expand` from the query string of
+    safe requests and passing them to the serializer. Writes always
+    use every field, so input validation is not affected.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_requested_fields(self):
+        """
+        Return the set of requested fields, or None for every field.
+        """
+        value = self.request.query_params.get(self.fields_query_param)
+        if self.request.method not in SAFE_METHODS or not value:
+            return None
+        return parse_field_list(value)
+
+    def get_expanded_fields(self):
+        """
+        Return the set of fields to expand.
+        """
+        value = self.request.query_params.get(self.expand_query_param)
+        if self.request.method not in SAFE_METHODS or not value:
+            return set()
+        return parse_field_list(value)
+
+    def field_requested(self, *names):
+        """
+        Return whether any of the given fields will be serialized.
+        """
+        fields = self.get_requested_fields()
+        if fields is None:
+            return True
+        return bool((fields | self.get_expanded_fields()) & set(names))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        kwargs.setdefault('expand', self.get_expanded_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def select_fields(self, data):
+        """
+        Limit already serialized data to the requested fields.
+        """
+        fields = self.get_requested_fields()
+        if fields is None:
+            return data
+        return {name: value for name, value in data.items() if name in fields}
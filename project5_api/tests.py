@@ -0,0 +1,282 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from asgiref.sync import async_to_sync
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+from recipes.models import Comment, Recipe
+from recipes.views import RecipeViewSet
+from .async_views import async_patterns, async_view, run_concurrently
+from .authentication import (
+    JWTClaimsCookieAuthentication, TokenClaimsSerializer
+)
+from .db import start_connections
+from .queries import QueryBudgetExceeded, record_queries
+from .serializers import CurrentUserSerializer
+
+
+class AsyncViewTests(TransactionTestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        Recipe.objects.create(
+            owner=self.adam,
+            title='Pancakes',
+            short_description='Fluffy',
+            ingredients='Flour, Milk',
+            steps='Mix, Fry',
+        )
+
+    def test_async_view_renders_in_the_pool(self):
+        view = async_view(RecipeViewSet.as_view({'get': 'list'}))
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        response = async_to_sync(view)(APIRequestFactory().get('/recipes/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_rendered)
+        self.assertIn(b'Pancakes', response.content)
+
+    def test_async_patterns_only_when_enabled(self):
+        patterns = [path('recipes/', RecipeViewSet.as_view({'get': 'list'}))]
+        self.assertIs(async_patterns(patterns), patterns)
+        with override_settings(ASYNC_VIEWS=True):
+            wrapped = async_patterns(patterns)
+        self.assertTrue(asyncio.iscoroutinefunction(wrapped[0].callback))
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_run_concurrently_uses_separate_threads(self):
+        def query():
+            return threading.current_thread(), Recipe.objects.count()
+
+        results = run_concurrently(query, query)
+        self.assertEqual([count for _, count in results], [1, 1])
+        self.assertNotIn(threading.current_thread(), [
+            thread for thread, _ in results
+        ])
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_run_concurrently_inside_a_transaction(self):
+        with transaction.atomic():
+            Recipe.objects.all().delete()
+            results = run_concurrently(Recipe.objects.count)
+        self.assertEqual(results, [0])
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_run_concurrently_records_queries(self):
+        with record_queries() as recorder:
+            run_concurrently(Recipe.objects.count, Recipe.objects.exists)
+        self.assertEqual(recorder.count, 2)
+
+
+class ConnectionHealthCheckTests(TransactionTestCase):
+    def setUp(self):
+        connection.ensure_connection()
+        # A persistent connection with health checks
+        persistent = {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True}
+        patcher = mock.patch.dict(connection.settings_dict, persistent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.close_at = None
+        connection.errors_occurred = False
+
+    def tearDown(self):
+        connection.__dict__.pop('ensure_connection', None)
+
+    def query(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_broken_connection_is_closed_on_first_use(self):
+        with mock.patch.object(connection, 'is_usable', return_value=False):
+            with mock.patch.object(connection, 'close') as close:
+                start_connections()
+                close.assert_not_called()
+                self.query()
+        close.assert_called_once()
+
+    def test_usable_connection_is_kept(self):
+        with mock.patch.object(connection, 'close') as close:
+            start_connections()
+            self.query()
+        close.assert_not_called()
+
+    def test_checked_once_per_request_on_use(self):
+        with mock.patch.object(
+            connection, 'is_usable', return_value=True
+        ) as is_usable:
+            start_connections()
+            is_usable.assert_not_called()
+            self.query()
+            self.query()
+            with transaction.atomic():
+                self.query()
+        is_usable.assert_called_once()
+
+
+class QueryBudgetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.recipes = [
+            Recipe.objects.create(
+                owner=self.user,
+                title=f'Recipe {index}',
+                short_description='Recipe',
+                ingredients='Flour, Water',
+                steps='Mix, Bake',
+            )
+            for index in range(2)
+        ]
+
+    def test_server_timing_header(self):
+        response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[0-9.]+;desc="[1-9][0-9]* queries, 0 duplicated"$'
+        )
+
+    def test_duplicate_queries(self):
+        with record_queries() as recorder:
+            for recipe in self.recipes:
+                Recipe.objects.get(pk=recipe.pk)
+            Recipe.objects.count()
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(list(recorder.duplicates().values()), [2])
+
+    def test_exceeding_budget_fails(self):
+        with mock.patch.object(RecipeViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/recipes/')
+            with self.assertLogs('project5_api.queries', 'WARNING'):
+                with override_settings(QUERY_BUDGET_RAISE=False):
+                    response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@mock.patch.object(
+    APIView, 'authentication_classes', [JWTClaimsCookieAuthentication]
+)
+class JWTClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='adam', password='pass', email='adam@example.com'
+        )
+        self.recipe = Recipe.objects.create(
+            owner=self.user,
+            title='Bread',
+            short_description='Bread',
+            ingredients='Flour, Water',
+            steps='Mix, Bake',
+        )
+        token = TokenClaimsSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self, queries):
+        return [
+            query['sql'] for query in queries
+            if 'FROM "auth_user" WHERE' in query['sql']
+        ]
+
+    def test_token_claims(self):
+        token = TokenClaimsSerializer.get_token(self.user)
+        self.assertNotIn('username', token)
+        self.assertEqual(token['profile_id'], self.user.profile.pk)
+
+    def test_user_from_claims_without_user_query(self):
+        self.client.get('/recipes/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user_queries(queries), [])
+
+    def test_other_fields_load_lazily(self):
+        request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=self.client._credentials[
+                'HTTP_AUTHORIZATION'
+            ]
+        )
+        user, _ = JWTClaimsCookieAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            self.assertEqual(user, self.user)
+            self.assertEqual(user.username, 'adam')
+            self.assertEqual(user.profile.pk, self.user.profile.pk)
+            self.assertTrue(user.is_active)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'adam@example.com')
+            self.assertEqual(user.first_name, '')
+            self.assertEqual(user.profile.image, self.user.profile.image)
+
+    def test_current_user_in_one_query(self):
+        self.client.get('/dj-rest-auth/user/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/dj-rest-auth/user/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data), set(CurrentUserSerializer.Meta.fields)
+        )
+        self.assertEqual(response.data['email'], 'adam@example.com')
+        self.assertEqual(response.data['profile_id'], self.user.profile.pk)
+
+    def test_create_as_token_user(self):
+        response = self.client.post('/recipes/', {
+            'title': 'Soup',
+            'short_description': 'Soup',
+            'ingredients': 'Water, Salt',
+            'steps': 'Boil',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Recipe.objects.get(pk=response.data['id']).owner, self.user
+        )
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/recipes/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_renamed_user_keeps_ownership(self):
+        Comment.objects.create(
+            owner=self.user, recipe=self.recipe, content='Tasty'
+        )
+        profile_path = f'/profiles/{self.user.profile.pk}/'
+        recipe_path = f'/recipes/{self.recipe.pk}/'
+        self.client.get(profile_path)
+        self.client.get(recipe_path)
+        self.user.username = 'adam2'
+        self.user.save()
+
+        response = self.client.get(profile_path)
+        self.assertEqual(response.data['owner'], 'adam2')
+        self.assertTrue(response.data['is_owner'])
+        response = self.client.get(recipe_path)
+        self.assertTrue(response.data['comments'][0]['is_owner'])
+        response = self.client.post('/recipes/', {
+            'title': 'Soup',
+            'short_description': 'Soup',
+            'ingredients': 'Water, Salt',
+            'steps': 'Boil',
+        })
+        self.assertEqual(response.data['owner'], 'adam2')
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_claims_loads_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.user_queries(queries)), 1)
@@ -1,14 +1,19 @@
 """
 URL configuration for project5_api project.
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from .views import root_route
+from .views import root_route, response_cache_stats
 
 urlpatterns = [
     # Root route for welcome message
     path('', root_route),
 
+    # Response cache hit/miss statistics for admins
+    path('cache-stats/', response_cache_stats),
+
     # Admin panel
     path('admin/', admin.site.urls),
 
@@ -25,4 +30,11 @@ urlpatterns = [
     path('', include('likes.urls')),
     path('', include('profiles.urls')),
     path('', include('followers.urls')),
+    path('', include('feeds.urls')),
+    path('', include('trending.urls')),
+    path('', include('portability.urls')),
 ]
+
+# Serve media from the local filesystem storage during development
+if settings.MEDIA_ROOT:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,9 +1,20 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from .cache import cache_stats
 
 
 @api_view()
 def root_route(request):
     return Response({
         "message": "Welcome to Foorky API!"
-    })
\ No newline at end of file
+    })
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """
+    Report the hit and miss counts of the response cache.
+    """
+    return Response(cache_stats())
@@ -0,0 +1,80 @@
+"""
+Structured ingredient index for recipes.
+
+The free-text `Recipe.ingredients` field is parsed into normalized
+ingredient names, stored once in the Ingredient table and linked to
+recipes through RecipeIngredient, which acts as an inverted index
+from ingredient to recipe.
+"""
+import re
+
+MAX_NAME_LENGTH = 100
+
+# Leading quantities and units dropped from ingredient entries
+QUANTITY = re.compile(r'^[\d\s/.,½¼¾-]+')
+UNITS = {
+    'g', 'gram', 'grams', 'kg', 'ml', 'l', 'litre', 'litres', 'liter',
+    'liters', 'tsp', 'teaspoon', 'teaspoons', 'tbsp', 'tablespoon',
+    'tablespoons', 'cup', 'cups', 'oz', 'lb', 'lbs', 'pinch', 'clove',
+    'cloves', 'can', 'cans', 'of',
+}
+
+
+def normalize_ingredient(entry):
+    """
+    Return the normalized name of a single ingredient entry, e.g.
+    '2 cups  Plain Flour.' becomes 'plain flour'.
+    """
+    name = QUANTITY.sub('', entry.strip().lower())
+    words = re.findall(r'[^\W\d_]+', name)
+    while words and words[0] in UNITS:
+        words.pop(0)
+    return ' '.join(words)[:MAX_NAME_LENGTH]
+
+
+def parse_ingredients(text):
+    """
+    Split comma or newline separated ingredients into a sorted list
+    of unique normalized names.
+    """
+    names = {
+        normalize_ingredient(entry) for entry in re.split(r'[,;\n]', text)
+    }
+    names.discard('')
+    return sorted(names)
+
+
+def index_ingredients(recipes, new=False):
+    """
+    Rebuild the ingredient index entries and ingredient counts of the
+    given recipes with a fixed number of bulk queries. Recipes just
+    inserted in bulk are indexed with `new`, skipping the removal of
+    old entries and leaving their counts to `reconcile_counters`.
+    """
+    from .models import Ingredient, Recipe, RecipeIngredient
+
+    parsed = {
+        recipe.pk: parse_ingredients(recipe.ingredients)
+        for recipe in recipes
+    }
+    names = set().union(*parsed.values())
+    Ingredient.objects.bulk_create(
+        [Ingredient(name=name) for name in names], ignore_conflicts=True
+    )
+    ingredient_ids = dict(
+        Ingredient.objects.filter(name__in=names).values_list('name', 'id')
+    )
+
+    if not new:
+        RecipeIngredient.objects.filter(recipe_id__in=parsed).delete()
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_ids[name])
+        for recipe_id, recipe_names in parsed.items()
+        for name in recipe_names
+    ], ignore_conflicts=new)
+    if new:
+        return
+
+    for recipe in recipes:
+        recipe.ingredients_count = len(parsed[recipe.pk])
+    Recipe.objects.bulk_update(recipes, ['ingredients_count'])
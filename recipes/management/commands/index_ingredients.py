@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.ingredients import index_ingredients
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Parse the ingredients of every recipe and rebuild
+    the structured ingredient index in batches.
+    """
+    help = 'Backfill the ingredient index from recipe ingredients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of recipes indexed per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipes = Recipe.objects.only('id', 'ingredients').order_by('id')
+        total = 0
+        batch = []
+        for recipe in recipes.iterator(chunk_size=batch_size):
+            batch.append(recipe)
+            if len(batch) == batch_size:
+                total += self.index_batch(batch)
+                batch = []
+        if batch:
+            total += self.index_batch(batch)
+        self.stdout.write(f'Indexed ingredients of {total} recipes.')
+
+    def index_batch(self, recipes):
+        with transaction.atomic():
+            index_ingredients(recipes)
+        return len(recipes)
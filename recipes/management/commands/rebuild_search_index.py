@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from recipes.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text recipe search index from the recipes table.
+    """
+    help = 'Rebuild the full-text search index for recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to rebuild the index on.'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        backend = get_search_backend(connection)
+        if backend is None:
+            self.stdout.write(
+                f'No full-text search backend for {connection.vendor}.'
+            )
+            return
+        with transaction.atomic(using=options['database']):
+            backend.rebuild()
+        self.stdout.write('Recipe search index rebuilt.')
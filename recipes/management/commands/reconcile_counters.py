@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from feeds.models import FeedEntry
+from followers.models import Follower
+from likes.models import Like
+from profiles.models import Profile
+from project5_api.cache import bump_namespace
+from project5_api.counters import count_subquery
+from recipes.models import Recipe, Comment, RecipeIngredient
+
+
+# (model, counter field, counted model, lookup, outer field)
+COUNTERS = [
+    (Recipe, 'likes_count', Like, 'recipe', 'pk'),
+    (Recipe, 'comments_count', Comment, 'recipe', 'pk'),
+    (Recipe, 'ingredients_count', RecipeIngredient, 'recipe', 'pk'),
+    (Profile, 'recipes_count', Recipe, 'owner', 'owner_id'),
+    (Profile, 'followers_count', Follower, 'followed', 'owner_id'),
+    (Profile, 'following_count', Follower, 'owner', 'owner_id'),
+    (Profile, 'feed_length', FeedEntry, 'owner', 'owner_id'),
+]
+# Response cache namespaces of the models with counters
+NAMESPACES = {Recipe: 'recipe', Profile: 'profile'}
+
+
+class Command(BaseCommand):
+    """
+    Recompute the stored like, comment, ingredient, recipe, follower
+    and feed length counters and fix any rows that have drifted from
+    the real counts. Migrations backfill the counters of existing rows,
+    so this only needs running by hand, e.g. after bulk changes that
+    sent no signals.
+    """
+    help = 'Reconcile denormalized counters with the actual row counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted rows without updating them.'
+        )
+
+    def handle(self, *args, **options):
+        updated = set()
+        for model, field, counted_model, lookup, outer_field in COUNTERS:
+            expression = count_subquery(counted_model, lookup, outer_field)
+            with transaction.atomic():
+                drifted = model.objects.exclude(**{field: expression})
+                drift_count = drifted.count()
+                if drift_count and not options['dry_run']:
+                    drifted.update(**{field: expression})
+                    updated.add(NAMESPACES[model])
+            self.stdout.write(
+                f'{model.__name__}.{field}: {drift_count} drifted rows'
+            )
+        # The updates sent no signals to drop cached responses
+        for namespace in sorted(updated):
+            bump_namespace(namespace)
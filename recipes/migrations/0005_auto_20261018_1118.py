@@ -0,0 +1,23 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_recipe_cook_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from recipes.search import get_search_backend
+
+
+def create_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    if backend is not None:
+        backend.create()
+
+
+def drop_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    if backend is not None:
+        backend.drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_auto_20261018_1119'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from recipes.ingredients import parse_ingredients
+
+BATCH_SIZE = 500
+
+
+def backfill_ingredients(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+
+    recipes = Recipe.objects.only('id', 'ingredients').order_by('id')
+    batch = []
+    for recipe in recipes.iterator(chunk_size=BATCH_SIZE):
+        batch.append(recipe)
+        if len(batch) < BATCH_SIZE:
+            continue
+        index_batch(batch, Recipe, Ingredient, RecipeIngredient)
+        batch = []
+    if batch:
+        index_batch(batch, Recipe, Ingredient, RecipeIngredient)
+
+
+def index_batch(recipes, Recipe, Ingredient, RecipeIngredient):
+    parsed = {
+        recipe.pk: parse_ingredients(recipe.ingredients)
+        for recipe in recipes
+    }
+    names = set().union(*parsed.values())
+    Ingredient.objects.bulk_create(
+        [Ingredient(name=name) for name in names], ignore_conflicts=True
+    )
+    ingredient_ids = dict(
+        Ingredient.objects.filter(name__in=names).values_list('name', 'id')
+    )
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_ids[name])
+        for recipe_id, recipe_names in parsed.items()
+        for name in recipe_names
+    ], ignore_conflicts=True)
+    for recipe in recipes:
+        recipe.ingredients_count = len(parsed[recipe.pk])
+    Recipe.objects.bulk_update(recipes, ['ingredients_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_entries', to='recipes.ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_entries', to='recipes.recipe')),
+            ],
+            options={
+                'unique_together': {('ingredient', 'recipe')},
+            },
+        ),
+        migrations.RunPython(
+            backfill_ingredients, migrations.RunPython.noop
+        ),
+    ]
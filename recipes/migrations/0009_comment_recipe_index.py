@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['recipe', 'created_at', 'id'], name='recipes_com_recipe__0ee745_idx'),
+        ),
+    ]
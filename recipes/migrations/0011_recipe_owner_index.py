@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='recipes_rec_owner_i_9f36ac_idx'),
+        ),
+    ]
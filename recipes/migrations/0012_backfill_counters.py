@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, lookup, outer_field):
+    rows = model.objects.filter(
+        **{lookup: OuterRef(outer_field)}
+    ).order_by().values(lookup).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Set the stored like and comment counters of every recipe to the
+    real counts, once, for recipes saved before the counters existed.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Comment = apps.get_model('recipes', 'Comment')
+    Like = apps.get_model('likes', 'Like')
+    Recipe.objects.update(
+        likes_count=count_rows(Like, 'recipe', 'pk'),
+        comments_count=count_rows(Comment, 'recipe', 'pk'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_owner_index'),
+        ('likes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,76 @@
-from django.db import models
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import (
+    BooleanField, Exists, OuterRef, Prefetch, Subquery, Value
+)
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from profiles.models import Profile, invalidate_profile_of
+from project5_api.cache import bump_version, bump_versions
+from project5_api.counters import AtomicSaveMixin, adjust_counter
+from .ingredients import index_ingredients
+from .search import get_search_backend
 
-class Recipe(models.Model):
+
+class RecipeQuerySet(models.QuerySet):
+    """
+    QuerySet for recipes with helpers for list and detail serialization.
+    """
+    def with_related_data(self, user, summary=False):
+        """
+        Annotate whether the given user liked each recipe, and load
+        owners, profiles and comments up front so a page of recipes
+        serializes in a fixed number of queries. Summaries only load
+        the latest comments of each recipe into `latest_comments`.
+        """
+        queryset = self.select_related('owner__profile').with_is_liked(user)
+        if summary:
+            return queryset.with_latest_comments()
+        return queryset.with_comments()
+
+    def with_is_liked(self, user):
+        """
+        Annotate whether the given user liked each recipe.
+        """
+        # Imported here as the likes app depends on this module
+        from likes.models import Like
+
+        if user.is_authenticated:
+            is_liked = Exists(
+                Like.objects.filter(recipe=OuterRef('pk'), owner=user)
+            )
+        else:
+            is_liked = Value(False, output_field=BooleanField())
+        return self.annotate(is_liked=is_liked)
+
+    def with_comments(self):
+        """
+        Prefetch every comment of each recipe with its author.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('owner__profile')
+            )
+        )
+
+    def with_latest_comments(self):
+        """
+        Prefetch the latest comments of each recipe into `latest_comments`.
+        """
+        return self.prefetch_related(
+            Prefetch(
+                'comments',
+                queryset=Comment.objects.latest_per_recipe(
+                    settings.RECIPE_LATEST_COMMENTS
+                ).select_related('owner__profile'),
+                to_attr='latest_comments'
+            )
+        )
+
+
+class Recipe(AtomicSaveMixin, models.Model):
     """
     Model representing a recipe, which includes details like 
     title, description, ingredients, steps, cooking time, 
@@ -26,21 +94,51 @@ class Recipe(models.Model):
         default='Easy'
     )
     image = models.ImageField(upload_to='recipes/', null=True, blank=True)
+    # Storage names of the resized variants of the image, by size name
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    ingredients_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Supports keyset pagination over (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            # Supports the recipes of a profile, newest first
+            models.Index(fields=['owner', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return self.title
 
-    @property
-    def likes_count(self):
+
+# Newest first, the order of comment threads and recipe summaries
+COMMENT_ORDERING = ('-created_at', '-id')
+
+
+class CommentQuerySet(models.QuerySet):
+    """
+    QuerySet for comments with helpers for recipe summaries.
+    """
+    def latest_per_recipe(self, count):
         """
-        Returns the number of likes for this recipe.
+        Return only the `count` newest comments of each recipe.
         """
-        return self.likes.count()
-        
+        latest = Comment.objects.filter(
+            recipe=OuterRef('recipe')
+        ).order_by(*COMMENT_ORDERING).values('pk')[:count]
+        return self.filter(pk__in=Subquery(latest)).order_by(
+            *COMMENT_ORDERING
+        )
 
-class Comment(models.Model):
+
+class Comment(AtomicSaveMixin, models.Model):
     """
     Model representing a comment on a recipe.
     Each comment is linked to a recipe and its author (owner).
@@ -55,9 +153,194 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            # Supports the comment threads and latest comments of recipes
+            models.Index(fields=['recipe', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         """
         Return a truncated string representation 
         of the comment (first 20 characters).
         """
         return f'{self.owner} - {self.content[:20]}'
+
+
+class Ingredient(models.Model):
+    """
+    Model representing a normalized ingredient name
+    parsed from the ingredients of recipes.
+    """
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    """
+    Model linking an ingredient to a recipe that uses it.
+    The unique index on (ingredient, recipe) serves as an
+    inverted index for looking up recipes by ingredient.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='ingredient_entries'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='recipe_entries',
+        db_index=False
+    )
+
+    class Meta:
+        unique_together = ['ingredient', 'recipe']
+
+    def __str__(self):
+        return f'{self.recipe} uses {self.ingredient}'
+
+
+# Signals to keep the stored recipe and comment counters in sync
+def increment_recipes_count(sender, instance, created, **kwargs):
+    """
+    Increase the owner's recipes count when a new Recipe is created.
+    """
+    if created:
+        adjust_counter(
+            Profile.objects.filter(owner_id=instance.owner_id),
+            'recipes_count'
+        )
+        invalidate_profile_of(instance.owner_id)
+
+
+def decrement_recipes_count(sender, instance, **kwargs):
+    """
+    Decrease the owner's recipes count when a Recipe is deleted.
+    """
+    adjust_counter(
+        Profile.objects.filter(owner_id=instance.owner_id),
+        'recipes_count', -1
+    )
+    invalidate_profile_of(instance.owner_id)
+
+
+def increment_comments_count(sender, instance, created, **kwargs):
+    """
+    Increase the recipe's comments count when a new Comment is created.
+    """
+    if created:
+        adjust_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'comments_count'
+        )
+
+
+def decrement_comments_count(sender, instance, **kwargs):
+    """
+    Decrease the recipe's comments count when a Comment is deleted.
+    """
+    adjust_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'comments_count', -1
+    )
+
+
+# Signals to drop cached recipe and profile responses on changes
+def invalidate_recipe(sender, instance, **kwargs):
+    """
+    Drop cached responses of a Recipe when it is saved or deleted.
+    """
+    bump_version('recipe', instance.pk)
+
+
+def invalidate_comment_recipe(sender, instance, **kwargs):
+    """
+    Drop cached responses of a recipe when one of its comments
+    is saved or deleted.
+    """
+    bump_version('recipe', instance.recipe_id)
+
+
+def invalidate_recipes_of(user_id):
+    """
+    Drop cached responses of the recipes showing the username or
+    profile image of the given user, as their owner or a commenter.
+    """
+    recipe_ids = set(
+        Recipe.objects.filter(owner_id=user_id).values_list('pk', flat=True)
+    )
+    recipe_ids.update(
+        Comment.objects.filter(owner_id=user_id).values_list(
+            'recipe_id', flat=True
+        )
+    )
+    if recipe_ids:
+        bump_versions('recipe', recipe_ids)
+
+
+def invalidate_user_recipes(sender, instance, created, update_fields=None,
+                            **kwargs):
+    """
+    Drop cached responses of the recipes showing a User's username
+    when it may have changed.
+    """
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_recipes_of(instance.pk)
+
+
+def invalidate_profile_recipes(sender, instance, created, update_fields=None,
+                               **kwargs):
+    """
+    Drop cached responses of the recipes showing a Profile's image
+    when it may have changed.
+    """
+    if not created and (
+        update_fields is None
+        or {'image', 'image_variants'} & set(update_fields)
+    ):
+        invalidate_recipes_of(instance.owner_id)
+
+
+# Signals to keep the full-text search index in sync
+def index_recipe(sender, instance, **kwargs):
+    """
+    Add or refresh the recipe in the search index after it is saved.
+    """
+    backend = get_search_backend(connections[instance._state.db])
+    if backend is not None:
+        backend.index(instance)
+
+
+def index_recipe_ingredients(sender, instance, **kwargs):
+    """
+    Rebuild the ingredient index entries of the recipe after it is saved.
+    """
+    index_ingredients([instance])
+
+
+def unindex_recipe(sender, instance, **kwargs):
+    """
+    Remove the recipe from the search index after it is deleted.
+    """
+    backend = get_search_backend(connections[instance._state.db])
+    if backend is not None:
+        backend.remove(instance.pk)
+
+
+post_save.connect(increment_recipes_count, sender=Recipe)
+post_delete.connect(decrement_recipes_count, sender=Recipe)
+post_save.connect(increment_comments_count, sender=Comment)
+post_delete.connect(decrement_comments_count, sender=Comment)
+post_save.connect(index_recipe, sender=Recipe)
+post_delete.connect(unindex_recipe, sender=Recipe)
+post_save.connect(index_recipe_ingredients, sender=Recipe)
+post_save.connect(invalidate_recipe, sender=Recipe)
+post_delete.connect(invalidate_recipe, sender=Recipe)
+post_save.connect(invalidate_comment_recipe, sender=Comment)
+post_delete.connect(invalidate_comment_recipe, sender=Comment)
+post_save.connect(invalidate_user_recipes, sender=User)
+post_save.connect(invalidate_profile_recipes, sender=Profile)
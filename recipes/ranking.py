@@ -0,0 +1,47 @@
+"""
+Ranking expressions for recipe lists.
+
+The hot ranking uses the log of the likes of a recipe plus its creation
+time divided by HOT_DECAY_SECONDS, so a recipe needs ten times as many
+likes to outrank one posted HOT_DECAY_SECONDS later. Older recipes fall
+behind as newer ones arrive, while the score of a recipe itself only
+changes with its likes, which keeps keyset cursors valid.
+"""
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Cast, Greatest, Log
+
+HOT_DECAY_SECONDS = 45000
+
+
+class Epoch(Func):
+    """
+    Seconds since the Unix epoch of a datetime expression.
+    """
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Julian day number of 1970-01-01T00:00:00
+        return self.as_sql(
+            compiler, connection,
+            template='((julianday(%(expressions)s) - 2440587.5) * 86400.0)',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='UNIX_TIMESTAMP(%(expressions)s)',
+            **extra_context
+        )
+
+
+def hot_score():
+    """
+    Return the expression of the hot score of a recipe.
+    """
+    return Cast(
+        Log(Value(10), Greatest(F('likes_count'), Value(1)))
+        + Epoch('created_at') / Value(HOT_DECAY_SECONDS),
+        FloatField()
+    )
@@ -0,0 +1,201 @@
+"""
+Full-text search for recipes.
+
+Postgres keeps a weighted `search_vector` tsvector column with a GIN
+index on the recipes table, while SQLite keeps an FTS5 shadow table.
+Both are updated incrementally whenever a recipe is saved or deleted,
+and can be rebuilt with the `rebuild_search_index` command.
+"""
+import re
+
+from django.db import connections
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+RECIPE_TABLE = 'recipes_recipe'
+
+
+def search_tokens(terms):
+    """
+    Split search terms into plain word tokens, dropping any characters
+    that have a meaning in the full-text query syntax.
+    """
+    return [
+        token.lower() for term in terms for token in re.findall(r'\w+', term)
+    ]
+
+
+class SqliteSearchBackend:
+    """
+    Search backend using an FTS5 virtual table keyed on the recipe id.
+    """
+    table = 'recipes_recipe_fts'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, short_description, ingredients, "
+                "tokenize = 'porter unicode61', prefix = '2 3')"
+            )
+        self.rebuild()
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table}'
+                '(rowid, title, short_description, ingredients) '
+                'SELECT id, title, short_description, ingredients '
+                f'FROM {RECIPE_TABLE}'
+            )
+
+    def index(self, recipe):
+        self.remove(recipe.pk)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.table}'
+                '(rowid, title, short_description, ingredients) '
+                'VALUES (%s, %s, %s, %s)',
+                [
+                    recipe.pk, recipe.title,
+                    recipe.short_description, recipe.ingredients
+                ]
+            )
+
+    def remove(self, recipe_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [recipe_id]
+            )
+
+    def search(self, queryset, tokens):
+        # Quote every token and allow prefix matches, e.g. "tom"*
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        # Join the FTS table so bm25 is computed in the same pass as the
+        # match; it is lower for better matches and title counts the most
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                f'{self.table}.rowid = {RECIPE_TABLE}.id',
+                f'{self.table} MATCH %s',
+            ],
+            params=[query],
+            select={
+                'search_rank': f'-bm25({self.table}, 10.0, 2.0, 1.0)'
+            },
+        )
+
+
+class PostgresSearchBackend:
+    """
+    Search backend using a weighted tsvector column with a GIN index.
+    """
+    column = 'search_vector'
+    index_name = 'recipes_recipe_search_vector_idx'
+    vector = (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', "
+        "coalesce(short_description, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(ingredients, '')), 'C')"
+    )
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE {RECIPE_TABLE} '
+                f'ADD COLUMN IF NOT EXISTS {self.column} tsvector'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} '
+                f'ON {RECIPE_TABLE} USING GIN ({self.column})'
+            )
+        self.rebuild()
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS {self.index_name}')
+            cursor.execute(
+                f'ALTER TABLE {RECIPE_TABLE} '
+                f'DROP COLUMN IF EXISTS {self.column}'
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {RECIPE_TABLE} SET {self.column} = {self.vector}'
+            )
+
+    def index(self, recipe):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {RECIPE_TABLE} SET {self.column} = {self.vector} '
+                'WHERE id = %s',
+                [recipe.pk]
+            )
+
+    def remove(self, recipe_id):
+        # The vector lives on the recipe row and is deleted with it
+        pass
+
+    def search(self, queryset, tokens):
+        # Require every token and allow prefix matches, e.g. tom:*
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        tsquery = "to_tsquery('english', %s)"
+        return queryset.extra(
+            where=[f'{RECIPE_TABLE}.{self.column} @@ {tsquery}'],
+            params=[query],
+            select={
+                'search_rank':
+                f'ts_rank({RECIPE_TABLE}.{self.column}, {tsquery})'
+            },
+            select_params=[query],
+        )
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SqliteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection=None):
+    """
+    Return the search backend for the connection's database vendor,
+    or None when the vendor has no full-text support here.
+    """
+    if connection is None:
+        connection = connections['default']
+    backend_class = SEARCH_BACKENDS.get(connection.vendor)
+    return backend_class(connection) if backend_class else None
+
+
+class RecipeSearchFilter(filters.SearchFilter):
+    """
+    Search filter answering recipe searches from the full-text index,
+    ranking the best matches first unless an ordering was requested.
+    Falls back to the default `icontains` search on other databases.
+    """
+    def filter_queryset(self, request, queryset, view):
+        backend = get_search_backend(connections[queryset.db])
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return queryset
+
+        queryset = backend.search(queryset, tokens)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by('-search_rank', '-created_at', '-id')
@@ -1,17 +1,30 @@
+from django.conf import settings
+from django.db import models
 from rest_framework import serializers
-from .models import Recipe, Comment
+from .models import COMMENT_ORDERING, Recipe, Comment
 from likes.models import Like
 from profiles.models import Profile
+from project5_api.images import ImageURLField, image_variant_urls
+from project5_api.sparse import SparseFieldsSerializerMixin
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Comment model, 
     including related profile details.
     """
+    expandable_fields = {
+        'owner_profile': (
+            'profiles.serializers.ProfileSerializer',
+            {'source': 'owner.profile'}
+        ),
+    }
+
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = ImageURLField(source='owner.profile.image', read_only=True)
 
     class Meta:
         model = Comment
@@ -28,35 +41,95 @@ class CommentSerializer(serializers.ModelSerializer):
         return request.user == obj.owner
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Recipe model, including 
     related fields like comments and likes count.
     """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: ImageURLField,
+    }
+
     owner = serializers.ReadOnlyField(source='owner.username')
-    likes_count = serializers.SerializerMethodField()
+    likes_count = serializers.ReadOnlyField()
+    comments_count = serializers.ReadOnlyField()
     is_liked = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     comments = CommentSerializer(many=True, read_only=True)
+    field_columns = {'image_variants': ('image', 'image_variants')}
 
     class Meta:
         model = Recipe
         fields = [
             'id', 'owner', 'title', 'short_description', 'ingredients', 
-            'steps', 'cook_time', 'difficulty', 'image', 
-            'created_at', 'updated_at', 'likes_count', 'is_liked', 'comments'
+            'steps', 'cook_time', 'difficulty', 'image', 'image_variants',
+            'created_at', 'updated_at', 'likes_count', 'comments_count',
+            'is_liked', 'comments'
         ]
 
-    def get_likes_count(self, obj):
-        """
-        Return the total number of likes for the recipe.
-        """
-        return obj.likes.count()
-
     def get_is_liked(self, obj):
         """
-        Check if the current user has liked the recipe.
+        Check if the current user has liked the recipe, using the
+        queryset annotation when available.
         """
+        if hasattr(obj, 'is_liked'):
+            return obj.is_liked
         user = self.context['request'].user
         if user.is_authenticated:
             return Like.objects.filter(owner=user, recipe=obj).exists()
         return False
+
+    def get_image_variants(self, obj):
+        """
+        Return the URLs of the resized images, once processed.
+        """
+        return image_variant_urls(obj)
+
+
+class RecipeSummarySerializer(RecipeSerializer):
+    """
+    Serializer for recipes in list responses, including only
+    the latest comments instead of the full comment thread.
+    """
+    expandable_fields = {
+        'comments': ('recipes.serializers.CommentSerializer', {'many': True}),
+    }
+
+    latest_comments = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = [
+            field for field in RecipeSerializer.Meta.fields
+            if field != 'comments'
+        ] + ['latest_comments']
+
+    def get_latest_comments(self, obj):
+        """
+        Serialize the latest comments, using the prefetched
+        `latest_comments` when available.
+        """
+        comments = getattr(obj, 'latest_comments', None)
+        if comments is None:
+            comments = obj.comments.select_related(
+                'owner__profile'
+            ).order_by(*COMMENT_ORDERING)[:settings.RECIPE_LATEST_COMMENTS]
+        return CommentSerializer(
+            comments, many=True, context=self.context
+        ).data
+
+
+class CookWithRecipeSerializer(RecipeSummarySerializer):
+    """
+    Serializer for recipes matched by available ingredients,
+    including how many and what share of their ingredients matched.
+    """
+    matched_ingredients = serializers.ReadOnlyField()
+    coverage = serializers.ReadOnlyField()
+
+    class Meta(RecipeSummarySerializer.Meta):
+        fields = RecipeSummarySerializer.Meta.fields + [
+            'ingredients_count', 'matched_ingredients', 'coverage'
+        ]
@@ -1,8 +1,28 @@
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIRequestFactory
-from .models import Recipe, Comment
+from PIL import Image
+from .ingredients import parse_ingredients
+from .models import Recipe, Comment, RecipeIngredient
+from .serializers import CommentSerializer, RecipeSerializer
+from likes.models import Like
+from followers.models import Follower
 from profiles.models import Profile
+from project5_api.cache import cache_stats
+from project5_api.images import image_url
+from project5_api.pagination import KeysetOnlyPagination
 
 
 class RecipeDetailViewTests(APITestCase):
@@ -107,3 +127,852 @@ class CommentSerializerTests(APITestCase):
 
         # Print output for visual confirmation (optional)
         print(serializer.data)
+
+
+class RecipeListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        commenter = User.objects.create_user(username='brian', password='pass')
+
+        # Create a full page of recipes, each with likes and comments
+        for index in range(10):
+            recipe = Recipe.objects.create(
+                owner=self.user,
+                title=f'Recipe {index}',
+                short_description='A test recipe'
+            )
+            Like.objects.create(owner=commenter, recipe=recipe)
+            for _ in range(20):
+                Comment.objects.create(
+                    owner=commenter, recipe=recipe, content='Tasty'
+                )
+
+    def test_recipe_list_uses_constant_number_of_queries(self):
+        # Count, recipes with annotations, and prefetched comments
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get('/recipes/', {'comments': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len(response.data['results'][0]['comments']), 20)
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+        self.assertFalse(response.data['results'][0]['is_liked'])
+
+    def test_liked_recipe_lists_use_constant_number_of_queries(self):
+        # The liking user sees every recipe flagged as liked
+        commenter = User.objects.get(username='brian')
+        self.client.force_authenticate(user=commenter)
+        with self.assertNumQueries(3):
+            response = self.client.get('/likes/list/')
+        self.assertTrue(
+            all(recipe['is_liked'] for recipe in response.data['results'])
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get('/ranked-liked-recipes/')
+        self.assertEqual(len(response.data['results']), 10)
+
+
+class RecipeSummaryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                owner=self.user,
+                title=f'Recipe {index}',
+                short_description='A test recipe'
+            )
+            for number in range(5):
+                Comment.objects.create(
+                    owner=self.user, recipe=recipe, content=f'Comment {number}'
+                )
+        self.recipe = recipe
+
+    def test_list_includes_latest_comments_only(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/recipes/')
+        for recipe in response.data['results']:
+            self.assertNotIn('comments', recipe)
+            self.assertEqual(recipe['comments_count'], 5)
+            self.assertEqual(
+                [comment['content'] for comment in recipe['latest_comments']],
+                ['Comment 4', 'Comment 3', 'Comment 2']
+            )
+
+    def test_detail_includes_all_comments(self):
+        response = self.client.get(f'/recipes/{self.recipe.pk}/')
+        self.assertEqual(len(response.data['comments']), 5)
+
+    def test_comments_endpoint_is_paginated_with_cursor(self):
+        url = f'/recipes/{self.recipe.pk}/comments/'
+        with mock.patch.object(KeysetOnlyPagination, 'page_size', 2):
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(
+                [comment['content'] for comment in response.data['results']],
+                ['Comment 4', 'Comment 3']
+            )
+            response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [comment['content'] for comment in response.data['results']],
+            ['Comment 2', 'Comment 1']
+        )
+
+    def test_comments_endpoint_for_missing_recipe(self):
+        response = self.client.get('/recipes/999/comments/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comments_endpoint_for_invalid_id(self):
+        response = self.client.get('/recipes/abc/comments/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StoredCounterTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.recipe = Recipe.objects.create(
+            owner=self.adam,
+            title='Test Recipe',
+            short_description='A test recipe'
+        )
+
+    def test_counters_follow_creates_and_deletes(self):
+        like = Like.objects.create(owner=self.brian, recipe=self.recipe)
+        comment = Comment.objects.create(
+            owner=self.brian, recipe=self.recipe, content='Tasty'
+        )
+        follow = Follower.objects.create(owner=self.brian, followed=self.adam)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.likes_count, 1)
+        self.assertEqual(self.recipe.comments_count, 1)
+        self.assertEqual(
+            Profile.objects.get(owner=self.adam).recipes_count, 1
+        )
+        self.assertEqual(
+            Profile.objects.get(owner=self.adam).followers_count, 1
+        )
+        self.assertEqual(
+            Profile.objects.get(owner=self.brian).following_count, 1
+        )
+
+        like.delete()
+        comment.delete()
+        follow.delete()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.likes_count, 0)
+        self.assertEqual(self.recipe.comments_count, 0)
+        self.assertEqual(
+            Profile.objects.get(owner=self.adam).followers_count, 0
+        )
+
+    def test_reconcile_counters_fixes_drift(self):
+        Like.objects.create(owner=self.brian, recipe=self.recipe)
+        Recipe.objects.update(likes_count=42)
+        Profile.objects.update(recipes_count=7)
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.likes_count, 1)
+        self.assertEqual(
+            Profile.objects.get(owner=self.adam).recipes_count, 1
+        )
+        self.assertEqual(
+            Profile.objects.get(owner=self.brian).recipes_count, 0
+        )
+
+    def test_reconcile_counters_drops_cached_responses(self):
+        cache.clear()
+        url = f'/recipes/{self.recipe.pk}/'
+        etag = self.client.get(url)['ETag']
+        Recipe.objects.update(likes_count=42)
+        call_command('reconcile_counters', stdout=StringIO())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['likes_count'], 0)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        for index in range(25):
+            Recipe.objects.create(
+                owner=adam,
+                title=f'Recipe {index}',
+                short_description='A test recipe'
+            )
+        # Give every recipe the same timestamp to exercise the id tiebreak
+        Recipe.objects.update(created_at=Recipe.objects.first().created_at)
+
+    def test_cursor_walks_every_recipe_once_in_both_directions(self):
+        titles = []
+        url = '/recipes/?cursor='
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            titles += [recipe['title'] for recipe in response.data['results']]
+            previous, url = response.data['previous'], response.data['next']
+        self.assertEqual(len(titles), 25)
+        self.assertEqual(len(set(titles)), 25)
+
+        response = self.client.get(previous)
+        self.assertEqual(
+            [recipe['title'] for recipe in response.data['results']],
+            titles[10:20]
+        )
+
+    def test_cursor_page_skips_count_query(self):
+        # The validators' aggregate, the page and the prefetched comments
+        with self.assertNumQueries(3):
+            self.client.get('/recipes/?cursor=')
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get('/recipes/?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_remain_the_default(self):
+        response = self.client.get('/recipes/?page=3')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+
+class RecipeByProfileTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        brian = User.objects.create_user(username='brian', password='pass')
+        for owner, count in [(self.adam, 15), (brian, 5)]:
+            for index in range(count):
+                Recipe.objects.create(
+                    owner=owner,
+                    title=f'{owner.username} {index}',
+                    short_description='A test recipe'
+                )
+        self.url = f'/recipes/by_profile/?profile_id={self.adam.profile.pk}'
+
+    def test_recipes_are_paginated_with_a_cursor(self):
+        titles = []
+        url = self.url
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles += [recipe['title'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(
+            titles, [f'adam {index}' for index in reversed(range(15))]
+        )
+
+    def test_profile_is_resolved_without_a_join(self):
+        # The owner of the profile, the page and its latest comments
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 3)
+        self.assertIn(
+            'WHERE "recipes_recipe"."owner_id" = ', queries[1]['sql']
+        )
+
+    def test_filter_backends_apply(self):
+        response = self.client.get(f'{self.url}&title=adam 3')
+        self.assertEqual(
+            [recipe['title'] for recipe in response.data['results']],
+            ['adam 3']
+        )
+
+    def test_invalid_profiles(self):
+        response = self.client.get('/recipes/by_profile/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/recipes/by_profile/?profile_id=adam')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/recipes/by_profile/?profile_id=999')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeSearchTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        self.soup = Recipe.objects.create(
+            owner=adam,
+            title='Tomato soup',
+            short_description='A warming soup',
+            ingredients='Tomatoes, Onion, Stock'
+        )
+        self.salad = Recipe.objects.create(
+            owner=adam,
+            title='Green salad',
+            short_description='Goes well with tomato soup',
+            ingredients='Lettuce, Cucumber'
+        )
+
+    def search(self, term):
+        response = self.client.get('/recipes/', {'search': term})
+        return [recipe['title'] for recipe in response.data['results']]
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search('tomato'), ['Tomato soup', 'Green salad'])
+
+    def test_search_matches_prefixes(self):
+        self.assertEqual(self.search('lett'), ['Green salad'])
+        self.assertEqual(self.search('cucu lett'), ['Green salad'])
+
+    def test_search_index_follows_saves_and_deletes(self):
+        self.salad.title = 'Cheese board'
+        self.salad.short_description = 'Cheddar and crackers'
+        self.salad.save()
+        self.assertEqual(self.search('tomato'), ['Tomato soup'])
+        self.assertEqual(self.search('cheddar'), ['Cheese board'])
+
+        self.soup.delete()
+        self.assertEqual(self.search('tomato'), [])
+
+    def test_rebuild_search_index(self):
+        Recipe.objects.filter(pk=self.soup.pk).update(title='Pumpkin soup')
+        self.assertEqual(self.search('pumpkin'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('pumpkin'), ['Pumpkin soup'])
+
+
+class IngredientIndexTests(APITestCase):
+    def setUp(self):
+        adam = User.objects.create_user(username='adam', password='pass')
+        self.omelette = Recipe.objects.create(
+            owner=adam,
+            title='Omelette',
+            short_description='Quick eggs',
+            ingredients='3 Eggs, 1 tbsp Butter, Salt'
+        )
+        Recipe.objects.create(
+            owner=adam,
+            title='Pancakes',
+            short_description='Fluffy pancakes',
+            ingredients='Eggs, 2 cups flour, Milk, Butter, Sugar'
+        )
+        Recipe.objects.create(
+            owner=adam,
+            title='Salad',
+            short_description='Green salad',
+            ingredients='Lettuce, Cucumber'
+        )
+
+    def test_parse_ingredients_normalizes_names(self):
+        self.assertEqual(
+            parse_ingredients('2 cups  Plain Flour., eggs,\nEggs, 1/2 tsp salt'),
+            ['eggs', 'plain flour', 'salt']
+        )
+
+    def test_cook_with_ranks_recipes_by_coverage(self):
+        response = self.client.get(
+            '/recipes/cook-with/', {'ingredients': 'eggs, butter, salt'}
+        )
+        results = response.data['results']
+        self.assertEqual(
+            [recipe['title'] for recipe in results], ['Omelette', 'Pancakes']
+        )
+        self.assertEqual(results[0]['coverage'], 1.0)
+        self.assertEqual(results[1]['matched_ingredients'], 2)
+
+    def test_cook_with_cursor_pages_keep_ranking(self):
+        adam = self.omelette.owner
+        for index in range(12):
+            Recipe.objects.create(
+                owner=adam,
+                title=f'Eggs {index}',
+                short_description='Eggs',
+                ingredients=', '.join(['Eggs'] + ['Water'] * (index % 3))
+                + f', Spice {index}'
+            )
+        params = {'ingredients': 'eggs, butter, salt'}
+        ranked = [
+            (recipe['coverage'], recipe['matched_ingredients'], recipe['id'])
+            for recipe in self.client.get(
+                '/recipes/cook-with/', params
+            ).data['results']
+        ]
+        url = '/recipes/cook-with/?ingredients=eggs,butter,salt&cursor='
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages += [
+                (recipe['coverage'], recipe['matched_ingredients'],
+                 recipe['id'])
+                for recipe in response.data['results']
+            ]
+            url = response.data['next']
+        self.assertEqual(len(pages), 14)
+        self.assertEqual(pages[:10], ranked)
+        self.assertEqual(pages, sorted(pages, reverse=True))
+
+    def test_cook_with_unreconciled_ingredients_count(self):
+        Recipe.objects.filter(pk=self.omelette.pk).update(ingredients_count=0)
+        response = self.client.get(
+            '/recipes/cook-with/', {'ingredients': 'eggs'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['title'] for recipe in response.data['results']],
+            ['Pancakes', 'Omelette']
+        )
+        self.assertEqual(response.data['results'][1]['coverage'], 0.0)
+
+    def test_index_follows_ingredient_changes(self):
+        self.omelette.ingredients = 'Lettuce, Tomato'
+        self.omelette.save()
+        response = self.client.get(
+            '/recipes/cook-with/', {'ingredients': 'lettuce'}
+        )
+        self.assertEqual(
+            [recipe['title'] for recipe in response.data['results']],
+            ['Salad', 'Omelette']
+        )
+
+    def test_index_ingredients_command_backfills(self):
+        RecipeIngredient.objects.all().delete()
+        call_command('index_ingredients', stdout=StringIO())
+        self.assertEqual(RecipeIngredient.objects.count(), 10)
+
+
+class RecipeResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.recipe = Recipe.objects.create(
+            owner=self.adam,
+            title='Test Recipe',
+            short_description='A test recipe'
+        )
+        Comment.objects.create(
+            owner=self.brian, recipe=self.recipe, content='Tasty'
+        )
+        self.url = f'/recipes/{self.recipe.pk}/'
+
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['title'], 'Test Recipe')
+        self.assertEqual(cache_stats()['hits'], 1)
+
+    def test_changes_invalidate_cached_response(self):
+        self.client.get(self.url)
+        Like.objects.create(owner=self.brian, recipe=self.recipe)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['likes_count'], 1)
+
+    def test_per_user_fields_are_not_shared(self):
+        Like.objects.create(owner=self.brian, recipe=self.recipe)
+        self.client.force_authenticate(user=self.brian)
+        response = self.client.get(self.url)
+        self.assertTrue(response.data['is_liked'])
+        self.assertTrue(response.data['comments'][0]['is_owner'])
+
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertFalse(response.data['is_liked'])
+        self.assertFalse(response.data['comments'][0]['is_owner'])
+
+    def test_author_changes_invalidate_cached_response(self):
+        self.client.get(self.url)
+        profile = self.brian.profile
+        profile.image = 'images/new_avatar.jpg'
+        profile.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn(
+            'new_avatar', response.data['comments'][0]['profile_image']
+        )
+
+        self.adam.username = 'adam_renamed'
+        self.adam.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['owner'], 'adam_renamed')
+
+    def test_equivalent_urls_share_versions(self):
+        self.client.get(f'/recipes/0{self.recipe.pk}/')
+        self.recipe.title = 'Edited'
+        self.recipe.save()
+        response = self.client.get(f'/recipes/0{self.recipe.pk}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Edited')
+        response = self.client.get('/recipes/abc/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unrelated_user_saves_keep_cached_response(self):
+        self.client.get(self.url)
+        self.adam.last_login = timezone.now()
+        self.adam.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='pass')
+        self.recipe = Recipe.objects.create(
+            owner=self.adam,
+            title='Test Recipe',
+            short_description='A test recipe'
+        )
+
+    def test_matching_etag_returns_not_modified(self):
+        for url, serializer in [
+            ('/recipes/', RecipeSerializer),
+            (f'/recipes/{self.recipe.pk}/', RecipeSerializer),
+            ('/comments/', CommentSerializer),
+        ]:
+            etag = self.client.get(url)['ETag']
+            with mock.patch.object(
+                serializer, 'to_representation'
+            ) as to_representation:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            to_representation.assert_not_called()
+
+    def test_list_validators_need_one_query(self):
+        etag = self.client.get('/recipes/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/recipes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_without_signals_change_list_etag(self):
+        etag = self.client.get('/recipes/')['ETag']
+        Recipe.objects.bulk_create([
+            Recipe(owner=self.brian, title='Soup', short_description='Soup')
+        ])
+        response = self.client.get('/recipes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_changes_change_etag(self):
+        url = f'/recipes/{self.recipe.pk}/'
+        list_etag = self.client.get('/recipes/')['ETag']
+        detail_etag = self.client.get(url)['ETag']
+        Like.objects.create(owner=self.brian, recipe=self.recipe)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], detail_etag)
+        response = self.client.get('/recipes/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_author_changes_change_etag(self):
+        Comment.objects.create(
+            owner=self.brian, recipe=self.recipe, content='Tasty'
+        )
+        urls = ['/recipes/', f'/recipes/{self.recipe.pk}/', '/comments/']
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        profile = self.brian.profile
+        profile.image = 'images/new_avatar.jpg'
+        profile.save()
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            etags[url] = response['ETag']
+        self.adam.username = 'adam_renamed'
+        self.adam.save()
+        for url in urls[:2]:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+
+    def test_etag_depends_on_user(self):
+        url = f'/recipes/{self.recipe.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(user=self.brian)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        response = self.client.get('/profiles/')
+        response = self.client.get(
+            '/profiles/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='adam', password='pass')
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                owner=self.user,
+                title=f'Recipe {index}',
+                short_description='A test recipe',
+                steps='Mix, Bake ' * 50
+            )
+            for _ in range(5):
+                Comment.objects.create(
+                    owner=self.user, recipe=recipe, content='Tasty'
+                )
+        self.recipe = recipe
+        self.client.force_authenticate(user=self.user)
+
+    def test_fields_limit_response_and_queries(self):
+        full = self.client.get('/recipes/')
+        # Count and recipes only, without the like annotation or comments
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/recipes/', {'fields': 'id,title,image,likes_count'}
+            )
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'title', 'image', 'likes_count'}
+        )
+        self.assertLess(len(response.content), len(full.content) / 4)
+
+    def test_image_variants_load_their_columns(self):
+        Recipe.objects.update(image='images/bread.jpg')
+        for url in ['/recipes/', '/profiles/']:
+            # The validators' aggregate and the rows, with the image
+            with self.assertNumQueries(2):
+                response = self.client.get(
+                    url, {'fields': 'id,image_variants'}
+                )
+            self.assertEqual(
+                set(response.data['results'][0]), {'id', 'image_variants'}
+            )
+        self.assertIn(
+            'bread', self.client.get(
+                '/recipes/', {'fields': 'id,image_variants'}
+            ).data['results'][0]['image_variants']['thumb']
+        )
+
+    def test_expand_comments(self):
+        response = self.client.get(
+            '/recipes/', {'fields': 'id', 'expand': 'comments'}
+        )
+        recipe = response.data['results'][0]
+        self.assertEqual(set(recipe), {'id', 'comments'})
+        self.assertEqual(len(recipe['comments']), 5)
+
+    def test_fields_on_cached_detail(self):
+        url = f'/recipes/{self.recipe.pk}/'
+        self.client.get(url)
+        response = self.client.get(url, {'fields': 'id,title,is_liked'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(set(response.data), {'id', 'title', 'is_liked'})
+
+    def test_expanded_comment_profiles_in_constant_queries(self):
+        for params in [{'expand': 'owner_profile'},
+                       {'fields': 'id', 'expand': 'owner_profile'}]:
+            with self.assertNumQueries(3):
+                response = self.client.get('/comments/', params)
+            results = response.data['results']
+            self.assertEqual(len(results), 10)
+            self.assertIsNone(results[0]['owner_profile']['following_id'])
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    f'/recipes/{self.recipe.pk}/comments/', params
+                )
+            self.assertEqual(len(response.data['results']), 5)
+
+    def test_fields_on_comments(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/comments/', {'fields': 'id,content,recipe'}
+            )
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'content', 'recipe'}
+        )
+
+    def test_writes_use_every_field(self):
+        response = self.client.post(
+            '/comments/?fields=id',
+            {'recipe': self.recipe.pk, 'content': 'Lovely'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['content'], 'Lovely')
+
+
+class RankedLikedRecipesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        fans = [
+            User.objects.create_user(username=f'fan{index}', password='pass')
+            for index in range(10)
+        ]
+        self.recipes = []
+        for likes in [3, 10, 1, 3]:
+            recipe = Recipe.objects.create(
+                owner=self.user,
+                title=f'Recipe with {likes} likes',
+                short_description='A test recipe'
+            )
+            Like.objects.create(owner=self.user, recipe=recipe)
+            for fan in fans[:likes - 1]:
+                Like.objects.create(owner=fan, recipe=recipe)
+            self.recipes.append(recipe)
+        self.client.force_authenticate(user=self.user)
+
+    def titles(self, response):
+        return [recipe['title'] for recipe in response.data['results']]
+
+    def test_ranks_by_likes_with_cursor(self):
+        with mock.patch.object(KeysetOnlyPagination, 'page_size', 2):
+            with self.assertNumQueries(2):
+                response = self.client.get('/ranked-liked-recipes/')
+            self.assertEqual(
+                [recipe['id'] for recipe in response.data['results']],
+                [self.recipes[1].pk, self.recipes[3].pk]
+            )
+            response = self.client.get(response.data['next'])
+            self.assertEqual(
+                [recipe['id'] for recipe in response.data['results']],
+                [self.recipes[0].pk, self.recipes[2].pk]
+            )
+            self.assertIsNone(response.data['next'])
+
+    def test_hot_ranking_favours_recent_recipes(self):
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            created_at=timezone.now() - timedelta(days=5)
+        )
+        response = self.client.get('/ranked-liked-recipes/')
+        self.assertEqual(self.titles(response)[0], 'Recipe with 10 likes')
+        with mock.patch.object(KeysetOnlyPagination, 'page_size', 2):
+            response = self.client.get(
+                '/ranked-liked-recipes/', {'ranking': 'hot'}
+            )
+            titles = self.titles(response)
+            response = self.client.get(response.data['next'])
+        titles += self.titles(response)
+        self.assertEqual(len(titles), 4)
+        self.assertEqual(titles[-1], 'Recipe with 10 likes')
+
+    def test_invalid_ranking(self):
+        response = self.client.get('/ranked-liked-recipes/', {'ranking': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_anonymous_users_get_no_recipes(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/ranked-liked-recipes/')
+        self.assertEqual(response.data['results'], [])
+
+
+def photo_upload(size=(2400, 1200)):
+    """
+    Return a JPEG upload carrying EXIF data, as phone cameras write it.
+    """
+    exif = Image.Exif()
+    exif[0x010f] = 'Camera maker'
+    output = BytesIO()
+    Image.new('RGB', size, 'orange').save(
+        output, 'JPEG', exif=exif.tobytes()
+    )
+    return SimpleUploadedFile(
+        'photo.jpg', output.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+    IMAGE_WORKERS=0,
+)
+class ImageUploadTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.adam)
+        self.data = {
+            'title': 'Pancakes',
+            'short_description': 'Fluffy',
+            'ingredients': 'Flour, Milk',
+            'steps': 'Mix, Fry',
+        }
+
+    def test_upload_is_resized_after_the_response(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/recipes/', {**self.data, 'image': photo_upload()},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['image'])
+        self.assertEqual(response.data['image_variants'], {})
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(f'/recipes/{response.data["id"]}/')
+        variants = Recipe.objects.get().image_variants
+        self.assertEqual(set(response.data['image_variants']), {
+            'thumb', 'card', 'full'
+        })
+        self.assertTrue(response.data['image'].endswith(variants['full']))
+        for name, size in [('thumb', 160), ('card', 640), ('full', 1600)]:
+            with default_storage.open(variants[name]) as stored:
+                with Image.open(stored) as image:
+                    self.assertEqual(max(image.size), size)
+                    self.assertEqual(len(image.getexif()), 0)
+
+    def test_upload_is_queued_to_the_worker_pool(self):
+        with override_settings(IMAGE_WORKERS=2), mock.patch(
+            'project5_api.images.get_executor'
+        ) as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/recipes/', {**self.data, 'image': photo_upload()},
+                    format='multipart'
+                )
+        self.assertEqual(response.status_code, 201)
+        get_executor.return_value.submit.assert_called_once()
+        self.assertEqual(Recipe.objects.get().image_variants, {})
+
+    def test_profile_image_variants(self):
+        url = f'/profiles/{self.adam.profile.pk}/'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                url, {'image': photo_upload((300, 300))}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(
+            set(response.data['image_variants']), {'thumb', 'card', 'full'}
+        )
+
+
+class ImageURLTests(APITestCase):
+    def setUp(self):
+        image_url.cache_clear()
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.recipe = Recipe.objects.create(
+            owner=self.adam,
+            title='Pancakes',
+            short_description='Fluffy',
+            ingredients='Flour, Milk',
+            steps='Mix, Fry',
+            image='recipes/pancakes',
+        )
+        for index in range(5):
+            Comment.objects.create(
+                owner=self.adam, recipe=self.recipe, content=f'Yum {index}'
+            )
+
+    def test_profile_image_url_is_built_once(self):
+        response = self.client.get('/comments/')
+        images = {
+            comment['profile_image'] for comment in response.data['results']
+        }
+        self.assertEqual(len(images), 1)
+        self.assertEqual(image_url.cache_info().misses, 1)
+        self.assertEqual(image_url.cache_info().hits, 4)
+
+    def test_unprocessed_image_variants_resize_on_delivery(self):
+        response = self.client.get(f'/recipes/{self.recipe.pk}/')
+        variants = response.data['image_variants']
+        self.assertEqual(set(variants), {'thumb', 'card', 'full'})
+        self.assertIn('c_limit,h_160,w_160', variants['thumb'])
+        self.assertTrue(variants['thumb'].endswith('recipes/pancakes'))
+        self.assertEqual(
+            response.data['image'], image_url('recipes/pancakes')
+        )
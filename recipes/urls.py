@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from project5_api.async_views import async_patterns
 from .views import RecipeViewSet, CommentViewSet, RankedLikedRecipesView
 
 # Define router for Recipe and Comment ViewSets
@@ -9,7 +10,8 @@ router.register(r'comments', CommentViewSet)
 
 # Define URL patterns
 urlpatterns = [
-    path('', include(router.urls)),
-    path('ranked-liked-recipes/', RankedLikedRecipesView.as_view(), 
+    path('', include(async_patterns(router.urls))),
+] + async_patterns([
+    path('ranked-liked-recipes/', RankedLikedRecipesView.as_view(),
          name='ranked-liked-recipes'),
-]
+])
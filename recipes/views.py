@@ -1,20 +1,84 @@
-from rest_framework.views import APIView
-from rest_framework import viewsets, permissions
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.http import Http404
+from rest_framework import generics, viewsets, permissions
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Recipe, Comment
-from .serializers import RecipeSerializer, CommentSerializer
+from .ingredients import parse_ingredients
+from .models import Recipe, Comment, Ingredient
+from .ranking import hot_score
+from .search import RecipeSearchFilter
+from .serializers import (
+    RecipeSerializer, RecipeSummarySerializer, CommentSerializer,
+    CookWithRecipeSerializer
+)
+from likes.models import Like
+from profiles.models import Profile, with_profiles_following_id
+from project5_api.async_views import run_concurrently
+from project5_api.cache import CachedRetrieveMixin, lookup_pk
+from project5_api.conditional import ConditionalGetMixin
+from project5_api.images import ImageUploadMixin
+from project5_api.pagination import KeysetOnlyPagination, KeysetPagination
 from project5_api.permissions import IsOwnerOrReadOnly
+from project5_api.sparse import SparseFieldsMixin, only_requested
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters
 from rest_framework.decorators import action
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeSummaryMixin(SparseFieldsMixin):
+    """
+    Mixin for views listing recipes, serving the summary representation
+    with only the latest comments of each recipe. The full comment
+    threads can be requested with `?comments=all` or `?expand=comments`.
+    """
+    comments_query_param = 'comments'
+    # Columns always loaded, the keyset cursor is built from them
+    required_fields = ('id', 'created_at')
+
+    def use_summary(self):
+        """
+        Return whether the summary representation should be served.
+        """
+        return self.request.query_params.get(
+            self.comments_query_param
+        ) != 'all'
+
+    def get_serializer_class(self):
+        if self.use_summary():
+            return RecipeSummarySerializer
+        return RecipeSerializer
+
+    def with_related_data(self, queryset):
+        """
+        Load the columns and related data needed by the requested
+        fields of the serializer in use.
+        """
+        if self.field_requested('owner'):
+            queryset = queryset.select_related('owner__profile')
+        if self.field_requested('is_liked'):
+            queryset = queryset.with_is_liked(self.request.user)
+        if not self.use_summary() or 'comments' in self.get_expanded_fields():
+            if self.field_requested('comments'):
+                queryset = queryset.with_comments()
+        elif self.field_requested('latest_comments'):
+            queryset = queryset.with_latest_comments()
+        return only_requested(
+            queryset, self.get_requested_fields(), self.required_fields,
+            self.get_serializer_class().field_columns
+        )
+
+
+class RecipeViewSet(
+    ConditionalGetMixin, RecipeSummaryMixin, CachedRetrieveMixin,
+    ImageUploadMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for handling Recipe CRUD operations, with filtering,
     searching, and listing capabilities. Recipes can be filtered
     by owner and title, and searched by title, ingredients,
-    and short description.
+    and short description. Single recipes are served from the
+    response cache, with their comments at `/recipes/<id>/comments/`.
+    Uploaded images are resized in the background.
     """
     queryset = Recipe.objects.all().order_by('-created_at')
     serializer_class = RecipeSerializer
@@ -22,73 +86,275 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permissions.IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly
     ]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    pagination_class = KeysetPagination
+    query_budget = {
+        'list': 6, 'retrieve': 6, 'by_profile': 6, 'comments': 5,
+        'cook_with': 6,
+    }
+    filter_backends = [DjangoFilterBackend, RecipeSearchFilter]
     filterset_fields = ['owner', 'title']
     search_fields = ['title', 'ingredients', 'short_description']
+    cache_namespace = 'recipe'
+    personal_fields = ['is_liked']
+    # Recipes show their owners' and commenters' names and images
+    conditional_namespaces = ['recipe', 'profile']
+    # Cursor pages of cook-with follow its ranking
+    cook_with_ordering = ('-coverage', '-matched_ingredients', '-id')
+
+    @property
+    def keyset_ordering(self):
+        if self.action == 'cook_with':
+            return self.cook_with_ordering
+        return KeysetPagination.ordering
+
+    def get_queryset(self):
+        """
+        Return recipes with likes, owners and comments loaded up front.
+        """
+        queryset = Recipe.objects.order_by('-created_at')
+        if self.action == 'retrieve':
+            # Cached responses hold every field, see `select_fields`
+            return queryset.with_related_data(self.request.user)
+        return self.with_related_data(queryset)
+
+    def use_summary(self):
+        """
+        Serve summaries from the list actions only, and always
+        from cook-with.
+        """
+        if self.action == 'cook_with':
+            return True
+        return (
+            self.action in ('list', 'by_profile')
+            and super().use_summary()
+        )
+
+    def get_overlay(self, body):
+        """
+        Return whether the current user has liked the recipe.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return {'is_liked': False}
+        return {
+            'is_liked': Like.objects.filter(
+                owner=user, recipe_id=body['id']
+            ).exists()
+        }
+
+    def personalize(self, data):
+        """
+        Mark the comments written by the current user as their own.
+        """
+        username = self.request.user.username
+        data['comments'] = [
+            {**comment, 'is_owner': comment['owner'] == username}
+            for comment in data['comments']
+        ]
+        return data
 
     def perform_create(self, serializer):
         """
         Set the owner of the recipe to the current user upon creation.
         """
-        serializer.save(owner=self.request.user)
+        self.save_with_images(serializer, owner=self.request.user)
 
     def perform_update(self, serializer):
         """
         Ensure the owner of the recipe remains the same upon update.
         """
-        serializer.save(owner=self.request.user)
+        self.save_with_images(serializer, owner=self.request.user)
 
-    @action(detail=False, methods=['get'])
+    @action(
+        detail=False, methods=['get'], pagination_class=KeysetOnlyPagination
+    )
     def by_profile(self, request, pk=None):
         """
-        Custom action to retrieve recipes by profile ID.
+        Custom action to list the recipes of a profile, newest first,
+        paginated with a cursor. The profile is resolved to its owner
+        first, so recipes are read from the owner index without a join.
         """
         profile_id = request.query_params.get('profile_id')
-        if profile_id:
-            recipes = Recipe.objects.filter(owner__profile__id=profile_id)
-            serializer = self.get_serializer(recipes, many=True)
-            return Response(serializer.data)
-        return Response({'detail': 'Profile ID not provided.'}, status=400)
+        if not profile_id:
+            return Response(
+                {'detail': 'Profile ID not provided.'}, status=400
+            )
+        if not profile_id.isdigit():
+            raise ValidationError({
+                'profile_id': 'A valid integer is required.'
+            })
+        owner_id = Profile.objects.filter(
+            pk=profile_id
+        ).values_list('owner_id', flat=True).first()
+        if owner_id is None:
+            raise Http404
+        recipes = self.filter_queryset(self.get_queryset()).filter(
+            owner_id=owner_id
+        )
+        page = self.paginate_queryset(recipes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='cook-with')
+    def cook_with(self, request):
+        """
+        Custom action to find recipes that can be made with the given
+        comma separated ingredients, ranked by the share of each
+        recipe's ingredients that are covered.
+        """
+        names = parse_ingredients(request.query_params.get('ingredients', ''))
+        if not names:
+            return Response(
+                {'detail': 'Ingredients not provided.'}, status=400
+            )
+
+        # Intersect the inverted index entries of the given ingredients
+        ingredient_ids = Ingredient.objects.filter(
+            name__in=names
+        ).values('id')
+        recipes = self.with_related_data(
+            Recipe.objects.filter(
+                ingredient_entries__ingredient__in=ingredient_ids
+            ).annotate(
+                matched_ingredients=Count('ingredient_entries')
+            ).annotate(
+                # Counters of imported recipes may not be reconciled yet
+                coverage=Coalesce(
+                    Cast('matched_ingredients', FloatField())
+                    / NullIf(F('ingredients_count'), 0),
+                    Value(0.0)
+                )
+            )
+        ).order_by(*self.cook_with_ordering)
 
-class RankedLikedRecipesView(APIView):
+        page = self.paginate_queryset(recipes)
+        serializer = CookWithRecipeSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context(),
+            fields=self.get_requested_fields(),
+            expand=self.get_expanded_fields()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True, methods=['get'], pagination_class=KeysetOnlyPagination
+    )
+    def comments(self, request, pk=None):
+        """
+        Custom action to list the comments of a recipe, newest first,
+        paginated with a cursor.
+        """
+        pk = lookup_pk(self)
+        comments = Comment.objects.filter(recipe_id=pk)
+        if 'owner_profile' in self.get_expanded_fields():
+            comments = with_profiles_following_id(
+                comments, 'owner', request.user
+            )
+        else:
+            comments = comments.select_related('owner__profile')
+        exists, page = run_concurrently(
+            Recipe.objects.filter(pk=pk).exists,
+            lambda: self.paginate_queryset(comments)
+        )
+        if not exists:
+            raise Http404
+        serializer = CommentSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context(),
+            fields=self.get_requested_fields(),
+            expand=self.get_expanded_fields()
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+class RankedLikedRecipesView(RecipeSummaryMixin, generics.ListAPIView):
     """
-    API view to retrieve a list of recipes liked by the
-    current user, ranked by the number of likes in descending order.
+    API view to retrieve a list of recipes liked by the current user,
+    ranked by the number of likes in descending order, or by their hot
+    score with `?ranking=hot`. Pages are fetched with a keyset cursor.
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetOnlyPagination
+    query_budget = 5
+    ranking_query_param = 'ranking'
+    rankings = {
+        'likes': ('-likes_count', '-id'),
+        'hot': ('-hot_score', '-id'),
+    }
+    required_fields = ('id', 'likes_count')
 
-    def get(self, request):
+    def get_ranking(self):
         """
-        Get the recipes liked by the current user,
-        ranked by the number of likes.
+        Return the requested ranking, by likes unless specified.
         """
-        user = request.user
-        liked_recipes = Recipe.objects.filter(likes__owner=user).distinct()
-        ranked_recipes = sorted(
-            liked_recipes,
-            key=lambda recipe: recipe.likes.count(),
-            reverse=True
+        ranking = self.request.query_params.get(
+            self.ranking_query_param, 'likes'
         )
+        if ranking not in self.rankings:
+            raise ValidationError({
+                self.ranking_query_param:
+                f'Choose one of: {", ".join(self.rankings)}.'
+            })
+        return ranking
 
-        serializer = RecipeSerializer(
-            ranked_recipes,
-            many=True,
-            context={'request': request}
-        )
-        return Response(serializer.data)
+    @property
+    def keyset_ordering(self):
+        return self.rankings[self.get_ranking()]
+
+    def get_queryset(self):
+        """
+        Return the recipes liked by the current user, ranked
+        in the database using the stored likes counter.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return Recipe.objects.none()
+        recipes = Recipe.objects.filter(likes__owner=user)
+        if self.get_ranking() == 'hot':
+            recipes = recipes.annotate(hot_score=hot_score())
+        return self.with_related_data(recipes).order_by(*self.keyset_ordering)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for handling Comment CRUD operations.
     """
-    queryset = Comment.objects.all().order_by('-created_at')
+    queryset = Comment.objects.select_related(
+        'owner__profile'
+    ).order_by('-created_at')
     serializer_class = CommentSerializer
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly
     ]
+    pagination_class = KeysetPagination
+    query_budget = {'list': 5, 'retrieve': 5}
+    # Comment changes are recorded against their recipes, and comments
+    # show their authors' names and images
+    conditional_namespaces = ['recipe', 'profile']
+
+    def get_queryset(self):
+        """
+        Return comments with only the columns and authors
+        needed by the requested fields.
+        """
+        queryset = Comment.objects.order_by('-created_at')
+        if 'owner_profile' in self.get_expanded_fields():
+            queryset = with_profiles_following_id(
+                queryset, 'owner', self.request.user
+            )
+        elif self.field_requested(
+            'owner', 'is_owner', 'profile_id', 'profile_image'
+        ):
+            queryset = queryset.select_related('owner__profile')
+        return only_requested(
+            queryset, self.get_requested_fields(), ('id', 'created_at'),
+            self.get_serializer_class().field_columns
+        )
 
     def perform_create(self, serializer):
         """
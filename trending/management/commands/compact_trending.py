@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from trending.models import compact_trending
+
+
+class Command(BaseCommand):
+    """
+    Drop expired activity buckets and rebuild the trending rankings,
+    meant to run hourly from a scheduler.
+    """
+    help = 'Compact activity buckets and rebuild the trending rankings.'
+
+    def handle(self, *args, **options):
+        deleted, ranked = compact_trending()
+        self.stdout.write(f'Deleted {deleted} expired activity buckets.')
+        for window, count in ranked.items():
+            self.stdout.write(f'Ranked {count} recipes over {window}.')
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.4 on 2026-10-18 11:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('recipes', '0009_comment_recipe_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('24h', '24h'), ('7d', '7d'), ('30d', '30d')], max_length=3)),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='recipes.recipe')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to='recipes.recipe')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingrecipe',
+            index=models.Index(fields=['window', 'score', 'recipe'], name='trending_tr_window_d88e28_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingrecipe',
+            index=models.Index(fields=['window', 'likes', 'recipe'], name='trending_tr_window_727dcb_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingrecipe',
+            unique_together={('window', 'recipe')},
+        ),
+        migrations.AddIndex(
+            model_name='activitybucket',
+            index=models.Index(fields=['hour'], name='trending_ac_hour_797a69_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='activitybucket',
+            unique_together={('recipe', 'hour')},
+        ),
+    ]
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+# The longest trending window, older activity is never ranked
+BACKFILL_SPAN = timedelta(days=30)
+
+
+def backfill_buckets(apps, schema_editor):
+    """
+    Count the recent likes and comments into hourly buckets. The
+    rankings are built from them by the next `compact_trending` run.
+    """
+    ActivityBucket = apps.get_model('trending', 'ActivityBucket')
+    since = timezone.now() - BACKFILL_SPAN
+    buckets = {}
+    for model_name, field in [('likes.Like', 'likes'),
+                              ('recipes.Comment', 'comments')]:
+        model = apps.get_model(model_name)
+        totals = model.objects.filter(created_at__gte=since).annotate(
+            hour=TruncHour('created_at')
+        ).order_by().values('recipe', 'hour').annotate(total=Count('pk'))
+        for total in totals:
+            bucket = buckets.setdefault(
+                (total['recipe'], total['hour']),
+                ActivityBucket(recipe_id=total['recipe'], hour=total['hour'])
+            )
+            setattr(bucket, field, total['total'])
+    ActivityBucket.objects.bulk_create(buckets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trending', '0001_initial'),
+        ('likes', '0001_initial'),
+        ('recipes', '0009_comment_recipe_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
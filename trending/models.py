@@ -0,0 +1,288 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from likes.models import Like, likes_created, likes_deleted
+from recipes.models import Comment, Recipe
+
+# Trending windows and how far back each of them reaches
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+# A comment counts as much as this many likes in the trending score
+COMMENT_WEIGHT = 2
+
+
+class ActivityBucket(models.Model):
+    """
+    Model counting the likes and comments a recipe received
+    during one hour, the source of the trending rankings.
+    """
+    recipe = models.ForeignKey(
+        Recipe, related_name='activity_buckets', on_delete=models.CASCADE
+    )
+    hour = models.DateTimeField()
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['recipe', 'hour']
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} at {self.hour}'
+
+
+class TrendingRecipe(models.Model):
+    """
+    Model holding the materialized ranking of a recipe in one trending
+    window. Rows are updated as likes and comments come in, and rebuilt
+    from the activity buckets by the `compact_trending` command.
+    """
+    window = models.CharField(
+        max_length=3, choices=[(window, window) for window in WINDOWS]
+    )
+    recipe = models.ForeignKey(
+        Recipe, related_name='trending', on_delete=models.CASCADE
+    )
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['window', 'recipe']
+        indexes = [
+            # Support keyset pages of each ranking of a window
+            models.Index(fields=['window', 'score', 'recipe']),
+            models.Index(fields=['window', 'likes', 'recipe']),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} trending over {self.window}'
+
+
+def score(likes, comments):
+    return likes + COMMENT_WEIGHT * comments
+
+
+def bucket_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def add_counts(model, keys, field, values, counts):
+    """
+    Add the counts to the rows with the given keys and each of the
+    values of `field`, in one insert of the missing rows, skipped for
+    removals as compacted rows have nothing to remove from, and one
+    update of all of them.
+    """
+    if all(value >= 0 for value in counts.values()):
+        model.objects.bulk_create([
+            model(**keys, **{field: value}) for value in values
+        ], ignore_conflicts=True)
+    model.objects.filter(**keys, **{f'{field}__in': values}).update(
+        **{name: F(name) + value for name, value in counts.items()}
+    )
+
+
+def record_activity(recipe_id, moment, likes=0, comments=0):
+    """
+    Add likes and comments made at the given moment to the recipe's
+    hourly bucket and to the rankings of the windows it falls in.
+    """
+    add_counts(
+        ActivityBucket, {'recipe_id': recipe_id}, 'hour',
+        [bucket_hour(moment)], {'likes': likes, 'comments': comments}
+    )
+    now = timezone.now()
+    windows = [
+        window for window, span in WINDOWS.items() if moment > now - span
+    ]
+    if windows:
+        add_counts(
+            TrendingRecipe, {'recipe_id': recipe_id}, 'window', windows,
+            {
+                'likes': likes,
+                'comments': comments,
+                'score': score(likes, comments),
+            }
+        )
+
+
+def add_counts_to_recipes(model, changes):
+    """
+    Add counts to many rows in one update per group of rows with the
+    same counts. `changes` maps (keys, counts) pairs, both tuples of
+    (field, value) items, to the ids of the recipes whose rows with
+    those keys get those counts. Missing rows are created first with
+    one insert, except for removals.
+    """
+    model.objects.bulk_create([
+        model(recipe_id=recipe_id, **dict(keys))
+        for (keys, counts), recipe_ids in changes.items()
+        if all(value >= 0 for _, value in counts)
+        for recipe_id in recipe_ids
+    ], ignore_conflicts=True)
+    for (keys, counts), recipe_ids in changes.items():
+        model.objects.filter(recipe_id__in=recipe_ids, **dict(keys)).update(
+            **{field: F(field) + value for field, value in counts}
+        )
+
+
+def record_activities(activities):
+    """
+    Add many (recipe id, moment, likes, comments) activities to the
+    hourly buckets and window rankings like `record_activity`, with a
+    few statements for all of them instead of several per activity.
+    """
+    buckets = defaultdict(Counter)
+    rankings = defaultdict(Counter)
+    now = timezone.now()
+    for recipe_id, moment, likes, comments in activities:
+        activity = Counter(likes=likes, comments=comments)
+        buckets[recipe_id, bucket_hour(moment)].update(activity)
+        for window, span in WINDOWS.items():
+            if moment > now - span:
+                rankings[recipe_id, window].update(activity)
+
+    bucket_changes = defaultdict(list)
+    for (recipe_id, hour), totals in buckets.items():
+        counts = (('likes', totals['likes']), ('comments', totals['comments']))
+        bucket_changes[(('hour', hour),), counts].append(recipe_id)
+    add_counts_to_recipes(ActivityBucket, bucket_changes)
+
+    ranking_changes = defaultdict(list)
+    for (recipe_id, window), totals in rankings.items():
+        counts = (
+            ('likes', totals['likes']),
+            ('comments', totals['comments']),
+            ('score', score(totals['likes'], totals['comments'])),
+        )
+        ranking_changes[(('window', window),), counts].append(recipe_id)
+    add_counts_to_recipes(TrendingRecipe, ranking_changes)
+
+
+def rebuild_buckets(now=None):
+    """
+    Recount the likes and comments of the longest window into hourly
+    buckets, for activity saved without signals, e.g. by bulk imports.
+    The rankings are rebuilt from them by `compact_trending`.
+    Return the number of buckets.
+    """
+    since = bucket_hour((now or timezone.now()) - max(WINDOWS.values()))
+    buckets = {}
+    for model, field in [(Like, 'likes'), (Comment, 'comments')]:
+        totals = model.objects.filter(created_at__gte=since).annotate(
+            hour=TruncHour('created_at')
+        ).order_by().values('recipe', 'hour').annotate(total=Count('pk'))
+        for total in totals:
+            bucket = buckets.setdefault(
+                (total['recipe'], total['hour']),
+                ActivityBucket(recipe_id=total['recipe'], hour=total['hour'])
+            )
+            setattr(bucket, field, total['total'])
+    with transaction.atomic():
+        ActivityBucket.objects.filter(hour__gte=since).delete()
+        ActivityBucket.objects.bulk_create(buckets.values(), batch_size=1000)
+    return len(buckets)
+
+
+def compact_trending(now=None):
+    """
+    Delete the buckets older than the longest window, and rebuild the
+    ranking of every window from the remaining buckets so activity
+    that has slid out of a window stops counting.
+    Return the number of deleted buckets and of ranked rows per window.
+    """
+    now = now or timezone.now()
+    deleted, _ = ActivityBucket.objects.filter(
+        hour__lt=bucket_hour(now - max(WINDOWS.values()))
+    ).delete()
+
+    ranked = {}
+    for window, span in WINDOWS.items():
+        totals = ActivityBucket.objects.filter(
+            hour__gte=bucket_hour(now - span)
+        ).order_by().values('recipe').annotate(
+            total_likes=Sum('likes'), total_comments=Sum('comments')
+        )
+        rows = [
+            TrendingRecipe(
+                window=window,
+                recipe_id=total['recipe'],
+                likes=total['total_likes'],
+                comments=total['total_comments'],
+                score=score(total['total_likes'], total['total_comments']),
+            )
+            for total in totals
+        ]
+        with transaction.atomic():
+            TrendingRecipe.objects.filter(window=window).delete()
+            TrendingRecipe.objects.bulk_create(rows, batch_size=1000)
+        ranked[window] = len(rows)
+    return deleted, ranked
+
+
+# Signals to count likes and comments into the trending rankings
+def record_like(sender, instance, created, **kwargs):
+    """
+    Count a new Like towards the recipe's trending rankings.
+    """
+    if created:
+        record_activity(instance.recipe_id, instance.created_at, likes=1)
+
+
+def remove_like(sender, instance, **kwargs):
+    """
+    Take a deleted Like back out of the recipe's trending rankings.
+    """
+    record_activity(instance.recipe_id, instance.created_at, likes=-1)
+
+
+def record_likes(sender, likes, **kwargs):
+    """
+    Count likes created in bulk towards the trending rankings.
+    """
+    record_activities(
+        (like.recipe_id, like.created_at, 1, 0) for like in likes
+    )
+
+
+def remove_likes(sender, likes, **kwargs):
+    """
+    Take likes deleted in bulk back out of the trending rankings.
+    """
+    record_activities(
+        (like.recipe_id, like.created_at, -1, 0) for like in likes
+    )
+
+
+def record_comment(sender, instance, created, **kwargs):
+    """
+    Count a new Comment towards the recipe's trending rankings.
+    """
+    if created:
+        record_activity(instance.recipe_id, instance.created_at, comments=1)
+
+
+def remove_comment(sender, instance, **kwargs):
+    """
+    Take a deleted Comment back out of the recipe's trending rankings.
+    """
+    record_activity(instance.recipe_id, instance.created_at, comments=-1)
+
+
+post_save.connect(record_like, sender=Like)
+post_delete.connect(remove_like, sender=Like)
+likes_created.connect(record_likes, sender=Like)
+likes_deleted.connect(remove_likes, sender=Like)
+post_save.connect(record_comment, sender=Comment)
+post_delete.connect(remove_comment, sender=Comment)
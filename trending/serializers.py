@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from recipes.serializers import RecipeSummarySerializer
+
+
+class TrendingRecipeSerializer(RecipeSummarySerializer):
+    """
+    Serializer for trending recipes, including the likes,
+    comments and score of the recipe in the requested window.
+    """
+    trending_likes = serializers.ReadOnlyField()
+    trending_comments = serializers.ReadOnlyField()
+    trending_score = serializers.ReadOnlyField()
+
+    class Meta(RecipeSummarySerializer.Meta):
+        fields = RecipeSummarySerializer.Meta.fields + [
+            'trending_likes', 'trending_comments', 'trending_score'
+        ]
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from likes.models import Like
+from project5_api.pagination import KeysetOnlyPagination
+from recipes.models import Comment, Recipe
+from .models import (
+    WINDOWS, ActivityBucket, TrendingRecipe, compact_trending
+)
+
+
+class TrendingTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{index}', password='pass')
+            for index in range(4)
+        ]
+        self.recipes = [
+            Recipe.objects.create(
+                owner=self.users[0],
+                title=f'Recipe {index}',
+                short_description='A test recipe'
+            )
+            for index in range(3)
+        ]
+
+    def like(self, recipe, count):
+        for user in self.users[:count]:
+            Like.objects.create(owner=user, recipe=recipe)
+
+    def ranked_ids(self, **params):
+        response = self.client.get('/trending/', params)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_likes_and_comments_update_rankings(self):
+        self.like(self.recipes[0], 1)
+        self.like(self.recipes[1], 3)
+        Comment.objects.create(
+            owner=self.users[0], recipe=self.recipes[0], content='Tasty'
+        )
+        Comment.objects.create(
+            owner=self.users[1], recipe=self.recipes[0], content='Lovely'
+        )
+        # Recipe 0 scores 1 + 2 * 2, recipe 1 scores 3
+        self.assertEqual(
+            self.ranked_ids(), [self.recipes[0].pk, self.recipes[1].pk]
+        )
+        self.assertEqual(
+            self.ranked_ids(ranking='likes'),
+            [self.recipes[1].pk, self.recipes[0].pk]
+        )
+        bucket = ActivityBucket.objects.get(recipe=self.recipes[0])
+        self.assertEqual((bucket.likes, bucket.comments), (1, 2))
+
+        Like.objects.filter(recipe=self.recipes[1]).delete()
+        Comment.objects.all().delete()
+        self.assertEqual(self.ranked_ids(), [self.recipes[0].pk])
+
+    def test_activity_is_recorded_in_fixed_statements(self):
+        with CaptureQueriesContext(connection) as queries:
+            Like.objects.create(owner=self.users[0], recipe=self.recipes[0])
+        # An insert and an update each, for the bucket and all windows
+        self.assertEqual(len([
+            query for query in queries if 'trending_' in query['sql']
+        ]), 4)
+        self.assertEqual(
+            TrendingRecipe.objects.filter(likes=1, score=1).count(),
+            len(WINDOWS)
+        )
+
+    def test_pages_are_read_with_constant_queries(self):
+        for index, recipe in enumerate(self.recipes):
+            self.like(recipe, index + 1)
+        with mock.patch.object(KeysetOnlyPagination, 'page_size', 2):
+            with self.assertNumQueries(2):
+                response = self.client.get('/trending/')
+            self.assertEqual(response.data['results'][0]['trending_likes'], 3)
+            response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[0].pk]
+        )
+
+    def test_compaction_expires_old_activity(self):
+        self.like(self.recipes[0], 2)
+        self.like(self.recipes[1], 1)
+        ActivityBucket.objects.filter(recipe=self.recipes[0]).update(
+            hour=timezone.now() - timedelta(days=3)
+        )
+        out = StringIO()
+        call_command('compact_trending', stdout=out)
+        self.assertIn('Ranked 2 recipes over 7d.', out.getvalue())
+        self.assertEqual(self.ranked_ids(window='24h'), [self.recipes[1].pk])
+        self.assertEqual(
+            self.ranked_ids(window='7d'),
+            [self.recipes[0].pk, self.recipes[1].pk]
+        )
+
+        deleted, ranked = compact_trending(
+            now=timezone.now() + timedelta(days=31)
+        )
+        self.assertEqual(deleted, 2)
+        self.assertFalse(TrendingRecipe.objects.exists())
+
+    def test_invalid_window(self):
+        response = self.client.get('/trending/', {'window': '1y'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,7 @@
+from django.urls import path
+from project5_api.async_views import async_patterns
+from trending import views
+
+urlpatterns = async_patterns([
+    path('trending/', views.TrendingView.as_view(), name='trending'),
+])
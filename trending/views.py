@@ -0,0 +1,71 @@
+from django.db.models import F
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from project5_api.pagination import KeysetOnlyPagination
+from recipes.models import Recipe
+from recipes.views import RecipeSummaryMixin
+from .models import WINDOWS
+from .serializers import TrendingRecipeSerializer
+
+
+class TrendingView(RecipeSummaryMixin, generics.ListAPIView):
+    """
+    API view to list the recipes trending over the last 24 hours,
+    7 days or 30 days, ranked by score or with `?ranking=likes` by
+    likes. Pages are read from the materialized trending table
+    with a keyset cursor.
+    """
+    serializer_class = TrendingRecipeSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetOnlyPagination
+    query_budget = 5
+    window_query_param = 'window'
+    default_window = '7d'
+    ranking_query_param = 'ranking'
+    rankings = {
+        'score': ('-trending_score', '-id'),
+        'likes': ('-trending_likes', '-id'),
+    }
+    required_fields = ('id',)
+
+    def get_choice(self, param, choices, default):
+        """
+        Return the value of a query parameter, which must be one
+        of the given choices.
+        """
+        value = self.request.query_params.get(param, default)
+        if value not in choices:
+            raise ValidationError({
+                param: f'Choose one of: {", ".join(choices)}.'
+            })
+        return value
+
+    @property
+    def keyset_ordering(self):
+        ranking = self.get_choice(
+            self.ranking_query_param, self.rankings, 'score'
+        )
+        return self.rankings[ranking]
+
+    def use_summary(self):
+        return True
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_queryset(self):
+        """
+        Return the recipes ranked in the requested window,
+        joined to their row in the trending table.
+        """
+        window = self.get_choice(
+            self.window_query_param, WINDOWS, self.default_window
+        )
+        recipes = Recipe.objects.filter(
+            trending__window=window, trending__score__gt=0
+        ).annotate(
+            trending_likes=F('trending__likes'),
+            trending_comments=F('trending__comments'),
+            trending_score=F('trending__score'),
+        )
+        return self.with_related_data(recipes).order_by(*self.keyset_ordering)